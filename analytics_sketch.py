@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Streaming sketches for live click analytics.
+LiveAnalytics is fed by save_click_data and track_conversion and answers
+the get_analytics questions from fixed-size sketches instead of GROUP BY
+and COUNT(DISTINCT) scans over click_data:
+
+- SpaceSaving: top keywords by clicks, top campaigns by clicks and revenue.
+  Reported counts never undercount; each comes with its maximum overcount.
+- CountMinSketch: conversions per keyword, clicks and conversions per
+  campaign. Overcounts by at most e/width of the day's total with
+  probability 1 - e^-depth.
+- HyperLogLog: distinct keywords and campaigns, standard error 1.04/sqrt(m).
+
+Sketches are kept per UTC day and merged at query time (closed days are
+merged once and cached), so a 30-day answer costs the same at any traffic
+volume. A background thread writes days that changed to one file per day;
+a restarted process resumes from them. Each process keeps its own
+sketches: with several workers, each reports the traffic it served.
+
+A conversion counts once per call and adds its value, whereas click_data
+keeps the last value per session. Conversions are attributed through a
+bounded cache of recent sessions; older sessions count in the totals only.
+
+Usage:
+    python analytics_sketch.py --benchmark [clicks]
+"""
+
+import base64
+import hashlib
+import heapq
+import json
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from operator import add
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CAPACITY = 1000          # Space-Saving counters per day
+DEFAULT_CMS_WIDTH = 4096
+DEFAULT_CMS_DEPTH = 4
+DEFAULT_HLL_PRECISION = 12       # 4096 registers
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_SNAPSHOT_INTERVAL = 30.0
+DEFAULT_SESSION_CACHE = 200000   # Recent sessions whose conversions are attributed
+DEFAULT_SNAPSHOT_DIR = 'live_analytics'
+
+
+def _hash64(item: str) -> int:
+    return int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class SpaceSaving:
+    """Heavy hitters in a fixed number of counters (Metwally et al.)"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.counters: Dict[str, List[float]] = {}  # item -> [count, overcount]
+        # One entry per item; its key may lag the item's count, never lead it
+        self._heap: List[Tuple[float, str]] = []
+        self.total = 0.0
+
+    def add(self, item: str, weight: float = 1.0):
+        self.total += weight
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0.0]
+            heapq.heappush(self._heap, (weight, item))
+            return
+        # The new item takes over the smallest counter; that count becomes its overcount
+        floor, victim = self._pop_min()
+        del self.counters[victim]
+        self.counters[item] = [floor + weight, floor]
+        heapq.heappush(self._heap, (floor + weight, item))
+
+    def _pop_min(self) -> Tuple[float, str]:
+        while True:
+            key, item = heapq.heappop(self._heap)
+            count = self.counters[item][0]
+            if count == key:
+                return key, item
+            heapq.heappush(self._heap, (count, item))
+
+    def floor(self) -> float:
+        """Upper bound on the count of any item not in the summary"""
+        if len(self.counters) < self.capacity:
+            return 0.0
+        entry = self._pop_min()
+        heapq.heappush(self._heap, entry)
+        return entry[0]
+
+    def top(self, k: int) -> List[Tuple[str, float, float]]:
+        """(item, count, overcount) of the k largest counters"""
+        return [(item, c[0], c[1]) for item, c in
+                heapq.nlargest(k, self.counters.items(), key=lambda entry: entry[1][0])]
+
+    @classmethod
+    def merged(cls, summaries: List['SpaceSaving'], capacity: int) -> 'SpaceSaving':
+        """
+        Union of summaries: an item absent from a summary is charged that
+        summary's floor, so merged counts stay upper bounds.
+        """
+        floors = [summary.floor() for summary in summaries]
+        base = sum(floors)
+        excess: Dict[str, List[float]] = {}
+        for summary, floor in zip(summaries, floors):
+            for item, (count, overcount) in summary.counters.items():
+                entry = excess.setdefault(item, [0.0, 0.0])
+                entry[0] += count - floor
+                entry[1] += overcount - floor
+        result = cls(capacity)
+        result.total = sum(summary.total for summary in summaries)
+        for item, (count, overcount) in heapq.nlargest(capacity, excess.items(),
+                                                       key=lambda entry: entry[1][0]):
+            result.counters[item] = [count + base, overcount + base]
+        result._heap = [(c[0], item) for item, c in result.counters.items()]
+        heapq.heapify(result._heap)
+        return result
+
+    def to_json(self) -> Dict[str, Any]:
+        return {'capacity': self.capacity, 'total': self.total,
+                'counters': [[item, c[0], c[1]] for item, c in self.counters.items()]}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'SpaceSaving':
+        summary = cls(data['capacity'])
+        summary.total = data['total']
+        summary.counters = {item: [count, overcount] for item, count, overcount in data['counters']}
+        summary._heap = [(c[0], item) for item, c in summary.counters.items()]
+        heapq.heapify(summary._heap)
+        return summary
+
+
+class CountMinSketch:
+    """Approximate per-key counts in width * depth counters"""
+
+    def __init__(self, width: int = DEFAULT_CMS_WIDTH, depth: int = DEFAULT_CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = array('d', bytes(8 * width * depth))
+        self.total = 0.0
+
+    def _cells(self, item: str) -> List[int]:
+        digest = _hash64(item)
+        h1, h2 = digest & 0xFFFFFFFF, (digest >> 32) | 1
+        return [row * self.width + (h1 + row * h2) % self.width for row in range(self.depth)]
+
+    def add(self, item: str, weight: float = 1.0):
+        table = self.table
+        for cell in self._cells(item):
+            table[cell] += weight
+        self.total += weight
+
+    def estimate(self, item: str) -> float:
+        table = self.table
+        return min(table[cell] for cell in self._cells(item))
+
+    @property
+    def epsilon(self) -> float:
+        return math.e / self.width
+
+    @property
+    def delta(self) -> float:
+        return math.exp(-self.depth)
+
+    @classmethod
+    def merged(cls, sketches: List['CountMinSketch']) -> 'CountMinSketch':
+        result = cls(sketches[0].width, sketches[0].depth)
+        for sketch in sketches:
+            result.table = array('d', map(add, result.table, sketch.table))
+            result.total += sketch.total
+        return result
+
+    def to_json(self) -> Dict[str, Any]:
+        return {'width': self.width, 'depth': self.depth, 'total': self.total,
+                'table': base64.b64encode(self.table.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'CountMinSketch':
+        sketch = cls(data['width'], data['depth'])
+        sketch.table = array('d', base64.b64decode(data['table']))
+        sketch.total = data['total']
+        return sketch
+
+
+class HyperLogLog:
+    """Distinct count in 2**precision one-byte registers"""
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, item: str):
+        digest = _hash64(item)
+        index = digest >> (64 - self.precision)
+        rest = digest & ((1 << (64 - self.precision)) - 1)
+        rank = 64 - self.precision - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / m) * m * m / sum(2.0 ** -r for r in self.registers)
+        empty = self.registers.count(0)
+        if estimate <= 2.5 * m and empty:
+            estimate = m * math.log(m / empty)  # Linear counting for small sets
+        return round(estimate)
+
+    @property
+    def standard_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    @classmethod
+    def merged(cls, sketches: List['HyperLogLog']) -> 'HyperLogLog':
+        result = cls(sketches[0].precision)
+        for sketch in sketches:
+            result.registers = bytearray(map(max, result.registers, sketch.registers))
+        return result
+
+    def to_json(self) -> Dict[str, Any]:
+        return {'precision': self.precision,
+                'registers': base64.b64encode(bytes(self.registers)).decode('ascii')}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'HyperLogLog':
+        sketch = cls(data['precision'])
+        sketch.registers = bytearray(base64.b64decode(data['registers']))
+        return sketch
+
+
+class DaySketches:
+    """Totals and sketches of one UTC day"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, width: int = DEFAULT_CMS_WIDTH,
+                 depth: int = DEFAULT_CMS_DEPTH, precision: int = DEFAULT_HLL_PRECISION):
+        self.clicks = 0
+        self.conversions = 0
+        self.revenue = 0.0
+        self.keyword_clicks = SpaceSaving(capacity)
+        self.campaign_clicks = SpaceSaving(capacity)
+        self.campaign_revenue = SpaceSaving(capacity)
+        # Keys: "k:<keyword>" conversions, "c:<campaign>" clicks, "v:<campaign>" conversions
+        self.counts = CountMinSketch(width, depth)
+        self.keywords = HyperLogLog(precision)
+        self.campaigns = HyperLogLog(precision)
+
+    def record_click(self, keyword: Optional[str], campaign: Optional[str]):
+        self.clicks += 1
+        if keyword:
+            self.keyword_clicks.add(keyword)
+            self.keywords.add(keyword)
+        if campaign:
+            self.campaign_clicks.add(campaign)
+            self.counts.add('c:' + campaign)
+            self.campaigns.add(campaign)
+
+    def record_conversion(self, keyword: Optional[str], campaign: Optional[str], value: float):
+        self.conversions += 1
+        self.revenue += value
+        if keyword:
+            self.counts.add('k:' + keyword)
+        if campaign:
+            self.counts.add('v:' + campaign)
+            if value > 0:
+                self.campaign_revenue.add(campaign, value)
+
+    @classmethod
+    def merged(cls, days: List['DaySketches']) -> 'DaySketches':
+        result = cls.__new__(cls)
+        capacity = days[0].keyword_clicks.capacity
+        result.clicks = sum(day.clicks for day in days)
+        result.conversions = sum(day.conversions for day in days)
+        result.revenue = sum(day.revenue for day in days)
+        for name in ('keyword_clicks', 'campaign_clicks', 'campaign_revenue'):
+            setattr(result, name, SpaceSaving.merged([getattr(day, name) for day in days], capacity))
+        result.counts = CountMinSketch.merged([day.counts for day in days])
+        result.keywords = HyperLogLog.merged([day.keywords for day in days])
+        result.campaigns = HyperLogLog.merged([day.campaigns for day in days])
+        return result
+
+    def to_json(self) -> Dict[str, Any]:
+        return {'clicks': self.clicks, 'conversions': self.conversions, 'revenue': self.revenue,
+                'keyword_clicks': self.keyword_clicks.to_json(),
+                'campaign_clicks': self.campaign_clicks.to_json(),
+                'campaign_revenue': self.campaign_revenue.to_json(),
+                'counts': self.counts.to_json(),
+                'keywords': self.keywords.to_json(), 'campaigns': self.campaigns.to_json()}
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'DaySketches':
+        day = cls.__new__(cls)
+        day.clicks, day.conversions, day.revenue = data['clicks'], data['conversions'], data['revenue']
+        for name in ('keyword_clicks', 'campaign_clicks', 'campaign_revenue'):
+            setattr(day, name, SpaceSaving.from_json(data[name]))
+        day.counts = CountMinSketch.from_json(data['counts'])
+        day.keywords = HyperLogLog.from_json(data['keywords'])
+        day.campaigns = HyperLogLog.from_json(data['campaigns'])
+        return day
+
+
+class LiveAnalytics:
+    """Per-day sketches fed by the click path, with periodic snapshots"""
+
+    def __init__(self, snapshot_dir: Optional[str] = DEFAULT_SNAPSHOT_DIR,
+                 retention_days: int = DEFAULT_RETENTION_DAYS,
+                 snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+                 session_cache: int = DEFAULT_SESSION_CACHE, **sketch_options):
+        self.snapshot_dir = snapshot_dir
+        self.retention_days = retention_days
+        self.sketch_options = sketch_options
+        self.session_cache = session_cache
+        self._days: Dict[str, DaySketches] = {}
+        self._dirty = set()
+        self._sessions: 'OrderedDict[str, Tuple[Optional[str], Optional[str]]]' = OrderedDict()
+        self._closed: Optional[Tuple[Tuple[str, ...], DaySketches]] = None
+        self._lock = threading.Lock()
+        self.stats = {'snapshots': 0, 'unattributed_conversions': 0}
+        if snapshot_dir:
+            os.makedirs(snapshot_dir, exist_ok=True)
+            self._load()
+        self._stop = threading.Event()
+        self._thread = None
+        if snapshot_dir and snapshot_interval:
+            self._thread = threading.Thread(target=self._snapshot_loop, args=(snapshot_interval,),
+                                            name='live-analytics', daemon=True)
+            self._thread.start()
+
+    @staticmethod
+    def _day_key(now: Optional[float] = None) -> str:
+        return datetime.fromtimestamp(now if now is not None else time.time(),
+                                      timezone.utc).strftime('%Y-%m-%d')
+
+    def _today(self, now: Optional[float]) -> DaySketches:
+        key = self._day_key(now)
+        day = self._days.get(key)
+        if day is None:
+            day = self._days[key] = DaySketches(**self.sketch_options)
+            self._expire(key)
+        self._dirty.add(key)
+        return day
+
+    def _expire(self, today: str):
+        cutoff = (datetime.strptime(today, '%Y-%m-%d') -
+                  timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        for key in [key for key in self._days if key <= cutoff]:
+            del self._days[key]
+            self._dirty.discard(key)
+            if self.snapshot_dir:
+                try:
+                    os.remove(os.path.join(self.snapshot_dir, f"{key}.json"))
+                except OSError:
+                    pass
+
+    def record_click(self, session_id: str, click_data: Dict[str, Any],
+                     now: Optional[float] = None):
+        keyword, campaign = click_data.get('keyword'), click_data.get('campaign')
+        with self._lock:
+            self._today(now).record_click(keyword, campaign)
+            self._sessions[session_id] = (keyword, campaign)
+            self._sessions.move_to_end(session_id)
+            if len(self._sessions) > self.session_cache:
+                self._sessions.popitem(last=False)
+
+    def record_conversion(self, session_id: str, value: float = 0,
+                          now: Optional[float] = None):
+        with self._lock:
+            keyword, campaign = self._sessions.get(session_id, (None, None))
+            if session_id not in self._sessions:
+                self.stats['unattributed_conversions'] += 1
+            self._today(now).record_conversion(keyword, campaign, float(value or 0))
+
+    def _window(self, days: int, now: Optional[float]) -> Optional[DaySketches]:
+        """Merged sketches of the last `days` UTC days, today included"""
+        today = datetime.strptime(self._day_key(now), '%Y-%m-%d')
+        keys = [(today - timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+        closed = tuple(key for key in keys[1:] if key in self._days)
+        if closed and (self._closed is None or self._closed[0] != closed):
+            # Past days no longer change: merge them once
+            self._closed = (closed, DaySketches.merged([self._days[key] for key in closed]))
+        parts = ([self._closed[1]] if closed else []) + \
+            ([self._days[keys[0]]] if keys[0] in self._days else [])
+        if not parts:
+            return None
+        return parts[0] if len(parts) == 1 else DaySketches.merged(parts)
+
+    def query(self, days: int = 30, limit: int = 10, now: Optional[float] = None) -> Dict[str, Any]:
+        """get_analytics-shaped approximate answer with its error bounds"""
+        days = min(days, self.retention_days)
+        # With only today in the window, _window returns the live sketches:
+        # read them before record_click can change them again
+        with self._lock:
+            window = self._window(days, now)
+            if window is None:
+                window = DaySketches(**self.sketch_options)
+            return self._answer(window, days, limit)
+
+    @staticmethod
+    def _answer(window: DaySketches, days: int, limit: int) -> Dict[str, Any]:
+        counts = window.counts
+        top_keywords = []
+        for keyword, clicks, overcount in window.keyword_clicks.top(limit):
+            clicks, overcount = int(clicks), int(overcount)
+            conversions = min(int(counts.estimate('k:' + keyword)), clicks)
+            top_keywords.append({'keyword': keyword, 'clicks': clicks, 'clicks_overcount': overcount,
+                                 'conversions': conversions,
+                                 'conversion_rate': conversions / clicks * 100})
+        # By revenue, then campaigns without revenue by clicks, as ORDER BY revenue would
+        campaigns = [(campaign, revenue, overcount)
+                     for campaign, revenue, overcount in window.campaign_revenue.top(limit)]
+        named = {campaign for campaign, _, _ in campaigns}
+        campaigns += [(campaign, 0.0, 0.0) for campaign, _, _ in window.campaign_clicks.top(limit * 2)
+                      if campaign not in named][:limit - len(campaigns)]
+        top_campaigns = [{'campaign': campaign, 'clicks': int(counts.estimate('c:' + campaign)),
+                          'conversions': int(counts.estimate('v:' + campaign)),
+                          'revenue': revenue, 'revenue_overcount': overcount}
+                         for campaign, revenue, overcount in campaigns]
+
+        clicks, capacity = window.clicks, window.keyword_clicks.capacity
+        return {
+            'period_days': days,
+            'approximate': True,
+            'overall_stats': {
+                'total_clicks': clicks,
+                'unique_keywords': window.keywords.count(),
+                'unique_campaigns': window.campaigns.count(),
+                'total_conversions': window.conversions,
+                'total_revenue': window.revenue,
+                'conversion_rate': window.conversions / clicks * 100 if clicks else None,
+            },
+            'top_keywords': top_keywords,
+            'top_campaigns': top_campaigns,
+            'error_bounds': {
+                # Space-Saving: true count in [count - overcount, count]
+                # (each day's floor is at most its clicks / capacity)
+                'top_clicks_max_overcount': window.keyword_clicks.total / capacity,
+                # Count-Min: estimate - true <= epsilon * total, with probability 1 - delta
+                'count_min_epsilon': counts.epsilon,
+                'count_min_delta': counts.delta,
+                'count_min_max_overcount': counts.epsilon * counts.total,
+                'distinct_standard_error': window.keywords.standard_error,
+            },
+        }
+
+    def _load(self):
+        cutoff = (datetime.now(timezone.utc) -
+                  timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        for name in sorted(os.listdir(self.snapshot_dir)):
+            if not name.endswith('.json') or name[:-5] <= cutoff:
+                continue
+            try:
+                with open(os.path.join(self.snapshot_dir, name), 'r') as f:
+                    self._days[name[:-5]] = DaySketches.from_json(json.load(f))
+            except (OSError, ValueError, KeyError):
+                continue  # A torn or foreign file: that day starts empty
+
+    def snapshot(self):
+        """Write every day that changed since the last snapshot"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            states = {key: self._days[key].to_json() for key in dirty if key in self._days}
+        for key, state in states.items():
+            path = os.path.join(self.snapshot_dir, f"{key}.json")
+            with open(path + '.tmp', 'w') as f:
+                json.dump(state, f)
+            os.replace(path + '.tmp', path)
+        self.stats['snapshots'] += 1
+
+    def _snapshot_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.snapshot()
+
+    def close(self):
+        """Stop the snapshot thread and write a final snapshot"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self.snapshot_dir:
+            self.snapshot()
+
+
+def benchmark(clicks: int = 500000):
+    """Sketch answers and timings against get_analytics on the same clicks"""
+    import random
+    import shutil
+    import tempfile
+    import tracemalloc
+    from web_app_integration import GoogleAdsWebIntegration
+
+    rng = random.Random(48)
+    keywords = [f"pet insurance keyword {i}" for i in range(50000)]
+    campaigns = [f"campaign {i}" for i in range(40)]
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, 'clicks.db')
+        tracker = GoogleAdsWebIntegration(db_path)
+        rows = []
+        for i in range(clicks):
+            keyword = keywords[min(int(rng.paretovariate(0.9)) - 1, len(keywords) - 1)]
+            campaign = campaigns[min(int(rng.paretovariate(1.2)) - 1, len(campaigns) - 1)]
+            converted = rng.random() < 0.04
+            value = round(rng.uniform(10, 200), 2) if converted else 0.0
+            rows.append((f"s{i:012d}", keyword, campaign, int(converted), value))
+
+        tracemalloc.start()
+        live = LiveAnalytics(os.path.join(workdir, 'live'), snapshot_interval=0)
+        started = time.perf_counter()
+        for session_id, keyword, campaign, converted, value in rows:
+            live.record_click(session_id, {'keyword': keyword, 'campaign': campaign})
+            if converted:
+                live.record_conversion(session_id, value)
+        feed_seconds = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        conn = __import__('sqlite3').connect(db_path)
+        conn.executemany("""
+            INSERT INTO click_data (session_id, keyword, campaign, converted, conversion_value)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        conn.close()
+
+        started = time.perf_counter()
+        exact = tracker.get_analytics(30)
+        exact_seconds = time.perf_counter() - started
+        live.query(30)
+        started = time.perf_counter()
+        approx = live.query(30)
+        approx_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        live.snapshot()
+        snapshot_seconds = time.perf_counter() - started
+
+        print(f"Benchmark: {clicks:,} clicks over {len(keywords):,} keywords, {len(campaigns)} campaigns")
+        print(f"  feeding the sketches: {feed_seconds / clicks * 1e6:.1f} µs per click, "
+              f"{memory / 2**20:.1f} MB (tracemalloc, incl. session cache)")
+        print(f"  get_analytics: {exact_seconds * 1000:.0f} ms   live query: {approx_seconds * 1000:.1f} ms   "
+              f"snapshot: {snapshot_seconds * 1000:.0f} ms")
+        e, a = exact['overall_stats'], approx['overall_stats']
+        for name in ('unique_keywords', 'unique_campaigns', 'total_clicks', 'total_conversions'):
+            print(f"  {name:<18} exact {e[name]:>8,}   sketch {a[name]:>8,}   "
+                  f"({(a[name] - e[name]) / e[name]:+.2%})")
+        exact_top = [(k['keyword'], k['clicks'], k['conversions']) for k in exact['top_keywords']]
+        approx_top = [(k['keyword'], k['clicks'], k['conversions']) for k in approx['top_keywords']]
+        print(f"  top-10 keywords: {len(set(k for k, _, _ in exact_top) & set(k for k, _, _ in approx_top))}/10 "
+              f"shared, click counts exact: {sum(a == b for a, b in zip(exact_top, approx_top))}/10 rows identical")
+        exact_campaigns = [c['campaign'] for c in exact['top_campaigns']]
+        approx_campaigns = [c['campaign'] for c in approx['top_campaigns']]
+        print(f"  top-10 campaigns by revenue: same order {exact_campaigns == approx_campaigns}")
+        print(f"  error bounds: {approx['error_bounds']}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 500000)
+    else:
+        print("Usage: python analytics_sketch.py --benchmark [clicks]")
@@ -5,15 +5,18 @@ Monitors the last page count and automatically sends 'continue' command
 when generation stops.
 """
 
-import subprocess
 import time
-import re
 import sys
-import os
 from datetime import datetime
 
+from change_monitor import KeywordProgressMonitor
+from deploy_probe import DeploymentProbe
+
 class ContentGeneratorMonitor:
     def __init__(self):
+        # Wakes on writes to index.js and recounts only the changed tail
+        self.progress = KeywordProgressMonitor('/root/million-pages/src/index.js')
+        self.deploy_probe = DeploymentProbe()
         self.last_page_count = self.get_current_page_count()
         self.target_pages = 5000  # Target number of pages
         self.check_interval = 30  # Check every 30 seconds
@@ -22,36 +25,19 @@ class ContentGeneratorMonitor:
         
     def get_current_page_count(self):
         """Extract the current page count from the index.js file"""
-        try:
-            with open('/root/million-pages/src/index.js', 'r') as f:
-                content = f.read()
-                # Count all keywords in the getAllKeywords array
-                keywords = re.findall(r'"[^"]+",?\s*(?://.*)?$', content, re.MULTILINE)
-                # Filter out comments and empty matches
-                keywords = [k for k in keywords if not k.strip().startswith('//')]
-                return len(keywords)
-        except Exception as e:
-            print(f"Error reading index.js: {e}")
-            return 0
+        return self.progress.count
     
     def check_last_deployment(self):
         """Check the last deployment time and page count"""
+        # Reads page 2049 until its "Page N of M" footer over a pooled connection
+        result = None
         try:
-            # Try to fetch a high page number to see current count
-            result = subprocess.run(
-                ['curl', '-s', 'https://petinsurance.catsluvusboardinghotel.workers.dev/page/2049'],
-                capture_output=True,
-                text=True
-            )
-            if 'Page 2049 of' in result.stdout:
-                match = re.search(r'Page \d+ of (\d+)', result.stdout)
-                if match:
-                    total_pages = int(match.group(1))
-                    return total_pages - 3  # Subtract static pages
-            return 0
+            result = self.deploy_probe.probe(2049)
         except Exception as e:
             print(f"Error checking deployment: {e}")
-            return 0
+        if result is not None and result.page == 2049:
+            return result.deployed_pages
+        return 0
     
     def send_continue_command(self):
         """Send continue command to resume generation"""
@@ -70,24 +56,27 @@ class ContentGeneratorMonitor:
         print(f"Starting content generation monitor...")
         print(f"Current pages: {self.last_page_count}")
         print(f"Target pages: {self.target_pages}")
-        print(f"Check interval: {self.check_interval} seconds")
+        print(f"Check interval: {self.check_interval} seconds (file changes are reported immediately)")
         print(f"Idle threshold: {self.idle_threshold} seconds\n")
         
         while self.last_page_count < self.target_pages:
-            time.sleep(self.check_interval)
-            
-            current_count = self.get_current_page_count()
-            deployed_count = self.check_last_deployment()
+            event = self.progress.wait(timeout=self.check_interval)
             
-            # Use the higher of file count or deployed count
-            current_count = max(current_count, deployed_count)
+            if event is not None:
+                current_count = event.count
+            else:
+                # Nothing written locally; the deployment may still have moved on
+                deployed_count = self.check_last_deployment()
+                
+                # Use the higher of file count or deployed count
+                current_count = max(self.get_current_page_count(), deployed_count)
             
             if current_count > self.last_page_count:
                 # Progress detected
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Progress: {self.last_page_count} → {current_count} pages")
                 self.last_page_count = current_count
                 self.last_change_time = time.time()
-            else:
+            elif event is None:
                 # No progress
                 idle_time = time.time() - self.last_change_time
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] No change. Idle for {int(idle_time)}s")
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Change-driven keyword progress monitoring.
+Waits for writes to src/index.js through inotify (falling back to stat
+fingerprints where inotify is unavailable), recounts the getAllKeywords()
+array from the first block that changed instead of from the start of the
+file, and pushes a progress event to subscribers as soon as the count moves.
+
+Usage:
+    python change_monitor.py [index.js]          # print progress events
+    python change_monitor.py --benchmark [index.js]
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from bisect import bisect_right
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from keyword_stream import KeywordTokenizer
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+DEFAULT_POLL_INTERVAL = 0.25
+SETTLE_SECONDS = 0.01
+MAX_SETTLE_SECONDS = 0.25
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+Checkpoint = Tuple[int, int, int]  # (byte offset, keywords before it, bracket depth)
+
+
+def _fingerprint(path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileChangeWatcher:
+    """Block until a file changes, without reading it"""
+
+    def __init__(self, path: str, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.path = os.path.abspath(path)
+        self.poll_interval = poll_interval
+        self.fingerprint = _fingerprint(self.path)
+        self._name = os.path.basename(self.path).encode()
+        self._fd: Optional[int] = None
+        self._open_inotify()
+
+    def _open_inotify(self):
+        """Watch the parent directory so atomic renames are seen too"""
+        if not sys.platform.startswith('linux'):
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        except (OSError, AttributeError):
+            return
+        if fd < 0:
+            return
+        directory = os.path.dirname(self.path).encode()
+        if libc.inotify_add_watch(fd, directory, _WATCH_MASK) < 0:
+            os.close(fd)
+            return
+        self._fd = fd
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def fileno(self) -> Optional[int]:
+        """inotify descriptor for select()/event loops (None when polling)"""
+        return self._fd
+
+    def _drain(self) -> bool:
+        """Consume pending inotify events; True if one concerns our file"""
+        hit = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return hit
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                _, mask, _, length = _EVENT.unpack_from(data, pos)
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b'\0')
+                pos += _EVENT.size + length
+                if name == self._name or mask & IN_Q_OVERFLOW:
+                    hit = True
+
+    def changed(self) -> bool:
+        """Compare the stat fingerprint with the one last seen"""
+        current = _fingerprint(self.path)
+        if current == self.fingerprint:
+            return False
+        self.fingerprint = current
+        return True
+
+    def poll(self) -> bool:
+        """Non-blocking check for a change since the last wait()/poll()"""
+        if self._fd is not None:
+            if not self._drain():
+                return False
+            self.fingerprint = _fingerprint(self.path)
+            return True
+        return self.changed()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait up to ``timeout`` seconds (forever if None) for the file to
+        change. Returns False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._fd is not None:
+                ready, _, _ = select.select([self._fd], [], [], remaining)
+                if ready and self._drain():
+                    # Let a burst of writes land before the caller reads
+                    settle_until = time.monotonic() + MAX_SETTLE_SECONDS
+                    while time.monotonic() < settle_until and \
+                            select.select([self._fd], [], [], SETTLE_SECONDS)[0]:
+                        self._drain()
+                    self.fingerprint = _fingerprint(self.path)
+                    return True
+            else:
+                interval = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+                time.sleep(interval)
+                if self.changed():
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class IncrementalKeywordCounter:
+    """
+    Keyword count that is recomputed from the first changed block.
+
+    The file is fingerprinted in fixed-size blocks (crc32). While counting,
+    a checkpoint is recorded after the first string that ends in each block;
+    a recount resumes the tokenizer from the last checkpoint before the
+    first block whose crc changed, so appending keywords near the end of a
+    large file only re-tokenizes its tail.
+    """
+
+    def __init__(self, path: str, function_name: str = 'getAllKeywords',
+                 block_size: int = DEFAULT_BLOCK_SIZE):
+        self.path = path
+        self.function_name = function_name
+        self.block_size = block_size
+        self.total = 0
+        self.block_crcs: List[int] = []
+        self.checkpoints: List[Checkpoint] = []
+        self.resumed_from: Optional[int] = None  # Offset the last recount started at
+
+    def _read_crcs(self) -> List[int]:
+        crcs = []
+        with open(self.path, 'rb') as f:
+            while True:
+                block = f.read(self.block_size)
+                if not block:
+                    return crcs
+                crcs.append(zlib.crc32(block))
+
+    def _first_changed_block(self, crcs: List[int]) -> Optional[int]:
+        for i, (old, new) in enumerate(zip(self.block_crcs, crcs)):
+            if old != new:
+                return i
+        if len(crcs) != len(self.block_crcs):
+            return min(len(crcs), len(self.block_crcs))
+        return None
+
+    def recount(self) -> int:
+        """Bring the count up to date and return it"""
+        before = _fingerprint(self.path)
+        crcs = self._read_crcs()
+        changed = self._first_changed_block(crcs)
+        if changed is None and self.block_crcs:
+            self.resumed_from = None
+            return self.total
+
+        unchanged_bytes = (changed or 0) * self.block_size
+        index = bisect_right(self.checkpoints, (unchanged_bytes, float('inf'), 0)) - 1
+        checkpoints = self.checkpoints[:index + 1] if self.block_crcs else []
+
+        with open(self.path, 'rb') as f:
+            tokenizer = KeywordTokenizer(f, self.function_name)
+            if checkpoints:
+                offset, count, depth = checkpoints[-1]
+                spans = tokenizer.spans(offset, depth)
+            else:
+                offset, count = 0, 0
+                spans = tokenizer.spans()
+            self.resumed_from = offset
+
+            next_boundary = (offset // self.block_size + 1) * self.block_size
+            for _, end, _ in spans:
+                if not checkpoints:
+                    checkpoints.append((tokenizer.array_offset, 0, 1))
+                count += 1
+                if end >= next_boundary:
+                    checkpoints.append((end, count, tokenizer.depth))
+                    next_boundary = (end // self.block_size + 1) * self.block_size
+
+        self.total = count
+        self.checkpoints = checkpoints
+        # A write between the crc pass and the tokenizer pass leaves the crcs
+        # out of step with the checkpoints, so force a full pass next time
+        self.block_crcs = crcs if _fingerprint(self.path) == before else []
+        return count
+
+
+class ProgressEvent:
+    """Keyword count change pushed to subscribers"""
+
+    def __init__(self, path: str, count: int, previous: int,
+                 resumed_from: Optional[int], seconds: float):
+        self.timestamp = time.time()
+        self.path = path
+        self.count = count
+        self.previous = previous
+        self.delta = count - previous
+        self.resumed_from = resumed_from
+        self.seconds = seconds
+
+
+class KeywordProgressMonitor:
+    """Watch a keyword file and emit ProgressEvents when its count changes"""
+
+    def __init__(self, path: str, function_name: str = 'getAllKeywords',
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.path = path
+        self.watcher = FileChangeWatcher(path, poll_interval)
+        self.counter = IncrementalKeywordCounter(path, function_name)
+        self.callbacks: List[Callable[[ProgressEvent], None]] = []
+        self.count = 0
+        try:
+            self.count = self.counter.recount()
+        except (OSError, ValueError) as e:
+            print(f"Error reading {path}: {e}")
+
+    def subscribe(self, callback: Callable[[ProgressEvent], None]):
+        self.callbacks.append(callback)
+
+    def refresh(self) -> Optional[ProgressEvent]:
+        """Recount now; returns (and publishes) an event if the count moved"""
+        started = time.perf_counter()
+        count = self.counter.recount()
+        if count == self.count:
+            return None
+        event = ProgressEvent(self.path, count, self.count, self.counter.resumed_from,
+                              time.perf_counter() - started)
+        self.count = count
+        for callback in self.callbacks:
+            callback(event)
+        return event
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[ProgressEvent]:
+        """
+        Block until the keyword count changes or ``timeout`` expires (None).
+        Writes that leave the count unchanged do not end the wait.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self.watcher.wait(remaining):
+                return None
+            try:
+                event = self.refresh()
+            except (OSError, ValueError):
+                # Half-written file; the rest of the write triggers another event
+                event = None
+            if event is not None:
+                return event
+
+    def run(self, until: Optional[Callable[[], bool]] = None):
+        """Publish events until ``until()`` is true"""
+        while until is None or not until():
+            self.wait()
+
+    def close(self):
+        self.watcher.close()
+
+
+def print_event(event: ProgressEvent):
+    timestamp = datetime.fromtimestamp(event.timestamp).strftime('%H:%M:%S.%f')[:-3]
+    print(f"[{timestamp}] {event.previous} → {event.count} keywords ({event.delta:+d}), "
+          f"recounted from byte {event.resumed_from} in {event.seconds * 1000:.1f} ms")
+
+
+def _append_keyword(path: str, keyword: str):
+    """Insert a keyword before the closing bracket of the array"""
+    with open(path, 'rb') as f:
+        tokenizer = KeywordTokenizer(f)
+        for _ in tokenizer.spans():
+            pass
+        f.seek(0)
+        data = f.read()
+    end = tokenizer.end_offset
+    with open(path, 'wb') as f:
+        f.write(data[:end] + f'  "{keyword}",\n'.encode() + data[end:])
+
+
+def benchmark(source: str, appends: int = 20):
+    """Full recount vs incremental recount after appending keywords"""
+    from keyword_stream import count_keywords
+
+    workdir = tempfile.mkdtemp()
+    path = os.path.join(workdir, 'index.js')
+    shutil.copyfile(source, path)
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    try:
+        monitor = KeywordProgressMonitor(path)
+        print(f"Benchmark: {source} ({size_mb:.1f} MB, {monitor.count} keywords, "
+              f"{'inotify' if monitor.watcher.uses_inotify else 'stat polling'})")
+
+        full, incremental, latency = [], [], []
+        for i in range(appends):
+            _append_keyword(path, f"benchmark keyword {i}")
+            written = time.perf_counter()
+            event = monitor.wait(timeout=5)
+            latency.append(time.perf_counter() - written)
+            incremental.append(event.seconds)
+
+            started = time.perf_counter()
+            expected = count_keywords(path)
+            full.append(time.perf_counter() - started)
+            assert event.count == expected, (event.count, expected)
+        monitor.close()
+
+        print("-" * 60)
+        print(f"full recount (median):         {sorted(full)[len(full) // 2] * 1000:8.1f} ms")
+        print(f"incremental recount (median):  {sorted(incremental)[len(incremental) // 2] * 1000:8.1f} ms")
+        print(f"write → event latency (median):{sorted(latency)[len(latency) // 2] * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def main(argv: List[str]) -> None:
+    if argv and argv[0] == '--benchmark':
+        benchmark(argv[1] if len(argv) > 1 else 'src/index.js')
+        return
+
+    path = argv[0] if argv else 'src/index.js'
+    monitor = KeywordProgressMonitor(path)
+    monitor.subscribe(print_event)
+    mode = 'inotify' if monitor.watcher.uses_inotify else 'stat polling'
+    print(f"Watching {path} via {mode}: {monitor.count} keywords (Ctrl+C to stop)")
+    try:
+        monitor.run()
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        monitor.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
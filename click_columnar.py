@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Columnar compaction of historical click data.
+Copies closed days of click_data into one directory per day of
+memory-mappable .npy columns: integer ids and Unix timestamps, conversion
+flags and values, and dictionary-encoded string columns (codes array plus
+a JSON dictionary). Wide scans such as per-keyword trends over a year then
+read only the columns they need instead of every row's full_url and
+user_agent text.
+
+click_data stays the source of truth: compaction snapshots each day once it
+has closed, and conversions tracked after that only show up after
+recompacting the day (--force). A repeat click on a closed GCLID moves
+its click_data row to a later day; the row stays in the partition it was
+first compacted into, so it is counted once.
+
+Usage:
+    python click_columnar.py compact [--db google_ads_clicks.db] [--out click_columns] [--force]
+    python click_columnar.py query [--out click_columns] [--keyword KW] [--start DATE] [--end DATE] [--by keyword,day]
+    python click_columnar.py --benchmark [clicks]
+
+Requires numpy.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+DEFAULT_OUT_DIR = 'click_columns'
+MANIFEST_FILE = 'manifest.json'
+DAY = 86400
+DEFAULT_GRACE_SECONDS = 3600  # How long after midnight UTC a day counts as closed
+_FETCH_SIZE = 50000
+
+# click_data columns copied into partitions. gclid and session_id are unique
+# per row, so dictionary encoding would not shrink them; id links back.
+STRING_COLUMNS = ('keyword', 'campaign', 'source', 'medium', 'content',
+                  'full_url', 'ip_address', 'user_agent')
+GROUP_COLUMNS = STRING_COLUMNS + ('day', 'hour')
+METRICS = ('clicks', 'conversions', 'revenue')
+
+TimeValue = Union[None, int, float, str, datetime]
+
+
+def _epoch(value: TimeValue) -> Optional[int]:
+    """Unix seconds for an epoch, ISO date/time string or datetime (naive = UTC)"""
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else int(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)  # click_data uses CURRENT_TIMESTAMP (UTC)
+    return int(value.timestamp())
+
+
+def _day_name(day_start: int) -> str:
+    return datetime.fromtimestamp(day_start, timezone.utc).strftime('%Y-%m-%d')
+
+
+def _code_dtype(size: int) -> np.dtype:
+    if size <= 1 << 8:
+        return np.dtype(np.uint8)
+    return np.dtype(np.uint16 if size <= 1 << 16 else np.uint32)
+
+
+class Partition:
+    """One compacted day, its columns memory-mapped on first use"""
+
+    def __init__(self, path: str, day: str):
+        self.path = path
+        self.day = day
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._dictionaries: Dict[str, List[Optional[str]]] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw column: timestamps, values, or codes of a string column"""
+        if name not in self._arrays:
+            self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode='r')
+        return self._arrays[name]
+
+    def dictionary(self, name: str) -> List[Optional[str]]:
+        if name not in self._dictionaries:
+            with open(os.path.join(self.path, f"{name}.dict.json"), 'r', encoding='utf-8') as f:
+                self._dictionaries[name] = json.load(f)
+        return self._dictionaries[name]
+
+
+class ColumnarClickStore:
+    """Day-partitioned columnar copy of click_data"""
+
+    def __init__(self, out_dir: str = DEFAULT_OUT_DIR):
+        self.out_dir = out_dir
+        self.manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+        self._partitions: Dict[str, Partition] = {}
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'partitions': {}}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def days(self) -> List[str]:
+        return sorted(self.manifest['partitions'])
+
+    def partition(self, day: str) -> Partition:
+        if day not in self._partitions:
+            self._partitions[day] = Partition(os.path.join(self.out_dir, day), day)
+        return self._partitions[day]
+
+    # Compaction
+
+    def compact(self, db_path: str, now: Optional[float] = None, force: bool = False,
+                grace_seconds: int = DEFAULT_GRACE_SECONDS) -> Dict[str, Any]:
+        """
+        Write a partition for every closed day of click_data not compacted
+        yet (every closed day with force=True). Returns stats.
+        """
+        started = time.perf_counter()
+        now = time.time() if now is None else now
+        # Days ending at or before this point are closed
+        closed_until = int((now - grace_seconds) // DAY * DAY)
+        if force:
+            # Rebuilt from scratch: a day whose rows all moved must not keep its old copy
+            for day in [day for day in self.manifest['partitions'] if _epoch(day) < closed_until]:
+                del self.manifest['partitions'][day]
+                self._partitions.pop(day, None)
+                shutil.rmtree(os.path.join(self.out_dir, day), ignore_errors=True)
+        done = set(self.manifest['partitions'])
+        # Clicks are stamped on arrival and repeat GCLIDs only move a row
+        # forward, so only days after the last compacted one can have
+        # gained rows. Moved rows already compacted are dropped by id.
+        since = _epoch(max(done)) + DAY if done else 0
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        def sql_time(epoch: int) -> str:
+            return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+        conn = sqlite3.connect(db_path)
+        cursor = conn.execute(f"""
+            SELECT id, CAST(strftime('%s', timestamp) AS INTEGER) AS ts,
+                   converted, conversion_value, {', '.join(STRING_COLUMNS)}
+            FROM click_data
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp, id
+        """, (sql_time(since), sql_time(closed_until)))
+
+        written = rows_written = skipped = moved = 0
+        day_start, day_rows, day_done = None, [], False
+
+        def flush():
+            nonlocal written, rows_written, moved
+            compacted = self._compacted_ids([row[0] for row in day_rows])
+            rows = [row for row in day_rows if row[0] not in compacted]
+            moved += len(day_rows) - len(rows)
+            if rows:
+                rows_written += self._write_partition(day_start, rows)
+                written += 1
+
+        for rows in iter(lambda: cursor.fetchmany(_FETCH_SIZE), []):
+            for row in rows:
+                if row[1] is None:
+                    continue
+                start = row[1] - row[1] % DAY
+                if start != day_start:
+                    if day_rows:
+                        flush()
+                    day_start, day_rows = start, []
+                    day_done = _day_name(start) in done
+                    skipped += day_done
+                if not day_done:
+                    day_rows.append(row)
+        conn.close()
+        if day_rows:
+            flush()
+        self._save_manifest()
+
+        return {
+            'partitions_written': written,
+            'rows_written': rows_written,
+            'rows_already_compacted': moved,
+            'partitions_skipped': skipped,
+            'partitions': len(self.manifest['partitions']),
+            'seconds': round(time.perf_counter() - started, 2),
+        }
+
+    def _compacted_ids(self, ids: List[int]) -> set:
+        """The ids already stored in some partition (rows moved to a later day)"""
+        if not ids:
+            return set()
+        wanted = np.array(ids, dtype=np.int64)
+        low, high = int(wanted.min()), int(wanted.max())
+        found = set()
+        for day, info in self.manifest['partitions'].items():
+            # Only partitions whose id range overlaps can hold any of them
+            if info['min_id'] <= high and info['max_id'] >= low:
+                stored = self.partition(day).column('id')
+                found.update(wanted[np.isin(wanted, stored)].tolist())
+        return found
+
+    def _write_partition(self, day_start: int, rows: List[Tuple]) -> int:
+        day = _day_name(day_start)
+        path = os.path.join(self.out_dir, day)
+        tmp_path = path + '.tmp'
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        columns = list(zip(*rows))
+        np.save(os.path.join(tmp_path, 'id.npy'), np.array(columns[0], dtype=np.int64))
+        np.save(os.path.join(tmp_path, 'timestamp.npy'), np.array(columns[1], dtype=np.int64))
+        np.save(os.path.join(tmp_path, 'converted.npy'),
+                np.array([bool(v) for v in columns[2]], dtype=np.bool_))
+        np.save(os.path.join(tmp_path, 'conversion_value.npy'),
+                np.array([v or 0.0 for v in columns[3]], dtype=np.float64))
+        for name, values in zip(STRING_COLUMNS, columns[4:]):
+            codes: Dict[Optional[str], int] = {}
+            encoded = [codes.setdefault(value, len(codes)) for value in values]
+            np.save(os.path.join(tmp_path, f"{name}.npy"),
+                    np.array(encoded, dtype=_code_dtype(len(codes))))
+            with open(os.path.join(tmp_path, f"{name}.dict.json"), 'w', encoding='utf-8') as f:
+                json.dump(list(codes), f, ensure_ascii=False)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        self._partitions.pop(day, None)
+        self.manifest['partitions'][day] = {
+            'rows': len(rows),
+            'min_id': min(columns[0]),
+            'max_id': max(columns[0]),
+            'compacted_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        return len(rows)
+
+    # Queries
+
+    def _selected(self, start: Optional[int], end: Optional[int]) -> Iterable[Partition]:
+        for day in self.days():
+            day_start = _epoch(day)
+            if (start is None or day_start + DAY > start) and (end is None or day_start < end):
+                yield self.partition(day)
+
+    def _mask(self, part: Partition, start: Optional[int], end: Optional[int],
+              filters: Dict[str, Sequence[Optional[str]]]) -> Optional[Union[slice, np.ndarray]]:
+        """Selected rows of a partition, or None if there are none"""
+        timestamps = part.column('timestamp')
+        # Rows are sorted by time: the range is a slice
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        if lo >= hi:
+            return None
+        selected: Union[slice, np.ndarray] = slice(lo, hi)
+        for name, wanted in filters.items():
+            dictionary = part.dictionary(name)
+            codes = [i for i, value in enumerate(dictionary) if value in wanted]
+            if not codes:
+                return None
+            column = part.column(name)[lo:hi]
+            match = column == codes[0] if len(codes) == 1 else np.isin(column, codes)
+            selected = match if isinstance(selected, slice) else selected & match
+        if isinstance(selected, np.ndarray):
+            selected = lo + np.flatnonzero(selected)
+        return selected
+
+    def _group_keys(self, part: Partition, name: str,
+                    rows: Union[slice, np.ndarray]) -> Tuple[np.ndarray, List[Any]]:
+        """Per-row group codes and their labels for one group-by column"""
+        if name in ('day', 'hour'):
+            size = DAY if name == 'day' else 3600
+            buckets = part.column('timestamp')[rows] // size
+            labels, codes = np.unique(buckets, return_inverse=True)
+            fmt = '%Y-%m-%d' if name == 'day' else '%Y-%m-%d %H:00'
+            return codes, [datetime.fromtimestamp(int(b) * size, timezone.utc).strftime(fmt)
+                           for b in labels]
+        return part.column(name)[rows].astype(np.int64), part.dictionary(name)
+
+    def query(self, start: TimeValue = None, end: TimeValue = None,
+              group_by: Sequence[str] = ('keyword',),
+              **filters: Union[Optional[str], Sequence[Optional[str]]]) -> List[Dict[str, Any]]:
+        """
+        clicks, conversions and revenue over [start, end), optionally
+        filtered by string columns (keyword='cat insurance' or a list) and
+        grouped by string columns, 'day' or 'hour'.
+        """
+        start, end = _epoch(start), _epoch(end)
+        for name in list(group_by) + list(filters):
+            if name not in GROUP_COLUMNS or (name in filters and name in ('day', 'hour')):
+                raise ValueError(f"Unknown column {name!r}")
+        wanted = {name: [value] if value is None or isinstance(value, str) else list(value)
+                  for name, value in filters.items()}
+
+        totals: Dict[Tuple, List[float]] = {}
+        for part in self._selected(start, end):
+            rows = self._mask(part, start, end, wanted)
+            if rows is None:
+                continue
+            converted = part.column('converted')[rows]
+            revenue = part.column('conversion_value')[rows]
+            if not group_by:
+                key_codes, labels = np.zeros(len(converted), dtype=np.int64), [()]
+            else:
+                # Combine the group columns into one code per row
+                key_codes, label_lists, sizes = None, [], []
+                for name in group_by:
+                    codes, labels = self._group_keys(part, name, rows)
+                    key_codes = codes if key_codes is None else key_codes * len(labels) + codes
+                    label_lists.append(labels)
+                    sizes.append(len(labels))
+                used, key_codes = np.unique(key_codes, return_inverse=True)
+                labels = []
+                for combined in used.tolist():
+                    parts = []
+                    for size, names in zip(reversed(sizes), reversed(label_lists)):
+                        combined, code = divmod(combined, size)
+                        parts.append(names[code])
+                    labels.append(tuple(reversed(parts)))
+            clicks = np.bincount(key_codes, minlength=len(labels))
+            conversions = np.bincount(key_codes, weights=converted, minlength=len(labels))
+            values = np.bincount(key_codes, weights=revenue, minlength=len(labels))
+            for label, c, v, r in zip(labels, clicks.tolist(), conversions.tolist(), values.tolist()):
+                if c:
+                    total = totals.setdefault(label, [0, 0.0, 0.0])
+                    total[0] += c
+                    total[1] += v
+                    total[2] += r
+
+        results = [dict(zip(group_by, label), clicks=c, conversions=int(v), revenue=round(r, 2))
+                   for label, (c, v, r) in totals.items()]
+        results.sort(key=lambda row: (-row['clicks'], [str(row[g]) for g in group_by]))
+        return results
+
+    def size_bytes(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.out_dir):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+
+def _print_rows(rows: List[Dict[str, Any]], limit: int = 20):
+    for row in rows[:limit]:
+        print('  ' + '  '.join(f"{k}={v}" for k, v in row.items()))
+    if len(rows) > limit:
+        print(f"  ... {len(rows) - limit} more")
+
+
+def benchmark(clicks: int = 1000000):
+    """Compaction and scans over a synthetic year vs the same SQL on click_data"""
+    import random
+    import tempfile
+    from web_app_integration import GoogleAdsWebIntegration
+
+    random.seed(5)
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'clicks.db')
+    GoogleAdsWebIntegration(db_path)
+    keywords = [f"pet insurance keyword {i}" for i in range(2000)]
+    campaigns = [f"campaign {i}" for i in range(40)]
+    agents = [f"Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/{v}.0 Safari/537.36"
+              for v in range(90, 130)]
+    year_start = _epoch('2025-01-01')
+
+    def rows():
+        for i in range(clicks):
+            ts = year_start + int(i * 365 * DAY / clicks)
+            keyword = keywords[min(int(random.paretovariate(1.2)) - 1, len(keywords) - 1)]
+            converted = random.random() < 0.04
+            yield (f"s{i:012d}", datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+                   keyword, random.choice(campaigns), 'google', 'cpc', None, f"g{i}",
+                   f"https://example.com/landing?keyword={keyword.replace(' ', '+')}&gclid=g{i}",
+                   f"10.{i % 256}.{i // 256 % 256}.{i % 7}", random.choice(agents),
+                   int(converted), round(random.uniform(20, 200), 2) if converted else 0.0)
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    conn.executemany("""
+        INSERT INTO click_data (session_id, timestamp, keyword, campaign, source, medium, content,
+                                gclid, full_url, ip_address, user_agent, converted, conversion_value)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows())
+    conn.commit()
+    conn.close()
+    print(f"Benchmark: {clicks:,} clicks over 365 days "
+          f"(SQLite {os.path.getsize(db_path) / 2**20:.0f} MB, built in {time.perf_counter() - started:.1f}s)")
+
+    store = ColumnarClickStore(os.path.join(workdir, 'columns'))
+    stats = store.compact(db_path, now=year_start + 400 * DAY)
+    print(f"  compaction: {stats['rows_written']:,} rows into {stats['partitions_written']} day "
+          f"partitions in {stats['seconds']}s ({store.size_bytes() / 2**20:.0f} MB)")
+    again = store.compact(db_path, now=year_start + 400 * DAY)
+    print(f"  second run: {again['partitions_written']} written, "
+          f"{again['partitions_skipped']} already compacted, {again['seconds']}s")
+
+    top = keywords[3]
+    cases = [
+        ('per-keyword totals, full year', {'group_by': ('keyword',)},
+         "SELECT keyword, COUNT(*), SUM(converted), SUM(conversion_value) FROM click_data "
+         "WHERE timestamp >= ? AND timestamp < ? GROUP BY keyword",
+         ('2025-01-01', '2026-01-01')),
+        ('one keyword by day, full year', {'group_by': ('day',), 'keyword': top},
+         "SELECT date(timestamp), COUNT(*), SUM(converted), SUM(conversion_value) FROM click_data "
+         "WHERE timestamp >= ? AND timestamp < ? AND keyword = ? GROUP BY date(timestamp)",
+         ('2025-01-01', '2026-01-01', top)),
+        ('keyword x campaign, one month', {'group_by': ('keyword', 'campaign')},
+         "SELECT keyword, campaign, COUNT(*), SUM(converted), SUM(conversion_value) FROM click_data "
+         "WHERE timestamp >= ? AND timestamp < ? GROUP BY keyword, campaign",
+         ('2025-06-01', '2025-07-01')),
+    ]
+    conn = sqlite3.connect(db_path)
+    for label, kwargs, sql, params in cases:
+        started = time.perf_counter()
+        sql_rows = conn.execute(sql, params).fetchall()
+        sql_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        column_rows = store.query(params[0], params[1], **kwargs)
+        column_seconds = time.perf_counter() - started
+        assert len(sql_rows) == len(column_rows), (len(sql_rows), len(column_rows))
+        assert sum(r[-3] for r in sql_rows) == sum(r['clicks'] for r in column_rows)
+        print(f"  {label:<32} SQL {sql_seconds * 1000:>7.0f} ms   columnar "
+              f"{column_seconds * 1000:>6.0f} ms   ({len(column_rows)} groups)")
+    conn.close()
+    shutil.rmtree(workdir)
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(int(args[1]) if len(args) > 1 else 1000000)
+        return
+
+    def option(name: str, default: Optional[str] = None) -> Optional[str]:
+        return args[args.index(name) + 1] if name in args else default
+
+    command = args[0] if args else 'compact'
+    store = ColumnarClickStore(option('--out', DEFAULT_OUT_DIR))
+    if command == 'compact':
+        stats = store.compact(option('--db', 'google_ads_clicks.db'), force='--force' in args)
+        print(f"Compacted {stats['rows_written']} rows into {stats['partitions_written']} partitions "
+              f"({stats['partitions_skipped']} already compacted, {stats['partitions']} total) "
+              f"in {stats['seconds']}s")
+    elif command == 'query':
+        filters = {'keyword': option('--keyword')} if '--keyword' in args else {}
+        group_by = tuple(g for g in option('--by', 'keyword').split(',') if g)
+        _print_rows(store.query(option('--start'), option('--end'), group_by, **filters))
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Normalized click storage: interned dimension tables for repeated strings.
+In normalized mode each keyword, campaign, source, medium, content and
+user_agent string is stored once in a dim_<name> table, and click_facts
+rows hold integer ids. A click_data view joins them back, so existing
+readers see the same columns. DimensionInterner caches value -> id
+lookups in process so inserts rarely touch the dimension tables.
+
+full_url stays inline: landing URLs carry the per-click gclid, so nearly
+every value is unique and interning would only add an index.
+
+Usage:
+    python click_dimensions.py --migrate [google_ads_clicks.db]
+    python click_dimensions.py --benchmark [clicks]
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# click_data columns interned into dim_<name> tables
+DIMENSIONS = ('keyword', 'campaign', 'source', 'medium', 'content', 'user_agent')
+DEFAULT_CACHE_SIZE = 50000  # Ids cached per dimension
+
+# click_data's columns in their original order, for the view
+_COLUMNS = ('id', 'session_id', 'timestamp', 'keyword', 'campaign', 'source', 'medium',
+            'content', 'gclid', 'full_url', 'ip_address', 'user_agent', 'converted',
+            'conversion_value')
+
+
+def dimension_table(name: str) -> str:
+    return f"dim_{name}"
+
+
+def is_normalized(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'click_facts'"
+    ).fetchone()
+    return row is not None
+
+
+def _create_schema(cursor: sqlite3.Cursor):
+    for name in DIMENSIONS:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {dimension_table(name)} (
+                id INTEGER PRIMARY KEY,
+                value TEXT NOT NULL UNIQUE
+            )
+        """)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS click_facts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            {', '.join(f'{name}_id INTEGER' for name in DIMENSIONS)},
+            gclid TEXT UNIQUE,
+            full_url TEXT,
+            ip_address TEXT,
+            converted BOOLEAN DEFAULT 0,
+            conversion_value REAL DEFAULT 0
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_facts_session ON click_facts(session_id)")
+
+    columns = [f"{dimension_table(c)}.value AS {c}" if c in DIMENSIONS else f"f.{c}"
+               for c in _COLUMNS]
+    joins = [f"LEFT JOIN {dimension_table(name)} ON {dimension_table(name)}.id = f.{name}_id"
+             for name in DIMENSIONS]
+    cursor.execute(f"""
+        CREATE VIEW IF NOT EXISTS click_data AS
+        SELECT {', '.join(columns)}
+        FROM click_facts f
+        {' '.join(joins)}
+    """)
+
+
+def migrate_to_normalized(db_path: str) -> Dict[str, int]:
+    """
+    Convert a row-oriented click_data table into dimension tables,
+    click_facts and the click_data view, keeping row ids. Creates the
+    normalized schema in a new database; no-op if already normalized.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    cursor = conn.cursor()
+    if is_normalized(conn):
+        conn.close()
+        return {'migrated_rows': 0}
+
+    kind = cursor.execute(
+        "SELECT type FROM sqlite_master WHERE name = 'click_data'"
+    ).fetchone()
+    migrated = 0
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        if kind is None:
+            _create_schema(cursor)
+        else:
+            cursor.execute("ALTER TABLE click_data RENAME TO click_data_rows")
+            _create_schema(cursor)
+            for name in DIMENSIONS:
+                cursor.execute(f"""
+                    INSERT OR IGNORE INTO {dimension_table(name)} (value)
+                    SELECT DISTINCT {name} FROM click_data_rows WHERE {name} IS NOT NULL
+                """)
+            plain = [c for c in _COLUMNS if c not in DIMENSIONS]
+            cursor.execute(f"""
+                INSERT INTO click_facts ({', '.join(plain + [f'{n}_id' for n in DIMENSIONS])})
+                SELECT {', '.join(f'r.{c}' for c in plain)},
+                       {', '.join(f'{dimension_table(n)}.id' for n in DIMENSIONS)}
+                FROM click_data_rows r
+                {' '.join(f'LEFT JOIN {dimension_table(n)} ON {dimension_table(n)}.value = r.{n}'
+                          for n in DIMENSIONS)}
+            """)
+            migrated = cursor.rowcount
+            # Keep AUTOINCREMENT from reusing ids of deleted rows
+            cursor.execute("""
+                UPDATE sqlite_sequence
+                SET seq = MAX(seq, COALESCE((SELECT seq FROM sqlite_sequence
+                                             WHERE name = 'click_data_rows'), 0))
+                WHERE name = 'click_facts'
+            """)
+            cursor.execute("DROP TABLE click_data_rows")
+            cursor.execute("DELETE FROM sqlite_sequence WHERE name = 'click_data_rows'")
+        cursor.execute("COMMIT")
+    except BaseException:
+        cursor.execute("ROLLBACK")
+        raise
+    if migrated:
+        cursor.execute("VACUUM")
+    conn.close()
+    return {'migrated_rows': migrated}
+
+
+class DimensionInterner:
+    """In-process value -> id cache in front of the dim_<name> tables"""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE):
+        self.max_size = max_size
+        self._cache: Dict[str, 'OrderedDict[str, int]'] = {name: OrderedDict() for name in DIMENSIONS}
+        self.hits = 0
+        self.misses = 0
+        # Shared by every request thread; SQL runs outside the lock
+        self._lock = threading.Lock()
+
+    def resolve(self, cursor: sqlite3.Cursor, name: str, value: Optional[str]) -> Optional[int]:
+        """Id of value in dim_<name>, inserting it on first sight"""
+        if value is None:
+            return None
+        cache = self._cache[name]
+        with self._lock:
+            value_id = cache.get(value)
+            if value_id is not None:
+                self.hits += 1
+                cache.move_to_end(value)
+                return value_id
+            self.misses += 1
+        table = dimension_table(name)
+        # Ids are never reassigned, so cached ids stay valid across processes
+        cursor.execute(f"INSERT OR IGNORE INTO {table} (value) VALUES (?)", (value,))
+        value_id = cursor.lastrowid if cursor.rowcount == 1 else \
+            cursor.execute(f"SELECT id FROM {table} WHERE value = ?", (value,)).fetchone()[0]
+        with self._lock:
+            cache[value] = value_id
+            if len(cache) > self.max_size:
+                cache.popitem(last=False)
+        return value_id
+
+    def clear(self):
+        with self._lock:
+            for cache in self._cache.values():
+                cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'cached': sum(len(cache) for cache in self._cache.values())}
+
+
+def _database_size(db_path: str) -> int:
+    conn = sqlite3.connect(db_path)
+    page_count, = conn.execute("PRAGMA page_count").fetchone()
+    page_size, = conn.execute("PRAGMA page_size").fetchone()
+    conn.close()
+    return page_count * page_size
+
+
+def benchmark(clicks: int = 300000):
+    """Row vs normalized storage: size, inserts, analytics and migration"""
+    import random
+    import shutil
+    import tempfile
+    from web_app_integration import GoogleAdsWebIntegration
+
+    random.seed(9)
+    keywords = [f"best pet insurance for {breed} puppies {i}"
+                for i, breed in enumerate(['labrador', 'beagle', 'poodle', 'husky', 'boxer'] * 400)]
+    campaigns = [f"US - Pet Insurance - {kind} - Exact" for kind in ('Dog', 'Cat', 'Breed', 'Brand')]
+    contents = [f"responsive ad variant {i}" for i in range(30)]
+    agents = [f"Mozilla/5.0 (Linux; Android 14; Pixel {v}) AppleWebKit/537.36 (KHTML, like Gecko) "
+              f"Chrome/{120 + v % 9}.0.0.0 Mobile Safari/537.36" for v in range(60)]
+
+    def clicks_data(count: int):
+        for i in range(count):
+            keyword = keywords[min(int(random.paretovariate(1.1)) - 1, len(keywords) - 1)]
+            gclid = f"Cj0KCQjw{i:010d}"
+            yield ({'keyword': keyword, 'campaign': random.choice(campaigns), 'source': 'google',
+                    'medium': 'cpc', 'content': random.choice(contents), 'gclid': gclid,
+                    'url': f"https://example.com/?utm_term={keyword.replace(' ', '+')}&gclid={gclid}"},
+                   {'ip_address': f"10.{i % 200}.{i // 200 % 256}.{i % 11}",
+                    'user_agent': random.choice(agents)})
+
+    workdir = tempfile.mkdtemp()
+    try:
+        row_db = os.path.join(workdir, 'rows.db')
+        GoogleAdsWebIntegration(row_db)
+        conn = sqlite3.connect(row_db)
+        conn.executemany("""
+            INSERT INTO click_data (session_id, keyword, campaign, source, medium, content,
+                                    gclid, full_url, ip_address, user_agent)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, ((f"s{i:015d}", c['keyword'], c['campaign'], c['source'], c['medium'], c['content'],
+               c['gclid'], c['url'], r['ip_address'], r['user_agent'])
+              for i, (c, r) in enumerate(clicks_data(clicks))))
+        conn.commit()
+        conn.close()
+        print(f"Benchmark: {clicks:,} clicks, {len(keywords)} keywords")
+
+        normalized_db = os.path.join(workdir, 'normalized.db')
+        shutil.copy(row_db, normalized_db)
+        started = time.perf_counter()
+        stats = migrate_to_normalized(normalized_db)
+        print(f"  migration: {stats['migrated_rows']:,} rows in {time.perf_counter() - started:.1f}s")
+        row_size, normalized_size = _database_size(row_db), _database_size(normalized_db)
+        print(f"  database size: rows {row_size / 2**20:.1f} MB, normalized "
+              f"{normalized_size / 2**20:.1f} MB ({normalized_size / row_size:.0%})")
+
+        for label, db_path, normalized in (('rows', row_db, False),
+                                           ('normalized', normalized_db, True)):
+            integration = GoogleAdsWebIntegration(db_path, normalized=normalized)
+            times = []
+            for _ in range(5):
+                started = time.perf_counter()
+                analytics = integration.get_analytics(30)
+                times.append(time.perf_counter() - started)
+            top = analytics['top_keywords'][0]
+            print(f"  get_analytics ({label}): {min(times) * 1000:.0f} ms "
+                  f"(top keyword {top['keyword']!r}, {top['clicks']} clicks)")
+
+            extra = list(clicks_data(clicks + 2000))[clicks:]
+            started = time.perf_counter()
+            for click, request_info in extra:
+                integration.save_click_data(click, request_info)
+            seconds = (time.perf_counter() - started) / len(extra)
+            cache = f", intern cache {integration.interner.stats()}" if normalized else ''
+            print(f"  save_click_data ({label}): {seconds * 1e6:.0f} µs per click{cache}")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 300000)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--migrate':
+        path = sys.argv[2] if len(sys.argv) > 2 else 'google_ads_clicks.db'
+        before = _database_size(path)
+        result = migrate_to_normalized(path)
+        print(f"{path}: migrated {result['migrated_rows']} rows, "
+              f"{before / 2**20:.1f} MB -> {_database_size(path) / 2**20:.1f} MB")
+    else:
+        print("Usage: python click_dimensions.py --migrate [db] | --benchmark [clicks]")
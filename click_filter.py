@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Pre-persistence filter for Google Ads click tracking.
+Drops crawler hits and rapid repeat clicks before they reach click_data,
+using sliding-window counters per IP and per (IP, gclid) held in a bounded
+in-memory LRU and a cached user-agent classification. Filtered hits are
+counted by reason instead of being written.
+
+Usage:
+    python click_filter.py --benchmark [requests]
+"""
+
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+DEFAULT_MAX_KEYS = 100000
+
+# Crawlers, link previewers, uptime checks and scripted clients. AdsBot and
+# Mediapartners are Google's own landing-page checkers, not ad clicks.
+_BOT_PATTERN = re.compile(
+    r'bot\b|bot/|crawl|spider|slurp|mediapartners|adsbot|facebookexternalhit|'
+    r'preview|headless|phantomjs|lighthouse|pingdom|uptime|monitor|'
+    r'^curl/|^wget/|python-requests|python-urllib|aiohttp|httpx|go-http-client|'
+    r'java/|okhttp|libwww|scrapy',
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=4096)
+def classify_user_agent(user_agent: Optional[str]) -> str:
+    """'human', 'bot' or 'empty' for a User-Agent header"""
+    if not user_agent or not user_agent.strip():
+        return 'empty'
+    return 'bot' if _BOT_PATTERN.search(user_agent) else 'human'
+
+
+class SlidingWindowCounter:
+    """
+    Approximate per-key hit counts over the last ``window`` seconds.
+
+    Each key keeps the counts of the current and previous fixed buckets; the
+    previous bucket is weighted by how much of it still overlaps the window.
+    At most ``max_keys`` keys are kept, least recently seen evicted first.
+    A key can also carry one value, e.g. the session its first hit was saved as.
+    Not thread-safe on its own; ClickFilter serializes access.
+    """
+
+    def __init__(self, window: float, max_keys: int = DEFAULT_MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        # key -> [bucket number, current count, previous count, value]
+        self._entries: 'OrderedDict[Hashable, List[Any]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def hit(self, key: Hashable, now: float) -> float:
+        """Record a hit and return the estimated count including it"""
+        position = now / self.window
+        bucket = int(position)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [bucket, 0, 0, None]
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+            if entry[0] != bucket:
+                entry[2] = entry[1] if entry[0] == bucket - 1 else 0
+                entry[1] = 0
+                entry[0] = bucket
+        entry[1] += 1
+        return entry[1] + entry[2] * (1.0 - (position - bucket))
+
+    def tag(self, key: Hashable, value: Any):
+        """Attach value to a key that has been hit"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[3] = value
+
+    def tagged(self, key: Hashable) -> Any:
+        """The value attached to key, None if there is none or it was evicted"""
+        entry = self._entries.get(key)
+        return entry[3] if entry is not None else None
+
+
+class ClickFilter:
+    """Decide inline whether a tracked hit should be persisted"""
+
+    def __init__(self, ip_limit: int = 30, ip_window: float = 60.0,
+                 repeat_limit: int = 1, repeat_window: float = 30.0,
+                 max_keys: int = DEFAULT_MAX_KEYS, allow_empty_user_agent: bool = False):
+        self.ip_limit = ip_limit
+        self.repeat_limit = repeat_limit
+        self.allow_empty_user_agent = allow_empty_user_agent
+        self.per_ip = SlidingWindowCounter(ip_window, max_keys)
+        self.per_click = SlidingWindowCounter(repeat_window, max_keys)
+        self.counts: Counter = Counter()
+        # Request threads share the LRU windows and counts
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _click_key(ip_address: Optional[str], gclid: Optional[str],
+                   user_agent: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+        # Without a gclid, the same IP and browser reloading is the repeat
+        return (ip_address, gclid or user_agent)
+
+    def check(self, ip_address: Optional[str], gclid: Optional[str],
+              user_agent: Optional[str], now: Optional[float] = None,
+              session_id: Optional[str] = None) -> Optional[str]:
+        """
+        Returns None if the hit should be saved, otherwise the reason it was
+        filtered ('bot', 'empty_user_agent', 'ip_rate' or 'repeat'). The
+        session_id of a saved hit is kept for session_for().
+        """
+        now = time.time() if now is None else now
+        reason = None
+        kind = classify_user_agent(user_agent)
+        if kind == 'bot':
+            reason = 'bot'
+        elif kind == 'empty' and not self.allow_empty_user_agent:
+            reason = 'empty_user_agent'
+        key = self._click_key(ip_address, gclid, user_agent)
+        with self._lock:
+            if reason is None:
+                # Both windows see every human hit, so a flood keeps its IP limited
+                ip_hits = self.per_ip.hit(ip_address, now)
+                repeat_hits = self.per_click.hit(key, now)
+                if ip_hits > self.ip_limit:
+                    reason = 'ip_rate'
+                elif repeat_hits > self.repeat_limit:
+                    reason = 'repeat'
+                elif session_id:
+                    self.per_click.tag(key, session_id)
+            self.counts[reason or 'passed'] += 1
+        return reason
+
+    def session_for(self, ip_address: Optional[str], gclid: Optional[str],
+                    user_agent: Optional[str]) -> Optional[str]:
+        """Session of the last saved hit for this click, while it is still tracked"""
+        key = self._click_key(ip_address, gclid, user_agent)
+        with self._lock:
+            return self.per_click.tagged(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Passed and filtered hit counts since startup"""
+        with self._lock:
+            stats = dict(self.counts)
+            stats['tracked_ips'] = len(self.per_ip)
+        stats['filtered'] = sum(n for reason, n in stats.items()
+                                if reason not in ('passed', 'tracked_ips'))
+        return stats
+
+
+def benchmark(requests: int = 1000000):
+    """Per-request overhead on a synthetic mix of users, repeats and bots"""
+    import random
+
+    random.seed(7)
+    user_agents = [f"Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/{v}.0 Safari/537.36"
+                   for v in range(90, 130)]
+    user_agents += ['Googlebot/2.1 (+http://www.google.com/bot.html)', 'AdsBot-Google',
+                    'curl/8.4.0', 'python-requests/2.31', '']
+    hits = []
+    for i in range(requests):
+        roll = random.random()
+        if hits and roll < 0.05:
+            hits.append(hits[-1])  # Reload / double click
+        elif roll < 0.07:
+            hits.append(('203.0.113.9', f"gclid_flood_{i}", user_agents[0]))
+        else:
+            ip = f"10.{random.randrange(64)}.{random.randrange(256)}.{random.randrange(8)}"
+            hits.append((ip, f"gclid_{i}", random.choice(user_agents)))
+
+    click_filter = ClickFilter()
+    clock = 1_700_000_000.0
+    started = time.perf_counter()
+    for i, (ip, gclid, user_agent) in enumerate(hits):
+        click_filter.check(ip, gclid, user_agent, clock + i * 0.001)
+    seconds = time.perf_counter() - started
+
+    stats = click_filter.stats()
+    print(f"Benchmark: {requests} hits, {requests / 1000:.0f}s of simulated traffic")
+    print(f"  {seconds / requests * 1e6:.2f} µs per check ({requests / seconds:,.0f} checks/s)")
+    print(f"  passed {stats.get('passed', 0)}, filtered {stats['filtered']} "
+          f"({', '.join(f'{k} {v}' for k, v in sorted(stats.items()) if k not in ('passed', 'filtered', 'tracked_ips'))})")
+    print(f"  tracked keys: {len(click_filter.per_ip)} IPs, {len(click_filter.per_click)} clicks "
+          f"(cap {click_filter.per_ip.max_keys} each)")
+    print(f"  UA cache: {classify_user_agent.cache_info()}")
+
+    # What a filtered hit saves: one save_click_data() call
+    import os
+    import tempfile
+    from web_app_integration import GoogleAdsWebIntegration
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    integration = GoogleAdsWebIntegration(db_path)
+    started = time.perf_counter()
+    for i in range(500):
+        integration.save_click_data({'keyword': 'cat insurance', 'gclid': f"bench_{i}"},
+                                    {'ip_address': '10.0.0.1', 'user_agent': user_agents[0]})
+    insert_seconds = (time.perf_counter() - started) / 500
+    os.remove(db_path)
+    os.rmdir(os.path.dirname(db_path))
+    print(f"  save_click_data for comparison: {insert_seconds * 1e6:.0f} µs per click")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+    else:
+        print("Usage: python click_filter.py --benchmark [requests]")
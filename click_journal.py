@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Append-only click journal with a background bulk loader.
+In journal mode save_click_data and track_conversion append one framed
+record (length, crc32, JSON) to the process's open segment file and return:
+no SQLite transaction on the landing-page path. A background thread fsyncs
+the segment in batches and rotates it by size or age. Records are written
+with os.write, so they survive a crash of the web process as soon as
+append() returns, and a machine crash after at most one fsync interval.
+
+JournalLoader drains closed segments into click_data in bulk. Its progress
+per segment is checkpointed in the same transaction as the rows, so a
+loader crash replays nothing twice. Segments left open by a dead process
+are closed on startup, up to their last complete record.
+
+Usage:
+    python click_journal.py --load [--journal click_journal] [--db google_ads_clicks.db] [--interval 1]
+    python click_journal.py --benchmark [clicks]
+"""
+
+import json
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_JOURNAL_DIR = 'click_journal'
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_SEGMENT_SECONDS = 5.0
+DEFAULT_FSYNC_INTERVAL = 0.05
+DEFAULT_BATCH_SIZE = 5000
+OPEN_SUFFIX = '.open'
+CLOSED_SUFFIX = '.seg'
+
+# Payload length, crc32 of the payload
+_FRAME = struct.Struct('<II')
+
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_records(path: str, offset: int = 0) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """
+    (record, offset after it) for each intact record from offset on.
+    Stops at the first short or corrupt frame: the torn tail of a crash.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    position = 0
+    while position + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, position)
+        start = position + _FRAME.size
+        payload = data[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            return
+        position = start + length
+        yield json.loads(payload), offset + position
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def close_stale_segments(directory: str) -> int:
+    """Close segments left open by processes that no longer exist"""
+    closed = 0
+    for name in os.listdir(directory):
+        if not name.endswith(OPEN_SUFFIX):
+            continue
+        try:
+            pid = int(name[:-len(OPEN_SUFFIX)].rsplit('-', 1)[1])
+        except (IndexError, ValueError):
+            continue
+        if pid != os.getpid() and not _pid_alive(pid):
+            path = os.path.join(directory, name)
+            os.replace(path, path[:-len(OPEN_SUFFIX)] + CLOSED_SUFFIX)
+            closed += 1
+    return closed
+
+
+class ClickJournal:
+    """Per-process segment writer with batched fsync and rotation"""
+
+    def __init__(self, directory: str = DEFAULT_JOURNAL_DIR,
+                 segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+                 segment_seconds: float = DEFAULT_SEGMENT_SECONDS,
+                 fsync_interval: float = DEFAULT_FSYNC_INTERVAL):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+        close_stale_segments(directory)
+
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._path: Optional[str] = None
+        self._size = 0
+        self._opened_at = 0.0
+        self._dirty = False
+        # Full segments waiting for the sync thread to fsync, close and rename
+        self._retired: List[Tuple[int, str]] = []
+        self.stats = {'appended': 0, 'fsyncs': 0, 'segments': 0}
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sync_loop, name='click-journal', daemon=True)
+        self._thread.start()
+
+    def _open_segment(self):
+        name = f"{time.time_ns():020d}-{os.getpid()}{OPEN_SUFFIX}"
+        self._path = os.path.join(self.directory, name)
+        self._fd = os.open(self._path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = 0
+        self._opened_at = time.monotonic()
+        self.stats['segments'] += 1
+
+    def _retire_segment(self):
+        """Hand the open segment to the sync thread (caller holds the lock)"""
+        if self._fd is not None:
+            self._retired.append((self._fd, self._path))
+            self._fd = self._path = None
+            self._dirty = False
+
+    def append(self, record: Dict[str, Any]):
+        """Write one record; it is on disk at the next batched fsync"""
+        frame = encode_record(record)
+        with self._lock:
+            if self._fd is None:
+                self._open_segment()
+            os.write(self._fd, frame)
+            self._size += len(frame)
+            self._dirty = True
+            self.stats['appended'] += 1
+            if self._size >= self.segment_bytes:
+                self._retire_segment()
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            self.sync()
+
+    def sync(self):
+        """fsync pending writes and close retired or aged segments"""
+        with self._lock:
+            if self._fd is not None and self._size and \
+                    time.monotonic() - self._opened_at >= self.segment_seconds:
+                self._retire_segment()
+            fd = self._fd if self._dirty else None
+            self._dirty = False
+            retired, self._retired = self._retired, []
+        # Only this method closes fds, so fsync can run outside the lock
+        if fd is not None:
+            os.fsync(fd)
+            self.stats['fsyncs'] += 1
+        for retired_fd, path in retired:
+            os.fsync(retired_fd)
+            os.close(retired_fd)
+            os.replace(path, path[:-len(OPEN_SUFFIX)] + CLOSED_SUFFIX)
+            self.stats['fsyncs'] += 1
+
+    def close(self):
+        """Stop the sync thread and close the open segment"""
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            self._retire_segment()
+        self.sync()
+
+
+def _sql_timestamp(epoch: float) -> str:
+    """click_data's CURRENT_TIMESTAMP format (UTC)"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(epoch))
+
+
+class JournalLoader:
+    """Bulk-loads closed journal segments into click_data"""
+
+    def __init__(self, integration, directory: str = DEFAULT_JOURNAL_DIR,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        if getattr(integration, 'shards', None):
+            # Rows and checkpoint share one transaction, which needs one database
+            raise ValueError("JournalLoader needs a single-database GoogleAdsWebIntegration")
+        self.integration = integration
+        self.directory = directory
+        self.batch_size = batch_size
+        self.stats = {'clicks': 0, 'conversions': 0, 'segments': 0, 'torn_tails': 0}
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(integration.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS journal_checkpoint (
+                segment TEXT PRIMARY KEY,
+                offset INTEGER NOT NULL,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def closed_segments(self) -> List[str]:
+        close_stale_segments(self.directory)
+        return sorted(name for name in os.listdir(self.directory) if name.endswith(CLOSED_SUFFIX))
+
+    def _load_batch(self, conn: sqlite3.Connection, segment: str, end: int,
+                    records: List[Dict[str, Any]]):
+        """Rows and checkpoint in one transaction"""
+        cursor = conn.cursor()
+        clicks = [(r['session_id'], _sql_timestamp(r['ts']), r['click'], r['request'])
+                  for r in records if r['type'] == 'click']
+        conversions = [r for r in records if r['type'] == 'conversion']
+        self.integration.save_click_batch(clicks, cursor)
+        table = self.integration.click_table
+        for record in conversions:
+            cursor.execute(f"UPDATE {table} SET converted = 1, conversion_value = ? "
+                           f"WHERE session_id = ?", (record['value'], record['session_id']))
+        cursor.executemany("""
+            INSERT INTO conversions (session_id, timestamp, conversion_value) VALUES (?, ?, ?)
+        """, [(r['session_id'], _sql_timestamp(r['ts']), r['value']) for r in conversions])
+        # A conversion may have been loaded before its click (another
+        # worker's segment closed first): apply it now
+        sessions = list({click[0] for click in clicks})
+        for i in range(0, len(sessions), 500):
+            chunk = sessions[i:i + 500]
+            cursor.execute(f"""
+                UPDATE {table}
+                SET converted = 1,
+                    conversion_value = (SELECT conversion_value FROM conversions c
+                                        WHERE c.session_id = {table}.session_id
+                                        ORDER BY c.id DESC LIMIT 1)
+                WHERE converted = 0 AND session_id IN ({','.join('?' * len(chunk))})
+                  AND session_id IN (SELECT session_id FROM conversions)
+            """, chunk)
+        cursor.execute("""
+            INSERT INTO journal_checkpoint (segment, offset) VALUES (?, ?)
+            ON CONFLICT(segment) DO UPDATE SET offset = excluded.offset,
+                                               updated_at = CURRENT_TIMESTAMP
+        """, (segment, end))
+        conn.commit()
+        self.stats['clicks'] += len(clicks)
+        self.stats['conversions'] += len(conversions)
+
+    def drain(self) -> Dict[str, int]:
+        """Load every closed segment, then delete it"""
+        conn = sqlite3.connect(self.integration.db_path)
+        checkpoints = dict(conn.execute("SELECT segment, offset FROM journal_checkpoint"))
+        segments = self.closed_segments()
+        for segment in segments:
+            path = os.path.join(self.directory, segment)
+            offset = checkpoints.get(segment, 0)
+            batch: List[Dict[str, Any]] = []
+            end = offset
+            for record, end in read_records(path, offset):
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self._load_batch(conn, segment, end, batch)
+                    batch = []
+            if batch:
+                self._load_batch(conn, segment, end, batch)
+            if end < os.path.getsize(path):
+                self.stats['torn_tails'] += 1  # Partial record from a crash
+            os.remove(path)
+            conn.execute("DELETE FROM journal_checkpoint WHERE segment = ?", (segment,))
+            conn.commit()
+            self.stats['segments'] += 1
+        # Checkpoints of segments removed just before a crash
+        present = set(segments)
+        stale = [name for name in checkpoints if name not in present]
+        conn.executemany("DELETE FROM journal_checkpoint WHERE segment = ?", [(n,) for n in stale])
+        conn.commit()
+        conn.close()
+        return dict(self.stats)
+
+    def run(self, interval: float = 1.0):
+        while True:
+            before = self.stats['clicks'] + self.stats['conversions']
+            self.drain()
+            loaded = self.stats['clicks'] + self.stats['conversions'] - before
+            if loaded:
+                print(f"Loaded {loaded} records ({self.stats['clicks']} clicks, "
+                      f"{self.stats['conversions']} conversions total)")
+            time.sleep(interval)
+
+
+def _crash_writer(directory: str):
+    """Benchmark child: append numbered clicks until killed"""
+    journal = ClickJournal(directory, segment_bytes=256 * 1024)
+    i = 0
+    while True:
+        journal.append({'type': 'click', 'ts': time.time(), 'session_id': f"crash{i:09d}",
+                        'click': {'keyword': 'crash test', 'gclid': f"crash_{i}"},
+                        'request': {'ip_address': '10.0.0.1', 'user_agent': 'Mozilla/5.0'}})
+        i += 1
+
+
+def benchmark(clicks: int = 20000):
+    """Landing-page write latency, loader throughput and a kill -9 test"""
+    import shutil
+    import signal
+    import subprocess
+    import tempfile
+    from web_app_integration import GoogleAdsWebIntegration
+
+    def percentiles(samples: List[float]) -> str:
+        samples = sorted(samples)
+        return (f"p50 {samples[len(samples) // 2] * 1e6:.0f} µs, "
+                f"p99 {samples[int(len(samples) * 0.99)] * 1e6:.0f} µs")
+
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"Benchmark: {clicks} clicks")
+        for label, journal_dir in (('direct SQLite', None),
+                                   ('journal append', os.path.join(workdir, 'journal'))):
+            db_path = os.path.join(workdir, f"{label.split()[0]}.db")
+            tracker = GoogleAdsWebIntegration(db_path, journal_dir=journal_dir)
+            samples = []
+            for i in range(clicks):
+                started = time.perf_counter()
+                tracker.save_click_data(
+                    {'keyword': f"pet insurance {i % 300}", 'campaign': 'journal', 'gclid': f"g{i}"},
+                    {'ip_address': f"10.0.{i % 256}.1", 'user_agent': 'Mozilla/5.0'})
+                samples.append(time.perf_counter() - started)
+            tracker.close()
+            print(f"  save_click_data, {label:<15} {percentiles(samples)}")
+            if journal_dir:
+                print(f"    {tracker.journal.stats['fsyncs']} fsyncs for "
+                      f"{tracker.journal.stats['appended']} records")
+                started = time.perf_counter()
+                stats = JournalLoader(tracker, journal_dir).drain()
+                seconds = time.perf_counter() - started
+                print(f"  loader: {stats['clicks']} clicks from {stats['segments']} segments in "
+                      f"{seconds:.2f}s ({stats['clicks'] / seconds:,.0f} clicks/s)")
+
+        # Kill a writer mid-stream: everything before the torn tail loads
+        crash_dir = os.path.join(workdir, 'crash')
+        os.makedirs(crash_dir)
+        child = subprocess.Popen([sys.executable, __file__, '--crash-writer', crash_dir])
+        time.sleep(1.0)
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+        tracker = GoogleAdsWebIntegration(os.path.join(workdir, 'crash.db'))
+        stats = JournalLoader(tracker, crash_dir).drain()
+        conn = sqlite3.connect(tracker.db_path)
+        count, highest = conn.execute(
+            "SELECT COUNT(*), MAX(CAST(substr(session_id, 6) AS INTEGER)) FROM click_data"
+        ).fetchone()
+        conn.close()
+        print(f"  kill -9 test: {count} clicks recovered, highest index {highest}, "
+              f"{'no gaps' if count == highest + 1 else 'GAPS'}, {stats['torn_tails']} torn tails")
+    finally:
+        shutil.rmtree(workdir)
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(int(args[1]) if len(args) > 1 else 20000)
+        return
+    if args and args[0] == '--crash-writer':
+        _crash_writer(args[1])
+        return
+    if args and args[0] == '--load':
+        from web_app_integration import GoogleAdsWebIntegration
+
+        def option(name: str, default: str) -> str:
+            return args[args.index(name) + 1] if name in args else default
+
+        tracker = GoogleAdsWebIntegration(option('--db', 'google_ads_clicks.db'))
+        JournalLoader(tracker, option('--journal', DEFAULT_JOURNAL_DIR)).run(
+            float(option('--interval', '1')))
+        return
+    print(__doc__)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Hash-sharded click storage for multi-process deployments.
+ShardedGoogleAdsWebIntegration spreads click_data over N SQLite files by
+crc32 of the session id, so worker processes mostly commit to different
+files instead of queueing on one writer lock. Session reads, conversions
+and page content are routed to a single shard; get_analytics queries every
+shard in parallel and merges the raw aggregates.
+
+Clicks with a gclid get a session id derived from it, so a repeat click
+lands on the shard that already holds the gclid and is deduplicated there.
+
+Usage:
+    python click_shards.py --benchmark [clicks per worker]
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from click_dimensions import dimension_table
+from click_filter import ClickFilter
+from web_app_integration import GoogleAdsWebIntegration
+
+DEFAULT_SHARDS = 8
+
+
+def shard_paths(db_path: str, shards: int) -> List[str]:
+    """google_ads_clicks.db -> google_ads_clicks.shard00.db, ..."""
+    root, ext = os.path.splitext(db_path)
+    return [f"{root}.shard{i:02d}{ext or '.db'}" for i in range(shards)]
+
+
+class ShardedGoogleAdsWebIntegration:
+    """GoogleAdsWebIntegration API over N hash-partitioned databases"""
+
+    def __init__(self, db_path: str = "google_ads_clicks.db", shards: int = DEFAULT_SHARDS,
+                 click_filter: Optional[ClickFilter] = None, **shard_options):
+        if shard_options.get('journal_dir'):
+            # JournalLoader checkpoints and loads in one database transaction
+            raise ValueError("journal mode is not supported with shards")
+        self.db_path = db_path
+        self.shard_count = shards
+        self._check_layout()
+        # Filtering is per process, so it happens once before routing
+        self.click_filter = click_filter
+        self.shards = [GoogleAdsWebIntegration(path, **shard_options)
+                       for path in shard_paths(db_path, shards)]
+        self._pool = ThreadPoolExecutor(max_workers=shards, thread_name_prefix='shard')
+
+    def _check_layout(self):
+        """Refuse to reopen shards with a different count: routing would change"""
+        layout_path = os.path.splitext(self.db_path)[0] + '.shards.json'
+        try:
+            with open(layout_path, 'r') as f:
+                existing = json.load(f)['shards']
+        except (OSError, ValueError, KeyError):
+            with open(layout_path, 'w') as f:
+                json.dump({'shards': self.shard_count}, f)
+            return
+        if existing != self.shard_count:
+            raise ValueError(f"{self.db_path} is split into {existing} shards, not {self.shard_count}")
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        self._pool.shutdown(wait=False)
+
+    def shard_for(self, key: str) -> GoogleAdsWebIntegration:
+        return self.shards[zlib.crc32(key.encode('utf-8')) % self.shard_count]
+
+    def _generate_session_id(self, click_data: Dict[str, Any],
+                             request_info: Dict[str, str]) -> str:
+        gclid = click_data.get('gclid')
+        if gclid:
+            return hashlib.sha256(f"gclid:{gclid}".encode()).hexdigest()[:16]
+        return self.shards[0]._generate_session_id(click_data, request_info)
+
+    def save_click_data(self, click_data: Dict[str, Any],
+                        request_info: Dict[str, str]) -> Optional[str]:
+        session_id = self._generate_session_id(click_data, request_info)
+        if self.click_filter and self.click_filter.check(
+                request_info.get('ip_address'), click_data.get('gclid'),
+                request_info.get('user_agent'), session_id=session_id):
+            return self.click_filter.session_for(
+                request_info.get('ip_address'), click_data.get('gclid'),
+                request_info.get('user_agent'))
+        return self.shard_for(session_id).save_click_data(click_data, request_info, session_id)
+
+    def save_click_batch(self, clicks: List[Tuple[str, str, Dict[str, Any], Dict[str, str]]],
+                         cursor: Optional[sqlite3.Cursor] = None):
+        """
+        save_click_batch on each shard for its share of the clicks, shards in
+        parallel. Each shard commits on its own, so the batch is not atomic.
+        """
+        if cursor is not None:
+            raise ValueError("a cursor belongs to one database; sharded batches commit per shard")
+        groups = self._group(clicks, lambda click: click[0])
+        list(self._pool.map(lambda item: item[0].save_click_batch(item[1]), groups.items()))
+
+    def save_content_batch(self, items: Iterable[Tuple[str, Dict[str, str]]],
+                           generator: str = '') -> int:
+        """Bulk-cache (keyword, content) pairs on their shards; returns the rows written"""
+        groups = self._group(items, lambda item: item[0])
+        return sum(self._pool.map(lambda item: item[0].save_content_batch(item[1], generator),
+                                  groups.items()))
+
+    def _group(self, rows: Iterable[Any], key) -> Dict[GoogleAdsWebIntegration, List[Any]]:
+        groups: Dict[GoogleAdsWebIntegration, List[Any]] = {}
+        for row in rows:
+            groups.setdefault(self.shard_for(key(row)), []).append(row)
+        return groups
+
+    def get_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self.shard_for(session_id).get_session_data(session_id)
+
+    def track_conversion(self, session_id: str, conversion_value: float = 0):
+        self.shard_for(session_id).track_conversion(session_id, conversion_value)
+
+    def get_content_for_keyword(self, keyword: str) -> Optional[Dict[str, str]]:
+        return self.shard_for(keyword).get_content_for_keyword(keyword)
+
+    def get_content_version(self, keyword: str) -> Optional[Tuple[str, str]]:
+        return self.shard_for(keyword).get_content_version(keyword)
+
+    def save_content_for_keyword(self, keyword: str, content: Dict[str, str],
+                                 generator: str = ''):
+        self.shard_for(keyword).save_content_for_keyword(keyword, content, generator)
+
+    @staticmethod
+    def _shard_aggregates(shard: GoogleAdsWebIntegration, cutoff_date: datetime) -> Dict[str, Any]:
+        """Mergeable per-shard sums, overall and per keyword and campaign"""
+        conn = sqlite3.connect(shard.db_path)
+
+        def groups(column: str) -> List[tuple]:
+            if not shard.normalized:
+                return conn.execute(f"""
+                    SELECT {column}, COUNT(*), SUM(converted), SUM(conversion_value)
+                    FROM click_data WHERE timestamp > ? GROUP BY {column}
+                """, (cutoff_date,)).fetchall()
+            # Group by id, then name the groups: ids are local to each shard
+            return conn.execute(f"""
+                SELECT d.value, t.clicks, t.conversions, t.revenue
+                FROM (SELECT {column}_id AS group_id, COUNT(*) AS clicks,
+                             SUM(converted) AS conversions, SUM(conversion_value) AS revenue
+                      FROM click_facts WHERE timestamp > ? GROUP BY {column}_id) t
+                LEFT JOIN {dimension_table(column)} d ON d.id = t.group_id
+            """, (cutoff_date,)).fetchall()
+
+        try:
+            totals = conn.execute(f"""
+                SELECT COUNT(*), COALESCE(SUM(converted), 0), COALESCE(SUM(conversion_value), 0)
+                FROM {shard.click_table} WHERE timestamp > ?
+            """, (cutoff_date,)).fetchone()
+            return {'totals': totals, 'keywords': groups('keyword'), 'campaigns': groups('campaign')}
+        finally:
+            conn.close()
+
+    def get_analytics(self, days: int = 30) -> Dict[str, Any]:
+        """Same shape as GoogleAdsWebIntegration.get_analytics, over all shards"""
+        cutoff_date = datetime.now() - timedelta(days=days)
+        parts = list(self._pool.map(lambda shard: self._shard_aggregates(shard, cutoff_date),
+                                    self.shards))
+
+        clicks = sum(p['totals'][0] for p in parts)
+        conversions = sum(p['totals'][1] for p in parts)
+        revenue = sum(p['totals'][2] for p in parts)
+
+        def merge(key: str) -> Dict[Any, List[float]]:
+            groups: Dict[Any, List[float]] = {}
+            for part in parts:
+                for name, group_clicks, group_conversions, group_revenue in part[key]:
+                    total = groups.setdefault(name, [0, 0, 0.0])
+                    total[0] += group_clicks
+                    total[1] += group_conversions or 0
+                    total[2] += group_revenue or 0.0
+            return groups
+
+        keywords, campaigns = merge('keywords'), merge('campaigns')
+        keywords.pop(None, None)
+        campaigns.pop(None, None)
+        top_keywords = sorted(keywords.items(), key=lambda item: -item[1][0])[:10]
+        top_campaigns = sorted(campaigns.items(), key=lambda item: -item[1][2])[:10]
+
+        analytics = {
+            'period_days': days,
+            'overall_stats': {
+                'total_clicks': clicks,
+                'unique_keywords': len(keywords),
+                'unique_campaigns': len(campaigns),
+                'total_conversions': conversions,
+                'total_revenue': revenue,
+                'conversion_rate': conversions / clicks * 100 if clicks else None,
+            },
+            'top_keywords': [{'keyword': name, 'clicks': c, 'conversions': v,
+                              'conversion_rate': v / c * 100}
+                             for name, (c, v, _) in top_keywords],
+            'top_campaigns': [{'campaign': name, 'clicks': c, 'conversions': v, 'revenue': r}
+                              for name, (c, v, r) in top_campaigns],
+            'shards': self.shard_count,
+        }
+        if self.click_filter:
+            analytics['filtered_clicks'] = self.click_filter.stats()
+        return analytics
+
+
+def _write_clicks(args) -> float:
+    """Benchmark worker: one process saving its share of clicks"""
+    db_path, shards, worker, count = args
+    if shards:
+        tracker = ShardedGoogleAdsWebIntegration(db_path, shards)
+    else:
+        tracker = GoogleAdsWebIntegration(db_path)
+    started = time.perf_counter()
+    for i in range(count):
+        tracker.save_click_data(
+            {'keyword': f"pet insurance {i % 500}", 'campaign': 'benchmark',
+             'gclid': f"w{worker}_{i}"},
+            {'ip_address': f"10.0.{worker}.{i % 256}", 'user_agent': 'Mozilla/5.0'})
+    return time.perf_counter() - started
+
+
+def benchmark(clicks_per_worker: int = 500, shards: int = DEFAULT_SHARDS):
+    """Write throughput of one database vs shards as worker processes grow"""
+    import shutil
+    import tempfile
+    from multiprocessing import Pool
+
+    print(f"Benchmark: {clicks_per_worker} clicks per worker process, "
+          f"{os.cpu_count()} CPUs, {shards} shards")
+    print(f"  {'workers':>7}  {'single db':>14}  {'sharded':>14}")
+    for workers in (1, 2, 4, 8):
+        rates = []
+        for shard_count in (0, shards):
+            workdir = tempfile.mkdtemp()
+            db_path = os.path.join(workdir, 'clicks.db')
+            # Create the schema before the workers race to do it
+            if shard_count:
+                ShardedGoogleAdsWebIntegration(db_path, shard_count).close()
+            else:
+                GoogleAdsWebIntegration(db_path)
+            started = time.perf_counter()
+            with Pool(workers) as pool:
+                pool.map(_write_clicks, [(db_path, shard_count, w, clicks_per_worker)
+                                         for w in range(workers)])
+            rates.append(workers * clicks_per_worker / (time.perf_counter() - started))
+            shutil.rmtree(workdir)
+        print(f"  {workers:>7}  {rates[0]:>10,.0f}/s  {rates[1]:>10,.0f}/s")
+
+    # Parallel analytics fan-out over the shards
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'clicks.db')
+    _write_clicks((db_path, shards, 0, clicks_per_worker * 4))
+    tracker = ShardedGoogleAdsWebIntegration(db_path, shards)
+    started = time.perf_counter()
+    analytics = tracker.get_analytics()
+    print(f"  get_analytics over {shards} shards: {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"({analytics['overall_stats']['total_clicks']} clicks)")
+    tracker.close()
+    shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 500)
+    else:
+        print("Usage: python click_shards.py --benchmark [clicks per worker]")
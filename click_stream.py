@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Live click and conversion rates for dashboards, as server-sent events.
+ClickStream keeps the last minute of traffic in a ring of one-second
+slots, updated by save_click_data and track_conversion. Once a second a
+publisher thread turns the ring into one SSE frame (rates over the last
+RATE_WINDOW whole seconds, top keywords of the minute); every subscriber
+is sent that same frame, so a dashboard costs a socket write per second
+and the database sees no analytics queries at all.
+
+The ring lives in the process that tracked the clicks: with several
+workers, each streams the traffic it served.
+
+Usage:
+    python click_stream.py --benchmark [subscribers]
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+RING_SECONDS = 60
+RATE_WINDOW = 10           # Whole seconds averaged into the reported rates
+TOP_KEYWORDS = 10
+PUBLISH_INTERVAL = 1.0
+RETRY_MILLISECONDS = 3000  # EventSource reconnect delay sent to clients
+
+
+class ClickStream:
+    """Per-second ring of click, conversion and revenue counts"""
+
+    def __init__(self, ring_seconds: int = RING_SECONDS, rate_window: int = RATE_WINDOW,
+                 publish_interval: float = PUBLISH_INTERVAL):
+        self.ring_seconds = ring_seconds
+        self.rate_window = min(rate_window, ring_seconds - 1)
+        self.publish_interval = publish_interval
+        self._seconds = [0] * ring_seconds
+        self._clicks = [0] * ring_seconds
+        self._conversions = [0] * ring_seconds
+        self._revenue = [0.0] * ring_seconds
+        self._keywords: List[Counter] = [Counter() for _ in range(ring_seconds)]
+        # Keyword clicks over every live slot, kept in step with the ring
+        self._window_keywords: Counter = Counter()
+        self._lock = threading.Lock()
+        # Latest frame, shared by all subscribers
+        self._frame_id = 0
+        self._frame = ''
+        self._published = threading.Condition()
+        self.subscribers = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _slot(self, second: int) -> int:
+        """Ring index of second, emptied first if it still holds an older second"""
+        i = second % self.ring_seconds
+        if self._seconds[i] != second:
+            self._clear(i)
+            self._seconds[i] = second
+        return i
+
+    def _clear(self, i: int):
+        window = self._window_keywords
+        for keyword, count in self._keywords[i].items():
+            left = window[keyword] - count
+            if left:
+                window[keyword] = left
+            else:
+                del window[keyword]
+        self._keywords[i] = Counter()
+        self._clicks[i] = self._conversions[i] = 0
+        self._revenue[i] = 0.0
+
+    def record_click(self, session_id: str, click_data: Dict[str, Any],
+                     now: Optional[float] = None):
+        keyword = click_data.get('keyword')
+        with self._lock:
+            i = self._slot(int(now if now is not None else time.time()))
+            self._clicks[i] += 1
+            if keyword:
+                self._keywords[i][keyword] += 1
+                self._window_keywords[keyword] += 1
+
+    def record_conversion(self, session_id: str, value: float = 0,
+                          now: Optional[float] = None):
+        with self._lock:
+            i = self._slot(int(now if now is not None else time.time()))
+            self._conversions[i] += 1
+            self._revenue[i] += float(value or 0)
+
+    def metrics(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Rates over the last rate_window whole seconds and the minute's top keywords"""
+        second = int(now if now is not None else time.time())
+        with self._lock:
+            # Slots nobody wrote to lately still hold old seconds: expire them
+            for i, slot_second in enumerate(self._seconds):
+                if slot_second and slot_second <= second - self.ring_seconds:
+                    self._clear(i)
+                    self._seconds[i] = 0
+            recent = [i for i, slot_second in enumerate(self._seconds)
+                      if second - self.rate_window <= slot_second < second]
+            clicks = sum(self._clicks[i] for i in recent)
+            conversions = sum(self._conversions[i] for i in recent)
+            revenue = sum(self._revenue[i] for i in recent)
+            series = [self._clicks[(second - age) % self.ring_seconds]
+                      if self._seconds[(second - age) % self.ring_seconds] == second - age else 0
+                      for age in range(self.ring_seconds - 1, 0, -1)]
+            top = self._window_keywords.most_common(TOP_KEYWORDS)
+        window = self.rate_window
+        return {
+            'ts': second,
+            'rate_window_seconds': window,
+            'clicks_per_second': clicks / window,
+            'conversions_per_second': conversions / window,
+            'revenue_per_second': revenue / window,
+            'conversion_rate': conversions / clicks * 100 if clicks else None,
+            'clicks_last_minute': series,
+            'top_keywords': [{'keyword': keyword, 'clicks': count} for keyword, count in top],
+            'subscribers': self.subscribers,
+        }
+
+    def publish(self, now: Optional[float] = None):
+        """Build the next frame and wake every subscriber"""
+        data = json.dumps(self.metrics(now), separators=(',', ':'))
+        with self._published:
+            self._frame_id += 1
+            self._frame = f"id: {self._frame_id}\nevent: metrics\ndata: {data}\n\n"
+            self._published.notify_all()
+
+    def _publish_loop(self):
+        while not self._stop.wait(self.publish_interval - time.time() % self.publish_interval):
+            self.publish()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._publish_loop, name='click-stream',
+                                                daemon=True)
+                self._thread.start()
+
+    def subscribe(self, timeout: float = 15.0) -> Iterator[str]:
+        """SSE text for one client: each new frame, or a comment when none came"""
+        self._start()
+        with self._published:
+            self.subscribers += 1
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+            seen = 0
+            while not self._stop.is_set():
+                with self._published:
+                    self._published.wait_for(
+                        lambda: self._frame_id != seen or self._stop.is_set(), timeout)
+                    frame_id, frame = self._frame_id, self._frame
+                if frame_id == seen:
+                    yield ": keepalive\n\n"  # Lets the server notice gone clients
+                    continue
+                seen = frame_id
+                yield frame
+        finally:
+            with self._published:
+                self.subscribers -= 1
+
+    def close(self):
+        """Stop publishing and end every subscription"""
+        self._stop.set()
+        with self._published:
+            self._published.notify_all()
+        if self._thread:
+            self._thread.join()
+
+
+def benchmark(subscribers: int = 200, clicks: int = 200000):
+    """Tracking-path cost, frame cost and fan-out to many subscribers"""
+    import random
+
+    rng = random.Random(49)
+    keywords = [f"pet insurance keyword {i}" for i in range(5000)]
+    events = [{'keyword': keywords[min(int(rng.paretovariate(1.0)) - 1, len(keywords) - 1)]}
+              for _ in range(clicks)]
+    stream = ClickStream()
+    # Spread the clicks over the minute so every slot is recycled at least once
+    base = time.time() - RING_SECONDS * 2
+    step = RING_SECONDS * 2 / clicks
+    started = time.perf_counter()
+    for i, click in enumerate(events):
+        stream.record_click(str(i), click, now=base + i * step)
+        if i % 25 == 0:
+            stream.record_conversion(str(i), 50.0, now=base + i * step)
+    record_seconds = (time.perf_counter() - started) / clicks
+    started = time.perf_counter()
+    for _ in range(100):
+        stream.publish(now=base + RING_SECONDS * 2)
+    publish_seconds = (time.perf_counter() - started) / 100
+    print(f"Benchmark: {clicks:,} clicks over {RING_SECONDS * 2} s, {len(keywords):,} keywords")
+    print(f"  tracking path: {record_seconds * 1e6:.1f} µs per click")
+    print(f"  frame build: {publish_seconds * 1e3:.2f} ms, "
+          f"{len(stream._frame):,} bytes (once per second, whatever the subscriber count)")
+
+    received = [0] * subscribers
+    ready = threading.Barrier(subscribers + 1)
+
+    def client(n: int):
+        frames = stream.subscribe()
+        next(frames)  # retry: line
+        ready.wait()
+        for frame in frames:
+            if frame.startswith('id:'):
+                received[n] += 1
+                if received[n] == 20:
+                    return
+
+    threads = [threading.Thread(target=client, args=(n,), daemon=True) for n in range(subscribers)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    cpu, started = time.process_time(), time.perf_counter()
+    for tick in range(20):
+        stream.publish()
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join(5)
+    wall = time.perf_counter() - started
+    print(f"  {subscribers} subscribers x 20 frames: {sum(received):,} frames delivered, "
+          f"{(time.process_time() - cpu) / 20 * 1e3:.1f} ms CPU per frame across all "
+          f"({wall:.1f} s wall)")
+    stream.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 200)
+    else:
+        print("Usage: python click_stream.py --benchmark [subscribers]")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Deploy-time warmup of the page_content cache.
+Generates landing-page content for every keyword of the corpus in a
+process pool and bulk-upserts it into page_content, skipping rows whose
+content hash is unchanged. Once warm, save_content_for_keyword finds
+every keyword's hash already stored and landing-page traffic does no
+content writes.
+
+The tracker and the content generator are built from the same environment
+as the app (CLICK_SHARDS, KEYWORD_CORPUS), so warmed rows land in the
+files the app reads and match what it would render, generator version
+included.
+
+Usage:
+    python content_warmup.py [source ...] [--db google_ads_clicks.db] [--workers N]
+    python content_warmup.py --benchmark [source]
+"""
+
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from corpus_merge import iter_source
+from google_ads_tracker import GoogleAdsDataProcessor, canonical_keyword
+from web_app_integration import (GoogleAdsWebIntegration, generator_version, processor_from_env,
+                                 tracker_from_env)
+
+DEFAULT_SOURCES = ['src/index.js']
+CHUNK_SIZE = 2000
+
+_processor = None  # Per worker process, built once by _init_worker
+
+
+def _init_worker():
+    global _processor
+    _processor = processor_from_env()
+
+
+def _render_chunk(keywords: List[str]) -> List[Tuple[str, Dict[str, str]]]:
+    """Worker: generate content for a chunk of keywords"""
+    if _processor is None:
+        _init_worker()
+    return [(keyword, _processor.generate_dynamic_content({'keyword': keyword}))
+            for keyword in keywords]
+
+
+def _chunks(keywords: Iterable[str], size: int) -> Iterator[List[str]]:
+    iterator = iter(keywords)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _unique(sources: List[str]) -> Iterator[str]:
+    """Canonical keys of the corpus keywords across sources, as the landing page looks them up"""
+    seen = set()
+    for source in sources:
+        for keyword in iter_source(source):
+            key = canonical_keyword(keyword)
+            if key and key not in seen:
+                seen.add(key)
+                yield key
+
+
+def warm_up(tracker, keywords: Iterable[str], workers: int = 0,
+            generator: str = '') -> Dict[str, float]:
+    """
+    Render and upsert content for every keyword into a GoogleAdsWebIntegration
+    or ShardedGoogleAdsWebIntegration, stored under the generator_version()
+    the app will look for; returns stats
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    total = written = 0
+    if workers == 1:
+        rendered = map(_render_chunk, _chunks(keywords, CHUNK_SIZE))
+        for items in rendered:
+            total += len(items)
+            written += tracker.save_content_batch(items, generator)
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            # Workers render while this process writes the previous chunk
+            for items in pool.map(_render_chunk, _chunks(keywords, CHUNK_SIZE)):
+                total += len(items)
+                written += tracker.save_content_batch(items, generator)
+    return {
+        'keywords': total,
+        'written': written,
+        'unchanged': total - written,
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+
+
+def benchmark(source: str = 'src/index.js'):
+    """Warmup timings and the landing-page content path before and after"""
+    import sqlite3
+    import tempfile
+
+    keywords = list(_unique([source]))
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'content.db')
+    try:
+        print(f"Benchmark: {len(keywords)} keywords from {source}, {os.cpu_count()} CPUs")
+        processor = GoogleAdsDataProcessor()
+        sample = keywords[:2000]
+
+        # Old behaviour: INSERT OR REPLACE on every hit
+        conn = sqlite3.connect(db_path)
+        GoogleAdsWebIntegration(db_path)
+        started = time.perf_counter()
+        for keyword in sample:
+            content = processor.generate_dynamic_content({'keyword': keyword})
+            conn.execute("""
+                INSERT OR REPLACE INTO page_content
+                (keyword, headline, subheadline, body_content, cta_text) VALUES (?, ?, ?, ?, ?)
+            """, (keyword, content['headline'], content['subheadline'],
+                  content['body_text'], content['cta_text']))
+            conn.commit()
+        replace_each = (time.perf_counter() - started) / len(sample)
+        conn.execute("DELETE FROM page_content")
+        conn.commit()
+        conn.close()
+
+        pool_size = max(2, os.cpu_count() or 1)
+        for label, workers in (('cold, serial', 1), (f"cold, {pool_size} processes", pool_size),
+                               (f"warm, {pool_size} processes", pool_size)):
+            if label.startswith('cold'):
+                conn = sqlite3.connect(db_path)
+                conn.execute("DELETE FROM page_content")
+                conn.commit()
+                conn.close()
+            stats = warm_up(GoogleAdsWebIntegration(db_path), keywords, workers)
+            print(f"  warmup ({label}): {stats['written']} written, {stats['unchanged']} unchanged "
+                  f"in {stats['seconds']}s")
+
+        # Landing-page path on a warm table: fresh process cache, then warm
+        tracker = GoogleAdsWebIntegration(db_path)
+        for label in ('first hit per keyword', 'repeat hit'):
+            before = os.path.getmtime(db_path)
+            started = time.perf_counter()
+            for keyword in sample:
+                tracker.save_content_for_keyword(
+                    keyword, processor.generate_dynamic_content({'keyword': keyword}))
+            seconds = (time.perf_counter() - started) / len(sample)
+            touched = 'written' if os.path.getmtime(db_path) != before else 'no writes'
+            print(f"  save_content_for_keyword, {label:<22} {seconds * 1e6:>6.0f} µs ({touched})")
+        print(f"  previous INSERT OR REPLACE per hit:           {replace_each * 1e6:>6.0f} µs")
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(args[1] if len(args) > 1 else 'src/index.js')
+        return
+
+    db_path, workers = 'google_ads_clicks.db', 0
+    if '--db' in args:
+        i = args.index('--db')
+        db_path = args[i + 1]
+        del args[i:i + 2]
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    sources = args or DEFAULT_SOURCES
+
+    _init_worker()
+    generator = generator_version(_processor)
+    tracker = tracker_from_env(db_path)
+    try:
+        stats = warm_up(tracker, _unique(sources), workers, generator)
+    finally:
+        tracker.close()
+    print(f"{db_path}: {stats['keywords']} keywords, {stats['written']} written, "
+          f"{stats['unchanged']} unchanged in {stats['seconds']}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Single monitoring daemon for content generation.
+Replaces auto_continue_generator.py, smart_continue.py, monitor_progress.py
+and simple_continue.py with one asyncio process: file watching, deployment
+probing and stall detection run as concurrent tasks on shared state, and
+the current progress is served as JSON on a local status endpoint.
+
+Usage:
+    python continue_daemon.py [--config daemon.json] [--index path]
+                              [--target N] [--port 8765] [--base-url URL]
+
+Config file keys match the Config attributes, e.g.
+    {"target_pages": 5000, "stall_seconds": 30, "max_stalls": 2}
+"""
+
+import asyncio
+import json
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from change_monitor import KeywordProgressMonitor, ProgressEvent
+from deploy_probe import DeploymentProbe
+
+RATE_WINDOW_SECONDS = 300
+
+
+class Config:
+    """Daemon policies; every attribute can be set from a JSON file"""
+
+    def __init__(self, **overrides: Any):
+        self.index_file = '/root/million-pages/src/index.js'
+        self.base_url: Optional[str] = None  # DeploymentProbe default
+        self.target_pages = 5000
+        self.probe_page = 2049
+        self.probe_interval = 60.0       # seconds between deployment probes
+        self.stall_seconds = 30.0        # no progress for this long = one stall
+        self.max_stalls = 2              # stalls before sending continue
+        self.continue_cooldown = 10.0    # let a continue take effect
+        self.continue_every = 0.0        # >0: also send continue on a fixed timer
+        self.signal_file: Optional[str] = '/tmp/continue_signal.txt'
+        self.status_host = '127.0.0.1'
+        self.status_port = 8765
+        for name, value in overrides.items():
+            if not hasattr(self, name):
+                raise ValueError(f"Unknown config option: {name}")
+            setattr(self, name, value)
+
+    @classmethod
+    def from_file(cls, path: str, **overrides: Any) -> 'Config':
+        with open(path, 'r') as f:
+            options = json.load(f)
+        options.update(overrides)
+        return cls(**options)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
+
+
+class DaemonState:
+    """Progress shared by the daemon tasks"""
+
+    def __init__(self, keyword_count: int):
+        now = time.time()
+        self.started_at = now
+        self.keyword_count = keyword_count
+        self.deployed_pages = 0
+        self.last_probe_at: Optional[float] = None
+        self.last_probe_error: Optional[str] = None
+        self.last_progress_at = now
+        self.stall_count = 0
+        self.continues_sent = 0
+        self.last_continue_at: Optional[float] = None
+        self.history: Deque[Tuple[float, int]] = deque([(now, keyword_count)])
+        self.initial_count = keyword_count
+
+    @property
+    def progress(self) -> int:
+        """Higher of the file count and the deployed count, as before"""
+        return max(self.keyword_count, self.deployed_pages)
+
+    def record(self, count: int, now: float, deployed_pages: Optional[int] = None) -> bool:
+        """Apply a new file count (and deployed count); True if it is progress"""
+        previous = self.progress
+        self.keyword_count = count
+        if deployed_pages is not None:
+            self.deployed_pages = deployed_pages
+        self.history.append((now, self.progress))
+        while len(self.history) > 1 and now - self.history[0][0] > RATE_WINDOW_SECONDS:
+            self.history.popleft()
+        if self.progress > previous:
+            self.last_progress_at = now
+            self.stall_count = 0
+            return True
+        return False
+
+    def rate_per_minute(self, now: float) -> float:
+        """Pages per minute over the recent window"""
+        first_time, first_count = self.history[0]
+        elapsed = now - first_time
+        return (self.progress - first_count) / elapsed * 60 if elapsed > 0 else 0.0
+
+    def snapshot(self, config: Config) -> Dict[str, Any]:
+        now = time.time()
+        rate = self.rate_per_minute(now)
+        overall_elapsed = now - self.started_at
+        remaining = max(0, config.target_pages - self.progress)
+        return {
+            'time': datetime.fromtimestamp(now).isoformat(),
+            'uptime_seconds': round(overall_elapsed, 1),
+            'keyword_count': self.keyword_count,
+            'deployed_pages': self.deployed_pages,
+            'progress': self.progress,
+            'target_pages': config.target_pages,
+            'percent': round(self.progress / config.target_pages * 100, 2) if config.target_pages else None,
+            'rate_per_minute': round(rate, 2),
+            'overall_rate_per_minute': round(
+                (self.progress - self.initial_count) / overall_elapsed * 60, 2
+            ) if overall_elapsed > 0 else 0.0,
+            'eta_minutes': round(remaining / rate, 1) if rate > 0 else None,
+            'idle_seconds': round(now - self.last_progress_at, 1),
+            'stall_count': self.stall_count,
+            'continues_sent': self.continues_sent,
+            'last_probe_at': (datetime.fromtimestamp(self.last_probe_at).isoformat()
+                              if self.last_probe_at else None),
+            'last_probe_error': self.last_probe_error,
+        }
+
+
+class ContinueDaemon:
+    """File watcher, deployment probe and stall detector on one event loop"""
+
+    def __init__(self, config: Config):
+        self.config = config
+        self.monitor = KeywordProgressMonitor(config.index_file)
+        self.probe = DeploymentProbe(config.base_url)
+        self.state = DaemonState(self.monitor.count)
+        self.done = asyncio.Event()
+
+    def log(self, message: str):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+        sys.stdout.flush()
+
+    # -- progress ---------------------------------------------------------
+
+    def _apply(self, count: int, source: str, deployed_pages: Optional[int] = None):
+        previous = self.state.progress
+        if self.state.record(count, time.time(), deployed_pages):
+            self.log(f"Progress ({source}): {previous} → {self.state.progress} "
+                     f"(+{self.state.progress - previous})")
+        if self.state.progress >= self.config.target_pages:
+            self.log(f"TARGET REACHED! {self.state.progress} pages")
+            self.done.set()
+
+    def _on_event(self, event: ProgressEvent):
+        self._apply(event.count, 'index.js')
+
+    async def watch_file(self):
+        """Recount whenever index.js changes"""
+        loop = asyncio.get_running_loop()
+        watcher = self.monitor.watcher
+        changed = asyncio.Event()
+        fd = watcher.fileno()
+        if fd is not None:
+            loop.add_reader(fd, changed.set)
+        try:
+            while True:
+                if fd is not None:
+                    await changed.wait()
+                    changed.clear()
+                    await asyncio.sleep(0.01)  # Let the write burst land
+                else:
+                    await asyncio.sleep(watcher.poll_interval)
+                if not watcher.poll():
+                    continue
+                try:
+                    event = await asyncio.to_thread(self.monitor.refresh)
+                except (OSError, ValueError):
+                    continue  # Half-written file; the next write retries
+                if event is not None:
+                    self._on_event(event)
+        finally:
+            if fd is not None:
+                loop.remove_reader(fd)
+
+    async def probe_deployment(self):
+        """Periodically read the deployed page count"""
+        while True:
+            try:
+                result = await asyncio.to_thread(self.probe.probe, self.config.probe_page)
+                self.state.last_probe_error = None
+                if result.page == self.config.probe_page:
+                    self._apply(self.state.keyword_count, 'deployment', result.deployed_pages)
+            except Exception as e:
+                self.state.last_probe_error = str(e)
+            self.state.last_probe_at = time.time()
+            await asyncio.sleep(self.config.probe_interval)
+
+    # -- stalls -----------------------------------------------------------
+
+    def send_continue(self, reason: str):
+        self.state.continues_sent += 1
+        self.state.last_continue_at = time.time()
+        print(f"\n{'=' * 50}")
+        self.log(f"Sending CONTINUE ({reason})")
+        print(f"Current pages: {self.state.progress} / {self.config.target_pages}")
+        print(f"{'=' * 50}\n")
+        print("continue")
+        sys.stdout.flush()
+        if self.config.signal_file:
+            with open(self.config.signal_file, 'w') as f:
+                f.write('continue')
+
+    async def detect_stalls(self):
+        """Count stall periods and send continue after max_stalls"""
+        while True:
+            idle = time.time() - self.state.last_progress_at
+            next_stall = self.config.stall_seconds * (self.state.stall_count + 1)
+            if idle < next_stall:
+                await asyncio.sleep(next_stall - idle)
+                continue
+            self.state.stall_count += 1
+            self.log(f"No progress for {int(idle)}s (stall #{self.state.stall_count})")
+            if self.state.stall_count >= self.config.max_stalls:
+                self.send_continue(f"{self.state.stall_count} stalls")
+                self.state.stall_count = 0
+                self.state.last_progress_at = time.time()
+                await asyncio.sleep(self.config.continue_cooldown)
+
+    async def continue_on_timer(self):
+        """simple_continue.py behaviour, if configured"""
+        while True:
+            await asyncio.sleep(self.config.continue_every)
+            self.send_continue(f"every {self.config.continue_every:g}s")
+
+    # -- status endpoint --------------------------------------------------
+
+    async def _handle_status(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+            if path in ('/', '/status'):
+                status, body = '200 OK', self.state.snapshot(self.config)
+            elif path == '/config':
+                status, body = '200 OK', self.config.to_dict()
+            else:
+                status, body = '404 Not Found', {'error': 'not found'}
+            payload = json.dumps(body, indent=2).encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode()
+                         + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # -- lifecycle --------------------------------------------------------
+
+    async def run(self):
+        config = self.config
+        server = await asyncio.start_server(self._handle_status,
+                                            config.status_host, config.status_port)
+        self.log(f"Continue daemon started: {self.state.progress} / {config.target_pages} pages")
+        self.log(f"Watching {config.index_file}, probing {self.probe.base_url} "
+                 f"every {config.probe_interval:g}s")
+        self.log(f"Status: http://{config.status_host}:{config.status_port}/status")
+
+        tasks = [asyncio.create_task(coro) for coro in (
+            self.watch_file(), self.probe_deployment(), self.detect_stalls()
+        )]
+        if config.continue_every > 0:
+            tasks.append(asyncio.create_task(self.continue_on_timer()))
+        if self.state.progress >= config.target_pages:
+            self.done.set()
+
+        try:
+            done_wait = asyncio.create_task(self.done.wait())
+            finished, _ = await asyncio.wait(tasks + [done_wait],
+                                             return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task is not done_wait and task.exception():
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            server.close()
+            await server.wait_closed()
+            self.monitor.close()
+            self.probe.close()
+
+
+def parse_args(argv: List[str]) -> Config:
+    args = list(argv)
+    options: Dict[str, Any] = {}
+    config_path = None
+    flags = {'--index': ('index_file', str), '--target': ('target_pages', int),
+             '--port': ('status_port', int), '--base-url': ('base_url', str),
+             '--config': (None, str)}
+    for flag, (name, cast) in flags.items():
+        if flag in args:
+            i = args.index(flag)
+            value = cast(args[i + 1])
+            del args[i:i + 2]
+            if name is None:
+                config_path = value
+            else:
+                options[name] = value
+    if config_path:
+        return Config.from_file(config_path, **options)
+    return Config(**options)
+
+
+def main(argv: List[str]) -> None:
+    daemon = ContinueDaemon(parse_args(argv))
+    try:
+        asyncio.run(daemon.run())
+    except KeyboardInterrupt:
+        print(f"\nDaemon stopped. Final count: {daemon.state.progress}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Multi-source keyword corpus merge.
+Parses every keyword source in the repo concurrently in a process pool,
+normalizes and deduplicates them with a hash-based merge and writes the
+unified corpus together with per-source provenance and overlap stats.
+
+Usage:
+    python corpus_merge.py [-o merged-keywords.json] [--workers N] [source ...]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+from keyword_stream import iter_keywords
+
+# Listed in priority order: the first source a keyword appears in provides
+# its display form and its position in the merged corpus.
+DEFAULT_SOURCES = [
+    'src/index.js',
+    'src/index-from-git.js',
+    'src/index-simple.js',
+    'keywords_max.js',
+    'actual-current-keywords.json',
+    'extracted-keywords.json',
+]
+DEFAULT_OUTPUT = 'merged-keywords.json'
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Case-, width- and whitespace-insensitive form used for deduplication"""
+    keyword = unicodedata.normalize('NFKC', keyword)
+    return _WHITESPACE.sub(' ', keyword).strip().casefold()
+
+
+def keyword_digest(normalized: str) -> int:
+    """64-bit hash of a normalized keyword"""
+    return int.from_bytes(
+        hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'big'
+    )
+
+
+def iter_source(path: str) -> Iterator[str]:
+    """Keywords of a JS getAllKeywords() file or a JSON export"""
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        keywords = data.get('keywords', []) if isinstance(data, dict) else data
+        return (k for k in keywords if isinstance(k, str))
+    return iter_keywords(path)
+
+
+def read_source(path: str) -> List[str]:
+    return list(iter_source(path))
+
+
+def _parse_source(path: str) -> Tuple[str, List[Tuple[int, str, str]], float]:
+    """Worker: parse, normalize and hash one source"""
+    started = time.perf_counter()
+    entries = []
+    for keyword in iter_source(path):
+        normalized = normalize_keyword(keyword)
+        if normalized:
+            entries.append((keyword_digest(normalized), normalized, keyword))
+    return path, entries, time.perf_counter() - started
+
+
+class CorpusMerge:
+    """Hash-based union of several keyword sources"""
+
+    def __init__(self, sources: List[str]):
+        self.sources = sources
+        # digest -> [display keyword, normalized keyword, source bitmask]
+        self.entries: Dict[int, List[Any]] = {}
+        self.order: List[int] = []
+        self.source_stats: Dict[str, Dict[str, Any]] = {}
+        self.collisions = 0
+        self.collided: Dict[str, int] = {}
+        self._overlap: Dict[str, Dict[str, int]] = {}
+
+    def run(self, workers: int = 0) -> 'CorpusMerge':
+        """Parse all sources in a process pool and merge them"""
+        workers = workers or min(len(self.sources), os.cpu_count() or 1)
+        parsed = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path, entries, seconds in pool.map(_parse_source, self.sources):
+                parsed[path] = (entries, seconds)
+
+        # Merge in priority order so the result does not depend on timing
+        for bit, path in enumerate(self.sources):
+            entries, seconds = parsed[path]
+            self._merge(bit, path, entries, seconds)
+        return self
+
+    def _merge(self, bit: int, path: str, entries: List[Tuple[int, str, str]],
+               seconds: float):
+        mask = 1 << bit
+        seen = set()
+        for digest, normalized, keyword in entries:
+            entry = self.entries.get(digest)
+            if entry is not None and entry[1] != normalized:
+                digest = self._resolve_collision(normalized)
+                entry = self.entries.get(digest)
+            if entry is None:
+                self.entries[digest] = [keyword, normalized, mask]
+                self.order.append(digest)
+            else:
+                entry[2] |= mask
+            seen.add(digest)
+
+        self.source_stats[path] = {
+            'parsed': len(entries),
+            'unique': len(seen),
+            'duplicates_within': len(entries) - len(seen),
+            'parse_seconds': round(seconds, 3),
+        }
+
+    def _resolve_collision(self, normalized: str) -> int:
+        """Re-key a keyword whose 64-bit hash is already taken"""
+        if normalized not in self.collided:
+            self.collisions += 1
+            self.collided[normalized] = keyword_digest(f"{self.collisions}\0{normalized}")
+        return self.collided[normalized]
+
+    def keywords(self) -> List[str]:
+        return [self.entries[d][0] for d in self.order]
+
+    def provenance(self) -> List[int]:
+        return [self.entries[d][2] for d in self.order]
+
+    def overlap(self) -> Dict[str, Dict[str, int]]:
+        """Pairwise shared-keyword counts (diagonal = unique per source)"""
+        if self._overlap:
+            return self._overlap
+        counts = [[0] * len(self.sources) for _ in self.sources]
+        exclusive = [0] * len(self.sources)
+        bits = range(len(self.sources))
+        for _, _, mask in self.entries.values():
+            members = [b for b in bits if mask >> b & 1]
+            for a in members:
+                for b in members:
+                    counts[a][b] += 1
+            if len(members) == 1:
+                exclusive[members[0]] += 1
+        for bit, path in enumerate(self.sources):
+            self.source_stats[path]['exclusive'] = exclusive[bit]
+        self._overlap = {a: {b: counts[i][j] for j, b in enumerate(self.sources)}
+                         for i, a in enumerate(self.sources)}
+        return self._overlap
+
+    def write(self, output_path: str):
+        overlap = self.overlap()
+        result = {
+            'total': len(self.order),
+            'generatedAt': datetime.now().isoformat(),
+            'sources': self.sources,
+            'sourceStats': self.source_stats,
+            'overlap': overlap,
+            'hashCollisions': self.collisions,
+            'keywords': self.keywords(),
+            # Bit i set = keyword present in sources[i]
+            'provenance': self.provenance(),
+        }
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f, indent=1)
+        os.replace(tmp_path, output_path)
+
+
+def print_report(merge: CorpusMerge, seconds: float):
+    overlap = merge.overlap()
+    print(f"Merged corpus: {len(merge.order)} unique keywords from "
+          f"{len(merge.sources)} sources in {seconds:.2f}s")
+    print("-" * 78)
+    print(f"{'source':<32}{'parsed':>9}{'unique':>9}{'dupes':>8}{'exclusive':>11}{'secs':>8}")
+    for path in merge.sources:
+        s = merge.source_stats[path]
+        print(f"{path:<32}{s['parsed']:>9}{s['unique']:>9}{s['duplicates_within']:>8}"
+              f"{s['exclusive']:>11}{s['parse_seconds']:>8.2f}")
+
+    print("\nOverlap (shared keywords, % of row source):")
+    for i, a in enumerate(merge.sources):
+        row = overlap[a]
+        cells = []
+        for j, b in enumerate(merge.sources):
+            if i == j or not row[a]:
+                continue
+            if row[b]:
+                cells.append(f"{os.path.basename(b)} {row[b]} ({row[b] / row[a] * 100:.0f}%)")
+        print(f"  {a}: {', '.join(cells) or 'no overlap'}")
+    if merge.collisions:
+        print(f"\nHash collisions resolved: {merge.collisions}")
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    output = DEFAULT_OUTPUT
+    workers = 0
+    if '-o' in args:
+        i = args.index('-o')
+        output = args[i + 1]
+        del args[i:i + 2]
+    if '--workers' in args:
+        i = args.index('--workers')
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    sources = [s for s in (args or DEFAULT_SOURCES) if os.path.exists(s)]
+    if not sources:
+        print("No keyword sources found.")
+        return
+
+    started = time.perf_counter()
+    merge = CorpusMerge(sources).run(workers)
+    merge.write(output)
+    print_report(merge, time.perf_counter() - started)
+    print(f"\nWrote {output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
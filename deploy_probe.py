@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Deployment probe for the live worker.
+Reads the "Page N of M" footer of a deployed page over a pooled keep-alive
+HTTP connection, with timeouts and ETag/If-Modified-Since revalidation, and
+stops reading the body as soon as the marker has been seen.
+
+Usage:
+    python deploy_probe.py [page_number] [--base-url URL]
+    python deploy_probe.py --benchmark [requests]
+
+The base URL defaults to $DEPLOY_BASE_URL or the production worker.
+"""
+
+import http.client
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = 'https://petinsurance.catsluvusboardinghotel.workers.dev'
+STATIC_PAGES = 3  # Pages counted in "of M" that are not keyword pages
+DEFAULT_TIMEOUT = 10.0
+READ_CHUNK = 8 * 1024
+READ_LIMIT = 2 * 1024 * 1024
+DRAIN_LIMIT = 64 * 1024  # Finish reading bodies up to this size to keep the connection
+
+_PAGE_MARKER = re.compile(rb'Page (\d+) of (\d+)')
+_MARKER_OVERLAP = 64
+
+
+class ProbeResult:
+    """Outcome of one deployment probe"""
+
+    def __init__(self, url: str, status: int, page: Optional[int] = None,
+                 total: Optional[int] = None, bytes_read: int = 0,
+                 seconds: float = 0.0, not_modified: bool = False):
+        self.url = url
+        self.status = status
+        self.page = page
+        self.total = total
+        self.bytes_read = bytes_read
+        self.seconds = seconds
+        self.not_modified = not_modified
+
+    @property
+    def deployed_pages(self) -> int:
+        """Keyword pages live on the site (0 when the marker was not found)"""
+        return self.total - STATIC_PAGES if self.total else 0
+
+
+class DeploymentProbe:
+    """Reusable HTTP client for "Page N of M" checks"""
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 read_limit: int = READ_LIMIT):
+        self.base_url = (base_url or os.environ.get('DEPLOY_BASE_URL')
+                         or DEFAULT_BASE_URL).rstrip('/')
+        parts = urlsplit(self.base_url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError(f"Unsupported base URL: {self.base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path
+        self.timeout = timeout
+        self.read_limit = read_limit
+
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self._lock = threading.Lock()
+        # path -> (etag, last-modified, result) for conditional requests
+        self._validators: Dict[str, Tuple[Optional[str], Optional[str], ProbeResult]] = {}
+        self.stats = {'requests': 0, 'connections': 0, 'not_modified': 0,
+                      'early_stops': 0, 'bytes_read': 0}
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            conn_class = (http.client.HTTPSConnection if self.scheme == 'https'
+                          else http.client.HTTPConnection)
+            self._conn = conn_class(self.host, self.port, timeout=self.timeout)
+            self.stats['connections'] += 1
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self) -> 'DeploymentProbe':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, path: str, headers: Dict[str, str]) -> http.client.HTTPResponse:
+        """GET on the pooled connection, reconnecting once if the server dropped it"""
+        for attempt in (1, 2):
+            conn = self._connection()
+            try:
+                conn.request('GET', path, headers=headers)
+                return conn.getresponse()
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                    http.client.ResponseNotReady, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt == 2:
+                    raise
+            except Exception:
+                self.close()
+                raise
+
+    def probe(self, page_number: int) -> ProbeResult:
+        """Fetch /page/{page_number} until its "Page N of M" marker"""
+        path = f"{self.prefix}/page/{page_number}"
+        headers = {
+            'Accept': 'text/html',
+            'Accept-Encoding': 'identity',
+            'User-Agent': 'deploy-probe/1.0',
+        }
+        cached = self._validators.get(path)
+        if cached:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        with self._lock:
+            started = time.perf_counter()
+            response = self._request(path, headers)
+            self.stats['requests'] += 1
+
+            if response.status == 304 and cached:
+                response.read()
+                self.stats['not_modified'] += 1
+                previous = cached[2]
+                return ProbeResult(previous.url, 304, previous.page, previous.total,
+                                   0, time.perf_counter() - started, not_modified=True)
+
+            match, bytes_read = self._read_marker(response)
+            result = ProbeResult(self.base_url + path, response.status,
+                                 int(match.group(1)) if match else None,
+                                 int(match.group(2)) if match else None,
+                                 bytes_read, time.perf_counter() - started)
+            self._finish(response)
+
+        etag, last_modified = response.getheader('ETag'), response.getheader('Last-Modified')
+        if response.status == 200 and match and (etag or last_modified):
+            self._validators[path] = (etag, last_modified, result)
+        return result
+
+    def _read_marker(self, response: http.client.HTTPResponse) -> Tuple[Optional['re.Match'], int]:
+        """Read the body in chunks until the marker appears"""
+        window = b''
+        bytes_read = 0
+        while bytes_read < self.read_limit:
+            chunk = response.read1(READ_CHUNK)
+            if not chunk:
+                break
+            bytes_read += len(chunk)
+            window = window[-_MARKER_OVERLAP:] + chunk
+            match = _PAGE_MARKER.search(window)
+            if match:
+                self.stats['bytes_read'] += bytes_read
+                return match, bytes_read
+        self.stats['bytes_read'] += bytes_read
+        return None, bytes_read
+
+    def _finish(self, response: http.client.HTTPResponse):
+        """Keep the connection when the rest of the body is small, else drop it"""
+        if response.isclosed():
+            return
+        remaining = response.length
+        if remaining is not None and remaining <= DRAIN_LIMIT:
+            response.read()
+            return
+        self.stats['early_stops'] += 1
+        self.close()
+
+    def deployed_pages(self, page_number: int) -> int:
+        """Keyword pages live on the site, or 0 if the check fails"""
+        try:
+            return self.probe(page_number).deployed_pages
+        except (OSError, http.client.HTTPException) as e:
+            print(f"Error checking deployment: {e}")
+            return 0
+
+
+# -- local benchmark ------------------------------------------------------
+
+def run_stub_server(total_pages: int, body_kb: int):
+    """Local keep-alive server that renders pages like the worker does"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    filler = b'<p>' + b'x' * 1021 + b'</p>'
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            match = re.match(r'/page/(\d+)$', self.path)
+            if not match or not 1 <= int(match.group(1)) <= total_pages:
+                self.send_error(404)
+                return
+            etag = f'"v{total_pages}-{match.group(1)}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = (b'<html><body><span>Page ' + match.group(1).encode() + b' of '
+                    + str(total_pages).encode() + b'</span>' + filler * body_kb
+                    + b'</body></html>')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        def handle_error(self, request, client_address):
+            pass  # Probes hang up mid-body on purpose
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark(requests: int = 50, body_kb: int = 300):
+    server = run_stub_server(total_pages=2052, body_kb=body_kb)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Benchmark: {requests} probes of a {body_kb} KB page on {base_url}")
+    print("-" * 64)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        result = subprocess.run(['curl', '-s', f'{base_url}/page/2049'],
+                                capture_output=True, text=True)
+        re.search(r'Page \d+ of (\d+)', result.stdout)
+    curl_seconds = time.perf_counter() - started
+    print(f"{'curl subprocess + full body':<34}{curl_seconds / requests * 1000:>10.2f} ms/probe")
+
+    for label, conditional in (('probe (early stop)', False), ('probe (ETag revalidation)', True)):
+        with DeploymentProbe(base_url) as probe:
+            probe.probe(2049)
+            started = time.perf_counter()
+            for _ in range(requests):
+                if not conditional:
+                    probe._validators.clear()
+                result = probe.probe(2049)
+            seconds = time.perf_counter() - started
+            print(f"{label:<34}{seconds / requests * 1000:>10.2f} ms/probe"
+                  f"  (deployed {result.deployed_pages}, connections {probe.stats['connections']},"
+                  f" 304s {probe.stats['not_modified']})")
+    server.shutdown()
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    base_url = None
+    if '--base-url' in args:
+        i = args.index('--base-url')
+        base_url = args[i + 1]
+        del args[i:i + 2]
+    if args and args[0] == '--benchmark':
+        benchmark(int(args[1]) if len(args) > 1 else 50)
+        return
+
+    page_number = int(args[0]) if args else 2049
+    with DeploymentProbe(base_url) as probe:
+        result = probe.probe(page_number)
+    print(f"{result.url}: HTTP {result.status} in {result.seconds * 1000:.0f} ms, "
+          f"read {result.bytes_read} bytes")
+    if result.total:
+        print(f"Page {result.page} of {result.total} ({result.deployed_pages} keyword pages deployed)")
+    else:
+        print("No 'Page N of M' marker found")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
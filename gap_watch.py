@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Incremental keyword gap analysis with a watch mode.
+Keeps a snapshot of the last analysed corpus, computes the added/removed
+keyword delta on every change to src/index.js and only re-evaluates the
+gap candidates and phrase counts that the delta touches.
+
+Usage:
+    python gap_watch.py            # report changes since the last snapshot
+    python gap_watch.py --watch    # report every change as it is written
+    python gap_watch.py --full     # ignore the snapshot and rescan
+    python gap_watch.py --index merged-keywords.json   # run against the union
+    python gap_watch.py --fuzzy    # also list gaps that are typos of corpus keywords
+"""
+
+import ast
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Set, Tuple
+
+from change_monitor import FileChangeWatcher
+from corpus_merge import iter_source
+from google_ads_tracker import canonical_keyword
+from spell_index import SpellIndex
+
+INDEX_FILE = 'src/index.js'
+SNAPSHOT_FILE = '.gap_snapshot.json'
+
+# Candidate dictionaries ({category: [keywords]}) defined by each gap script
+GAP_SOURCES = {
+    'keyword_gaps_analysis.py': ('all_test_keywords',),
+    'extended_gap_analysis.py': ('additional_gaps', 'patterns_to_check'),
+    'deep_keyword_mining.py': ('deep_patterns',),
+    'ultra_high_value_gaps.py': ('ultra_patterns',),
+    'final_opportunity_scan.py': ('final_opportunities',),
+    'ultimate_keyword_scan.py': ('ultimate_patterns',),
+    'voice_search_analysis.py': ('voice_patterns',),
+}
+
+# Phrase counts reported by deep_keyword_mining.py
+QUESTION_WORDS = ['what', 'when', 'where', 'why', 'how', 'which', 'who', 'whose', 'whom']
+VALUE_PHRASES = ['immediately', 'instant', 'today', 'now', 'emergency', 'urgent', 'asap', 'quickly']
+
+GapKey = Tuple[str, str]  # (script, category)
+
+
+def _module_literals(tree: ast.Module) -> Dict[str, ast.AST]:
+    """Map top-level variable names to their assigned expressions"""
+    values = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name):
+            values[node.targets[0].id] = node.value
+    return values
+
+
+def load_gap_candidates(base_dir: str = '.') -> Dict[GapKey, List[str]]:
+    """
+    Read the candidate keyword lists out of the gap scripts without running
+    them (they print their reports at import time).
+    """
+    candidates: Dict[GapKey, List[str]] = {}
+    for script, names in GAP_SOURCES.items():
+        path = os.path.join(base_dir, script)
+        if not os.path.exists(path):
+            continue
+        with open(path, 'r') as f:
+            literals = _module_literals(ast.parse(f.read(), path))
+
+        for name in names:
+            node = literals.get(name)
+            if not isinstance(node, ast.Dict):
+                continue
+            for key, value in zip(node.keys, node.values):
+                if isinstance(value, ast.Name):
+                    # keyword_gaps_analysis.py maps categories to list variables
+                    value = literals.get(value.id)
+                try:
+                    category = ast.literal_eval(key)
+                    keywords = ast.literal_eval(value)
+                except (ValueError, TypeError, SyntaxError):
+                    continue
+                if isinstance(keywords, list) and keywords:
+                    candidates[(script, category)] = [str(k) for k in keywords]
+    return candidates
+
+
+def read_corpus(path: str = INDEX_FILE) -> Counter:
+    """
+    Lower-cased keyword multiset, matching the gap scripts' existing_keywords.
+    ``path`` may also be a merged corpus written by corpus_merge.py.
+    """
+    return Counter(keyword.lower() for keyword in iter_source(path))
+
+
+def phrase_counts(keywords: Counter) -> Dict[str, int]:
+    """Question-word and value-phrase counts for a (delta) multiset"""
+    counts = {f"starts:{qw}": 0 for qw in QUESTION_WORDS}
+    counts.update({f"contains:{phrase}": 0 for phrase in VALUE_PHRASES})
+    for keyword, n in keywords.items():
+        for qw in QUESTION_WORDS:
+            if keyword.startswith(qw):
+                counts[f"starts:{qw}"] += n
+        for phrase in VALUE_PHRASES:
+            if phrase in keyword:
+                counts[f"contains:{phrase}"] += n
+    return counts
+
+
+class GapDelta:
+    """Changes produced by one incremental update"""
+
+    def __init__(self):
+        self.added: Counter = Counter()
+        self.removed: Counter = Counter()
+        self.filled: Dict[GapKey, List[str]] = {}
+        self.reopened: Dict[GapKey, List[str]] = {}
+        self.phrases: Dict[str, Tuple[int, int]] = {}
+
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed)
+
+
+class IncrementalGapAnalysis:
+    """Gap results that are kept up to date from corpus deltas"""
+
+    def __init__(self, candidates: Dict[GapKey, List[str]],
+                 snapshot_path: str = SNAPSHOT_FILE):
+        self.candidates = candidates
+        self.snapshot_path = snapshot_path
+        self.corpus: Counter = Counter()
+        self.phrases = phrase_counts(Counter())
+        self.missing: Dict[GapKey, Set[str]] = {}
+
+        # Reverse index so a delta keyword finds its gap entries directly
+        self.candidate_index: Dict[str, List[GapKey]] = {}
+        for gap_key, keywords in candidates.items():
+            for keyword in keywords:
+                self.candidate_index.setdefault(keyword.lower(), []).append(gap_key)
+        self._evaluate_all()
+
+    def _evaluate_all(self):
+        self.missing = {
+            gap_key: {k for k in keywords if k.lower() not in self.corpus}
+            for gap_key, keywords in self.candidates.items()
+        }
+
+    def load_snapshot(self) -> bool:
+        """Restore the corpus and phrase counts from the last run"""
+        try:
+            with open(self.snapshot_path, 'r') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self.corpus = Counter(snapshot.get('keywords', {}))
+        self.phrases = phrase_counts(Counter())
+        self.phrases.update(snapshot.get('phrases', {}))
+        self._evaluate_all()
+        return True
+
+    def save_snapshot(self):
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'saved_at': datetime.now().isoformat(),
+                'keywords': self.corpus,
+                'phrases': self.phrases,
+            }, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def update(self, corpus: Counter) -> GapDelta:
+        """Apply a new corpus and return what changed"""
+        delta = GapDelta()
+        delta.added = corpus - self.corpus
+        delta.removed = self.corpus - corpus
+        if delta.is_empty():
+            return delta
+
+        touched = set(delta.added) | set(delta.removed)
+        self.corpus = corpus
+
+        # Phrase counts move by the delta only
+        before = dict(self.phrases)
+        for name, n in phrase_counts(delta.added).items():
+            self.phrases[name] += n
+        for name, n in phrase_counts(delta.removed).items():
+            self.phrases[name] -= n
+        delta.phrases = {name: (before[name], count)
+                         for name, count in self.phrases.items()
+                         if before[name] != count}
+
+        # Re-evaluate only the gap entries that mention a touched keyword
+        for keyword in touched:
+            for gap_key in self.candidate_index.get(keyword, ()):
+                for candidate in self.candidates[gap_key]:
+                    if candidate.lower() != keyword:
+                        continue
+                    present = keyword in corpus
+                    if present and candidate in self.missing[gap_key]:
+                        self.missing[gap_key].discard(candidate)
+                        delta.filled.setdefault(gap_key, []).append(candidate)
+                    elif not present and candidate not in self.missing[gap_key]:
+                        self.missing[gap_key].add(candidate)
+                        delta.reopened.setdefault(gap_key, []).append(candidate)
+        return delta
+
+    def total_missing(self) -> int:
+        return sum(len(missing) for missing in self.missing.values())
+
+
+def misspelled_gaps(analysis: IncrementalGapAnalysis) -> Dict[GapKey, List[Tuple[str, str]]]:
+    """
+    Missing candidates that spelling correction against the corpus tokens
+    turns into an existing keyword: (candidate, corpus keyword) per gap
+    """
+    spelling = SpellIndex.from_keywords(analysis.corpus)
+    existing = {canonical_keyword(keyword) for keyword in analysis.corpus}
+    found: Dict[GapKey, List[Tuple[str, str]]] = {}
+    for gap_key, missing in sorted(analysis.missing.items()):
+        for candidate in sorted(missing):
+            corrected = spelling.correct(candidate)
+            if corrected in existing and corrected != canonical_keyword(candidate):
+                found.setdefault(gap_key, []).append((candidate, corrected))
+    return found
+
+
+def print_delta(delta: GapDelta, analysis: IncrementalGapAnalysis):
+    timestamp = datetime.now().strftime('%H:%M:%S')
+    added, removed = sum(delta.added.values()), sum(delta.removed.values())
+    print(f"[{timestamp}] Corpus: {sum(analysis.corpus.values())} keywords "
+          f"(+{added} / -{removed})")
+
+    for label, changes in (('FILLED', delta.filled), ('REOPENED', delta.reopened)):
+        for (script, category), keywords in sorted(changes.items()):
+            print(f"  {label} {category} [{script}] "
+                  f"({len(analysis.missing[(script, category)])} still missing):")
+            for keyword in keywords:
+                print(f"    - {keyword}")
+
+    for name, (old, new) in sorted(delta.phrases.items()):
+        kind, phrase = name.split(':', 1)
+        label = f"{phrase.capitalize()} questions" if kind == 'starts' else f"'{phrase}' keywords"
+        print(f"  {label}: {old} → {new}")
+
+    print(f"  Total gaps remaining: {analysis.total_missing()}")
+
+
+def watch(analysis: IncrementalGapAnalysis, index_path: str = INDEX_FILE,
+          interval: float = 1.0):
+    """Re-run the delta whenever the index file changes"""
+    watcher = FileChangeWatcher(index_path, poll_interval=interval)
+    mode = 'inotify' if watcher.uses_inotify else f'polling every {interval}s'
+    print(f"Watching {index_path} ({mode}, Ctrl+C to stop)")
+    try:
+        while True:
+            watcher.wait()
+            try:
+                corpus = read_corpus(index_path)
+            except (OSError, ValueError) as e:
+                # Editors write in several steps; retry on the next change
+                print(f"Skipping unreadable index: {e}")
+                continue
+            delta = analysis.update(corpus)
+            if not delta.is_empty():
+                print_delta(delta, analysis)
+                analysis.save_snapshot()
+    finally:
+        watcher.close()
+
+
+def main(argv: Iterable[str]) -> None:
+    args = list(argv)
+    index_path = INDEX_FILE
+    if '--index' in args:
+        index_path = args[args.index('--index') + 1]
+
+    started = time.perf_counter()
+    analysis = IncrementalGapAnalysis(load_gap_candidates())
+    has_snapshot = '--full' not in args and analysis.load_snapshot()
+    delta = analysis.update(read_corpus(index_path))
+
+    if has_snapshot:
+        if delta.is_empty():
+            print("No keyword changes since the last snapshot.")
+        else:
+            print_delta(delta, analysis)
+    else:
+        print(f"Full scan: {sum(analysis.corpus.values())} keywords, "
+              f"{len(analysis.candidates)} gap categories, "
+              f"{analysis.total_missing()} gaps remaining")
+    analysis.save_snapshot()
+    print(f"({time.perf_counter() - started:.2f}s)")
+
+    if '--fuzzy' in args:
+        started = time.perf_counter()
+        found = misspelled_gaps(analysis)
+        print(f"Gaps matching a corpus keyword after spelling correction: "
+              f"{sum(len(pairs) for pairs in found.values())} "
+              f"({time.perf_counter() - started:.2f}s)")
+        for (script, category), pairs in found.items():
+            print(f"  {category} [{script}]:")
+            for candidate, corrected in pairs:
+                print(f"    - {candidate} → {corrected}")
+
+    if '--watch' in args:
+        try:
+            watch(analysis, index_path)
+        except KeyboardInterrupt:
+            print("\nWatch stopped.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Bloom filter of seen GCLIDs for click deduplication.
+save_click_data uses it to send clicks with a new GCLID straight to INSERT
+and probable repeats (reloads, back-button hits) straight to UPDATE,
+instead of trying an INSERT and catching the UNIQUE violation. The filter is
+saved next to the database on shutdown and caught up from click_data rows
+added since, or rebuilt from the table when the saved copy is unusable.
+
+Usage:
+    python gclid_bloom.py --benchmark [clicks]
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import struct
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+MAGIC = b'GCLIDBF1'
+DEFAULT_CAPACITY = 1000000
+DEFAULT_ERROR_RATE = 0.001
+
+# magic, bit count, hash count, capacity, items added, click_data id watermark
+_HEADER = struct.Struct('<8sQIQQQ')
+
+
+class BloomFilter:
+    """Plain bit-array Bloom filter with double hashing"""
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _hashes(self, item: str) -> Tuple[int, int]:
+        digest = int.from_bytes(
+            hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest(), 'little'
+        )
+        return digest & 0xFFFFFFFFFFFFFFFF, (digest >> 64) | 1
+
+    def add(self, item: str):
+        h1, h2 = self._hashes(item)
+        bits, size = self.bits, self.size
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        # Inlined probe loop: this runs on every tracked click
+        h1, h2 = self._hashes(item)
+        bits, size = self.bits, self.size
+        for i in range(self.hash_count):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def expected_error_rate(self) -> float:
+        """False-positive probability at the current fill"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class GclidBloomIndex:
+    """Persistent Bloom filter over click_data.gclid"""
+
+    def __init__(self, db_path: str, capacity: int = DEFAULT_CAPACITY,
+                 error_rate: float = DEFAULT_ERROR_RATE, filter_path: Optional[str] = None):
+        self.db_path = db_path
+        self.filter_path = filter_path or db_path + '.gclid-bloom'
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.watermark = 0  # Highest click_data id already in the filter
+        self.stats = {'new': 0, 'probable_duplicates': 0, 'false_positives': 0,
+                      'rebuilds': 0, 'caught_up': 0}
+        if not self._load():
+            self.rebuild()
+        else:
+            self._catch_up()
+
+    def _load(self) -> bool:
+        try:
+            with open(self.filter_path, 'rb') as f:
+                header = f.read(_HEADER.size)
+                magic, size, hash_count, capacity, count, watermark = _HEADER.unpack(header)
+                bits = f.read()
+        except (OSError, struct.error):
+            return False
+        if magic != MAGIC or len(bits) != (size + 7) // 8:
+            return False
+        if watermark > self._max_id():
+            return False  # Table was truncated or replaced since the save
+        self.bloom.size, self.bloom.hash_count, self.bloom.capacity = size, hash_count, capacity
+        self.bloom.bits = bytearray(bits)
+        self.bloom.count = count
+        self.watermark = watermark
+        return True
+
+    def save(self):
+        """Write the filter next to the database (call on shutdown)"""
+        tmp_path = self.filter_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, self.bloom.size, self.bloom.hash_count,
+                                 self.bloom.capacity, self.bloom.count, self.watermark))
+            f.write(self.bloom.bits)
+        os.replace(tmp_path, self.filter_path)
+
+    def _query(self, sql: str, params=()):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError:
+            return []  # No click_data table yet
+        finally:
+            conn.close()
+
+    def _max_id(self) -> int:
+        rows = self._query("SELECT COALESCE(MAX(id), 0) FROM click_data")
+        return rows[0][0] if rows else 0
+
+    def _catch_up(self):
+        """Add GCLIDs of rows written after the filter was saved"""
+        rows = self._query(
+            "SELECT id, gclid FROM click_data WHERE id > ? AND gclid IS NOT NULL ORDER BY id",
+            (self.watermark,)
+        )
+        for row_id, gclid in rows:
+            self.bloom.add(gclid)
+            self.watermark = row_id
+        self.stats['caught_up'] += len(rows)
+        self._grow_if_full()
+
+    def rebuild(self):
+        """Re-create the filter from every GCLID in click_data"""
+        rows = self._query("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM click_data")
+        total, max_id = rows[0] if rows else (0, 0)
+        capacity = max(self.bloom.capacity, total * 2)
+        self.bloom = BloomFilter(capacity, self.error_rate)
+        for (gclid,) in self._query("SELECT gclid FROM click_data WHERE gclid IS NOT NULL"):
+            self.bloom.add(gclid)
+        self.watermark = max_id
+        self.stats['rebuilds'] += 1
+
+    def _grow_if_full(self):
+        if self.bloom.count > self.bloom.capacity:
+            self.rebuild()
+
+    def probably_seen(self, gclid: str) -> bool:
+        seen = gclid in self.bloom
+        self.stats['probable_duplicates' if seen else 'new'] += 1
+        return seen
+
+    def record_insert(self, gclid: str, row_id: int):
+        self.bloom.add(gclid)
+        self.watermark = max(self.watermark, row_id)
+        self._grow_if_full()
+
+    def record_false_positive(self):
+        self.stats['false_positives'] += 1
+
+    def report(self) -> Dict[str, float]:
+        checks = self.stats['new'] + self.stats['probable_duplicates']
+        # Every new GCLID is either reported new or a false positive
+        new_gclids = self.stats['new'] + self.stats['false_positives']
+        return dict(self.stats,
+                    items=self.bloom.count,
+                    capacity=self.bloom.capacity,
+                    size_bytes=len(self.bloom.bits),
+                    hash_count=self.bloom.hash_count,
+                    checks=checks,
+                    observed_false_positive_rate=(self.stats['false_positives'] / new_gclids
+                                                  if new_gclids else 0.0),
+                    expected_false_positive_rate=self.bloom.expected_error_rate())
+
+
+def benchmark(clicks: int = 20000, duplicate_share: float = 0.3):
+    """Old INSERT-then-UPDATE path vs the Bloom fast path, plus the FP rate"""
+    import random
+    import tempfile
+    from web_app_integration import GoogleAdsWebIntegration
+
+    random.seed(3)
+    gclids = []
+    for i in range(clicks):
+        if gclids and random.random() < duplicate_share:
+            gclids.append(random.choice(gclids))
+        else:
+            gclids.append(f"Cj0KCQjw_{i:08d}")
+    request_info = {'ip_address': '10.0.0.1', 'user_agent': 'Mozilla/5.0'}
+
+    workdir = tempfile.mkdtemp()
+    print(f"Benchmark: {clicks} clicks, {duplicate_share:.0%} repeat GCLIDs")
+    for label, use_bloom in (('INSERT, catch IntegrityError, UPDATE', False),
+                             ('Bloom filter routing', True)):
+        db_path = os.path.join(workdir, f"clicks_{use_bloom}.db")
+        integration = GoogleAdsWebIntegration(db_path, gclid_bloom=use_bloom)
+        started = time.perf_counter()
+        for gclid in gclids:
+            integration.save_click_data({'keyword': 'cat insurance', 'gclid': gclid}, request_info)
+        seconds = time.perf_counter() - started
+        integration.close()
+        print(f"  {label:<40}{seconds / clicks * 1e6:>8.0f} µs/click")
+        if use_bloom:
+            report = integration.gclid_index.report()
+            print(f"    filter: {report['items']} GCLIDs, {report['size_bytes'] / 1024:.0f} KB, "
+                  f"{report['hash_count']} hashes, {report['false_positives']} false positives")
+
+    # The per-call connect and commit dominate above; this is the cost of
+    # the statements a repeat click needs on an open connection
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE click_data (id INTEGER PRIMARY KEY, gclid TEXT UNIQUE, "
+                 "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO click_data (gclid) VALUES ('repeat')")
+    bloom = BloomFilter(1000, DEFAULT_ERROR_RATE)
+    bloom.add('repeat')
+    rounds = 20000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        try:
+            conn.execute("INSERT INTO click_data (gclid) VALUES ('repeat')")
+        except sqlite3.IntegrityError:
+            conn.execute("UPDATE click_data SET timestamp = CURRENT_TIMESTAMP WHERE gclid = 'repeat'")
+    old_path = (time.perf_counter() - started) / rounds
+    started = time.perf_counter()
+    for _ in range(rounds):
+        if 'repeat' in bloom:
+            conn.execute("UPDATE click_data SET timestamp = CURRENT_TIMESTAMP WHERE gclid = 'repeat'")
+    new_path = (time.perf_counter() - started) / rounds
+    conn.close()
+    print(f"  repeat click statements: {old_path * 1e6:.1f} µs (INSERT + IntegrityError + UPDATE) "
+          f"vs {new_path * 1e6:.1f} µs (Bloom check + UPDATE)")
+
+    # Reload from disk: catch-up only, no rebuild
+    started = time.perf_counter()
+    index = GclidBloomIndex(os.path.join(workdir, 'clicks_True.db'))
+    print(f"  reload saved filter: {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"(rebuilds {index.stats['rebuilds']})")
+
+    # Empirical false-positive rate at the configured capacity
+    bloom = BloomFilter(100000, DEFAULT_ERROR_RATE)
+    for i in range(100000):
+        bloom.add(f"seen_{i}")
+    trials = 200000
+    false_positives = sum(1 for i in range(trials) if f"fresh_{i}" in bloom)
+    print(f"  false-positive rate at capacity: {false_positives / trials:.4%} measured, "
+          f"{bloom.expected_error_rate():.4%} expected, {DEFAULT_ERROR_RATE:.4%} configured")
+
+    for name in os.listdir(workdir):
+        os.remove(os.path.join(workdir, name))
+    os.rmdir(workdir)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 20000)
+    else:
+        print("Usage: python gclid_bloom.py --benchmark [clicks]")
@@ -2,18 +2,48 @@
 """
 Google Ads Click Data Processor for Cloudflare Workers
 Extracts and processes Google Ads UTM parameters and GCLID from URLs
+
+Usage:
+    python google_ads_tracker.py
+    python google_ads_tracker.py --replay [source] [requests]
 """
 
 import json
+import re
+import sys
+import unicodedata
 import urllib.parse
+from collections import OrderedDict
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Optional, Any
 
+CANONICAL_CACHE_SIZE = 65536  # Distinct raw utm_term values remembered
+
+# Characters of a utm_term that carry no intent: match-type brackets, quotes,
+# punctuation, and hyphens/apostrophes that are not inside a word
+_KEYWORD_NOISE = re.compile(r"[^\w\s'&-]|_|(?<!\w)['-]+|['-]+(?!\w)")
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=CANONICAL_CACHE_SIZE)
+def canonical_keyword(raw: str) -> Optional[str]:
+    """Canonical, interned form of a utm_term value; None if nothing is left"""
+    # Values still holding escapes were encoded twice ("blue%2Bwidgets")
+    if '%' in raw or '+' in raw:
+        raw = urllib.parse.unquote_plus(raw)
+    keyword = unicodedata.normalize('NFKC', raw).casefold()
+    keyword = _WHITESPACE.sub(' ', _KEYWORD_NOISE.sub(' ', keyword)).strip()
+    return sys.intern(keyword) if keyword else None
+
 
 class GoogleAdsDataProcessor:
     """Process Google Ads click data from URL parameters"""
     
-    def __init__(self):
+    def __init__(self, matcher=None):
+        # Optional keyword_matcher.KeywordMatcher: terms without a page of
+        # their own get the content of the closest corpus keyword
+        self.matcher = matcher
         self.utm_params = [
             'utm_source',
             'utm_medium', 
@@ -24,6 +54,15 @@ class GoogleAdsDataProcessor:
             'gclid'          # Google Click ID
         ]
         
+    def canonicalize_keyword(self, keyword: Optional[str]) -> Optional[str]:
+        """
+        Key for a keyword across its utm_term variants: decoded, case-folded,
+        whitespace-collapsed and stripped of punctuation. Equal keys are the
+        same interned string, so content caches and page_content rows are
+        shared by "Blue+Widgets", "blue%20widgets" and "[blue widgets]".
+        """
+        return canonical_keyword(keyword) if keyword else None
+    
     def extract_click_data(self, url: str) -> Dict[str, Any]:
         """Extract Google Ads data from URL parameters"""
         parsed_url = urllib.parse.urlparse(url)
@@ -49,7 +88,7 @@ class GoogleAdsDataProcessor:
                 
                 # Map to simplified fields
                 if param == 'utm_term':
-                    click_data['keyword'] = value
+                    click_data['keyword'] = self.canonicalize_keyword(value)
                 elif param == 'utm_campaign':
                     click_data['campaign'] = value
                 elif param == 'utm_source':
@@ -65,8 +104,11 @@ class GoogleAdsDataProcessor:
     
     def generate_dynamic_content(self, click_data: Dict[str, Any]) -> Dict[str, str]:
         """Generate dynamic content based on click data"""
-        keyword = click_data.get('keyword', '')
+        keyword = self.canonicalize_keyword(click_data.get('keyword'))
         campaign = click_data.get('campaign', '')
+        match = self.matcher.match(keyword) if self.matcher and keyword else None
+        if match:
+            keyword = self.canonicalize_keyword(match.keyword)
         
         # Generate personalized content
         content = {
@@ -76,6 +118,9 @@ class GoogleAdsDataProcessor:
             'meta_description': self._generate_meta_description(keyword),
             'body_text': self._generate_body_text(keyword, campaign)
         }
+        if match:
+            content['page_url'] = match.url
+            content['page_keyword'] = match.keyword
         
         return content
     
@@ -159,8 +204,77 @@ def process_request(url: str) -> str:
     return processor.format_for_cloudflare_worker(click_data, content)
 
 
+def _variant(keyword: str, rng) -> str:
+    """One of the spellings a keyword arrives as in utm_term, URL-encoded"""
+    words = keyword.split()
+    pick = rng.random()
+    if pick < 0.35:
+        return '+'.join(words)
+    if pick < 0.5:
+        return '%20'.join(words)
+    if pick < 0.6:
+        return '+'.join(word.title() for word in words)
+    if pick < 0.67:
+        return '+'.join(words).upper()
+    if pick < 0.75:
+        return '+'.join(words) + '%3F'
+    if pick < 0.82:
+        return '%22' + '+'.join(words) + '%22'
+    if pick < 0.88:
+        return '%5B' + '+'.join(words) + '%5D'
+    if pick < 0.94:
+        return '+' + '++'.join(words) + '+'
+    return '%252B'.join(words)
+
+
+def replay(source: str = 'src/index.js', requests: int = 200000, cache_size: int = 5000):
+    """Content cache hit rate on replayed traffic, keyed by raw vs canonical keyword"""
+    import random
+    import time
+    from corpus_merge import iter_source
+
+    rng = random.Random(45)
+    keywords = sorted({' '.join(k.split()).lower() for k in iter_source(source)})
+    rng.shuffle(keywords)
+    # Zipf-like popularity, as in real search-term reports
+    weights = [1 / (rank + 1) for rank in range(len(keywords))]
+    urls = [f"https://example.com/?utm_source=google&utm_medium=cpc&utm_term={_variant(k, rng)}"
+            for k in rng.choices(keywords, weights, k=requests)]
+    print(f"Replay: {requests:,} requests over {len(keywords):,} keywords from {source}, "
+          f"content cache of {cache_size:,} entries")
+
+    for label, canonical in (('raw utm_term', False), ('canonical key', True)):
+        processor = GoogleAdsDataProcessor()
+        canonical_keyword.cache_clear()
+        cache: 'OrderedDict[str, Dict[str, str]]' = OrderedDict()
+        hits = 0
+        distinct = set()
+        started = time.perf_counter()
+        for url in urls:
+            click_data = processor.extract_click_data(url)
+            # Previous behaviour: the decoded utm_term used as the key
+            key = click_data['keyword'] if canonical else click_data['all_params'].get('utm_term')
+            distinct.add(key)
+            if key in cache:
+                hits += 1
+                cache.move_to_end(key)
+                continue
+            cache[key] = processor.generate_dynamic_content(click_data)
+            if len(cache) > cache_size:
+                cache.popitem(last=False)
+        seconds = time.perf_counter() - started
+        print(f"  {label:<14} {len(distinct):>8,} cache keys / page_content rows, "
+              f"hit rate {hits / requests:6.1%}, {seconds / requests * 1e6:5.1f} µs per request")
+    print(f"  canonicalize cache: {canonical_keyword.cache_info()}")
+
+
 # Example usage and testing
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--replay':
+        replay(sys.argv[2] if len(sys.argv) > 2 else 'src/index.js',
+               int(sys.argv[3]) if len(sys.argv) > 3 else 200000)
+        sys.exit(0)
+    
     # Test URLs with Google Ads parameters
     test_urls = [
         "https://example.com/?utm_source=google&utm_medium=cpc&utm_campaign=summer_sale&utm_term=blue+widgets&utm_content=ad1&gclid=CjwKCAjw_test123",
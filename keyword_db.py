@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Keyword database loader and query API for database-schema.sql.
+Streams the parsed getAllKeywords() corpus into the `keywords` table with
+chunked executemany transactions, assigning page numbers from corpus order
+and a category from keyword rules, and exposes indexed lookups so scripts
+can query SQL instead of scanning the JS source.
+
+Usage:
+    python keyword_db.py load [source] [--db keywords.db]
+    python keyword_db.py page <page_number> [--db keywords.db]
+    python keyword_db.py category <slug> [--db keywords.db]
+    python keyword_db.py cpc <min> <max> [--db keywords.db]
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from corpus_merge import iter_source
+
+DEFAULT_DB = 'keywords.db'
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database-schema.sql')
+DEFAULT_CHUNK_SIZE = 5000
+GENERAL_CATEGORY_ID = 3
+
+# First match wins, so specialties come before the broad cat/dog buckets.
+# Ids refer to the categories inserted by database-schema.sql.
+CATEGORY_RULES: List[Tuple[int, 're.Pattern']] = [
+    (5, re.compile(r'\b(cancer|oncolog\w*|tumou?rs?|lymphoma|chemo\w*|radiation|\w*sarcoma|mast cell)\b')),
+    (7, re.compile(r'\b(heart|cardi\w*|murmur|arrhythmia)\b')),
+    (8, re.compile(r'\b(neuro\w*|seizures?|epilep\w*|spinal|ivdd|brain|intervertebral)\b')),
+    (12, re.compile(r'\b(dental|teeth|tooth|periodont\w*|gum disease)\b')),
+    (10, re.compile(r'\b(rehab\w*|physical therapy|hydrotherapy|physiotherapy)\b')),
+    (6, re.compile(r'\b(surgery|surgical|cruciate|acl|tplo|orthop(a)?edic|hip dysplasia|luxation)\b')),
+    (11, re.compile(r'\b(exotic|birds?|rabbits?|reptiles?|ferrets?|avian|guinea pigs?|hamsters?|parrots?)\b')),
+    (13, re.compile(r'\b(behaviou?r\w*|anxiety|training|aggression)\b')),
+    (9, re.compile(r'\b(luxury|concierge|premium pet|spa)\b')),
+    (4, re.compile(r'\b(emergency|urgent|24[- ]hour|er vet|poison\w*|trauma)\b')),
+    (1, re.compile(r'\b(cats?|kittens?|feline|persian|siamese|maine coon|ragdoll|bengal|sphynx'
+                   r'|british shorthair)\b')),
+    (2, re.compile(r'\b(dogs?|pupp(y|ies)|canine|retrievers?|shepherds?|bulldogs?|beagles?|poodles?'
+                   r'|labradors?|dachshunds?|terriers?|spaniels?|husk(y|ies)|boxers?|rottweilers?'
+                   r'|corgis?|pugs?|chihuahuas?|\w*doodles?)\b')),
+]
+
+
+def categorize(keyword: str) -> int:
+    """Category id for a keyword (General Pet Insurance when nothing matches)"""
+    lowered = keyword.lower()
+    for category_id, pattern in CATEGORY_RULES:
+        if pattern.search(lowered):
+            return category_id
+    return GENERAL_CATEGORY_ID
+
+
+class KeywordDatabase:
+    """Populate and query the keywords/categories schema"""
+
+    def __init__(self, db_path: str = DEFAULT_DB, schema_path: str = SCHEMA_FILE):
+        self.db_path = db_path
+        self.schema_path = schema_path
+        self._init_database()
+
+    def _init_database(self):
+        """Create the tables, indexes and categories from database-schema.sql"""
+        with open(self.schema_path, 'r') as f:
+            schema = f.read()
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(schema)
+        conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def load(self, keywords: Iterable[str],
+             chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        Load a corpus given in page order. Page N is the Nth keyword, so it
+        matches /page/N on the site. Keywords repeating an earlier
+        (keyword, category) pair are skipped, as the schema requires.
+        """
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        floor_cpc = dict(conn.execute("SELECT id, min_cpc FROM categories"))
+
+        # Stage the corpus first so the live table switches over in one
+        # short transaction and readers never see a half-loaded corpus.
+        conn.execute("DROP TABLE IF EXISTS temp.keywords_staging")
+        conn.execute("""
+            CREATE TEMP TABLE keywords_staging (
+                page_number INTEGER PRIMARY KEY,
+                keyword TEXT NOT NULL,
+                category_id INTEGER NOT NULL,
+                estimated_cpc REAL,
+                UNIQUE(keyword, category_id)
+            )
+        """)
+
+        parsed = staged = 0
+        chunk: List[Tuple[int, str, int, float]] = []
+
+        def flush():
+            nonlocal staged
+            conn.execute("BEGIN")
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO keywords_staging
+                (page_number, keyword, category_id, estimated_cpc)
+                VALUES (?, ?, ?, ?)
+            """, chunk)
+            staged += conn.total_changes - before
+            conn.execute("COMMIT")
+            chunk.clear()
+
+        for page_number, keyword in enumerate(keywords, 1):
+            category_id = categorize(keyword)
+            # No per-keyword CPC data yet: use the category's floor
+            chunk.append((page_number, keyword, category_id,
+                          floor_cpc.get(category_id, 0.0)))
+            parsed = page_number
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+
+        conn.execute("BEGIN IMMEDIATE")
+        deleted = conn.execute("""
+            DELETE FROM keywords
+            WHERE NOT EXISTS (
+                SELECT 1 FROM keywords_staging s
+                WHERE s.page_number = keywords.page_number
+                  AND s.keyword = keywords.keyword
+                  AND s.category_id = keywords.category_id
+            )
+        """).rowcount
+        inserted = conn.execute("""
+            INSERT OR IGNORE INTO keywords
+            (keyword, category_id, estimated_cpc, page_number, is_active)
+            SELECT keyword, category_id, estimated_cpc, page_number, 1
+            FROM keywords_staging
+            ORDER BY page_number
+        """).rowcount
+        conn.execute("COMMIT")
+        conn.execute("DROP TABLE temp.keywords_staging")
+        conn.close()
+
+        return {
+            'parsed': parsed,
+            'loaded': staged,
+            'skipped_duplicates': parsed - staged,
+            'inserted': inserted,
+            'deleted': deleted,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+
+    def load_file(self, source_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+        """Stream a JS/JSON keyword source into the database"""
+        return self.load(iter_source(source_path), chunk_size)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        rows = conn.execute(sql, params).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def get_by_page(self, page_number: int) -> Optional[Dict[str, Any]]:
+        """Keyword row for /page/{page_number}"""
+        rows = self._query("""
+            SELECT k.*, c.name AS category, c.slug AS category_slug
+            FROM keywords k JOIN categories c ON c.id = k.category_id
+            WHERE k.page_number = ?
+        """, (page_number,))
+        return rows[0] if rows else None
+
+    def get_by_category(self, category: str, limit: int = 100, offset: int = 0,
+                        active_only: bool = True) -> List[Dict[str, Any]]:
+        """Keywords in a category (slug or name), in page order"""
+        return self._query(f"""
+            SELECT k.* FROM keywords k
+            WHERE k.category_id = (
+                SELECT id FROM categories WHERE slug = ? OR name = ?
+            ) {'AND k.is_active = 1' if active_only else ''}
+            ORDER BY k.page_number
+            LIMIT ? OFFSET ?
+        """, (category, category, limit, offset))
+
+    def get_by_cpc_range(self, min_cpc: float, max_cpc: float, limit: int = 100,
+                         active_only: bool = True) -> List[Dict[str, Any]]:
+        """Keywords with min_cpc <= estimated_cpc <= max_cpc, highest first"""
+        return self._query(f"""
+            SELECT * FROM keywords
+            WHERE estimated_cpc BETWEEN ? AND ?
+            {'AND is_active = 1' if active_only else ''}
+            ORDER BY estimated_cpc DESC, page_number
+            LIMIT ?
+        """, (min_cpc, max_cpc, limit))
+
+    def count(self, active_only: bool = True) -> int:
+        """Number of keyword rows (what the monitors call the keyword count)"""
+        rows = self._query(
+            f"SELECT COUNT(*) AS n FROM keywords {'WHERE is_active = 1' if active_only else ''}"
+        )
+        return rows[0]['n']
+
+    def max_page(self) -> int:
+        rows = self._query("SELECT COALESCE(MAX(page_number), 0) AS n FROM keywords")
+        return rows[0]['n']
+
+    def category_counts(self) -> List[Dict[str, Any]]:
+        return self._query("""
+            SELECT c.id, c.name, c.slug, COUNT(k.id) AS keywords
+            FROM categories c LEFT JOIN keywords k ON k.category_id = c.id
+            GROUP BY c.id
+            ORDER BY keywords DESC
+        """)
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    db_path = DEFAULT_DB
+    if '--db' in args:
+        i = args.index('--db')
+        db_path = args[i + 1]
+        del args[i:i + 2]
+    if not args:
+        print(__doc__.strip().split('Usage:')[1])
+        return
+
+    db = KeywordDatabase(db_path)
+    command = args[0]
+    if command == 'load':
+        source = args[1] if len(args) > 1 else 'src/index.js'
+        stats = db.load_file(source)
+        print(f"Loaded {source} into {db_path}: {json.dumps(stats)}")
+        for row in db.category_counts():
+            print(f"  {row['name']:<32}{row['keywords']:>8}")
+    elif command == 'page':
+        print(json.dumps(db.get_by_page(int(args[1])), indent=2))
+    elif command == 'category':
+        for row in db.get_by_category(args[1], limit=int(args[2]) if len(args) > 2 else 20):
+            print(f"{row['page_number']:>7}  {row['keyword']}")
+    elif command == 'cpc':
+        for row in db.get_by_cpc_range(float(args[1]), float(args[2])):
+            print(f"{row['page_number']:>7}  ${row['estimated_cpc']:<7}{row['keyword']}")
+    else:
+        print(f"Unknown command: {command}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+utm_term -> corpus page matcher.
+KeywordMatcher indexes the getAllKeywords() corpus once at startup:
+canonical tokens with IDF weights, an inverted index whose postings are
+ordered by document norm, and a forward index of each keyword's tokens.
+
+match() walks the query tokens rarest first and visits at most a fixed
+number of postings, rarer tokens getting the larger shares. Tokens the
+corpus does not know are first corrected with spell_index.SpellIndex.
+Cosine similarity caps a keyword's score at the ratio of its norm to the
+query's, so each token's slice starts at keywords of about the query's
+norm, found by bisection. The candidates are then rescored exactly (cosine
+over IDF weights). Lookup cost is bounded by the postings budget, not by
+the corpus size, so common tokens such as "pet insurance" cost the same at
+10k and at 1M keywords. A sorted array of token-set digests answers exact
+and reordered keywords, and queries with one extra word, without any scan.
+
+Usage:
+    python keyword_matcher.py [--source src/index.js] <search term>
+    python keyword_matcher.py --benchmark [keywords]
+"""
+
+import bisect
+import hashlib
+import heapq
+import math
+import sys
+import time
+from array import array
+from itertools import repeat
+from operator import add, itemgetter
+from typing import Dict, Iterable, List, Optional
+
+from google_ads_tracker import canonical_keyword
+from spell_index import SpellIndex
+
+DEFAULT_SOURCE = 'src/index.js'
+POSTINGS_BUDGET = 2000   # Postings visited per lookup
+RESCORE_CANDIDATES = 64  # Candidates rescored with their full token list
+MIN_SCORE = 0.3          # Below this the generic content is a better answer
+# Scan each posting list from keywords of this fraction of the query's norm:
+# a keyword of norm d scores at most min(d, q) / max(d, q) against norm q
+NORM_WINDOW = 0.75
+
+# Uncached canonicalization: the corpus would only churn the request cache
+_canonical = canonical_keyword.__wrapped__
+
+
+def _token_set_digest(tokens: Iterable[str]) -> int:
+    """64-bit digest of a token set: equal for reordered keywords"""
+    joined = ' '.join(sorted(tokens)).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(joined, digest_size=8).digest(), 'big')
+
+
+class KeywordMatch:
+    """Best corpus keyword for a search term"""
+
+    def __init__(self, keyword: str, page: int, score: float):
+        self.keyword = keyword
+        self.page = page  # 1-based position in getAllKeywords(), served at /{page}
+        self.score = score
+
+    @property
+    def url(self) -> str:
+        return f"/{self.page}"
+
+    def __repr__(self) -> str:
+        return f"KeywordMatch({self.keyword!r}, page={self.page}, score={self.score:.3f})"
+
+
+class KeywordMatcher:
+    """IDF-weighted token index over the keyword corpus"""
+
+    def __init__(self, keywords: Iterable[str], spelling: bool = True):
+        started = time.perf_counter()
+        self.keywords: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        document_frequency = array('I')
+        # Forward index: token ids of keyword i are tokens[offsets[i]:offsets[i + 1]]
+        self._tokens = array('I')
+        self._offsets = array('I', [0])
+
+        digests = []
+        vocabulary = self.vocabulary
+        for keyword in keywords:
+            unique = dict.fromkeys((_canonical(keyword) or '').split())
+            if unique:
+                digests.append((_token_set_digest(unique), len(self.keywords)))
+            self.keywords.append(keyword)
+            for token in unique:
+                token_id = vocabulary.get(token)
+                if token_id is None:
+                    token_id = vocabulary[token] = len(vocabulary)
+                    document_frequency.append(0)
+                document_frequency[token_id] += 1
+                self._tokens.append(token_id)
+            self._offsets.append(len(self._tokens))
+
+        # First keyword of each token set, by digest, for bisect lookups
+        digests.sort()
+        self._digests = array('Q', (digest for digest, _ in digests))
+        self._digest_docs = array('I', (doc for _, doc in digests))
+        count = len(self.keywords)
+        self.idf = array('d', (math.log(1 + count / df) for df in document_frequency))
+        # Tokens the corpus has never seen weigh as much as its rarest token
+        self.unknown_idf = math.log(1 + count)
+
+        tokens, offsets = self._tokens, self._offsets
+        squared = array('d', (weight * weight for weight in self.idf)).__getitem__
+        self._norms = array('d', (
+            math.sqrt(sum(map(squared, tokens[offsets[i]:offsets[i + 1]]))) or 1.0
+            for i in range(count)))
+        self._postings = [array('I') for _ in range(len(vocabulary))]
+        for doc in sorted(range(count), key=self._norms.__getitem__):
+            for token_id in tokens[offsets[doc]:offsets[doc + 1]]:
+                self._postings[token_id].append(doc)
+        # Misspelled query tokens are corrected against the corpus vocabulary
+        self.spelling = SpellIndex(dict(zip(vocabulary, document_frequency))) if spelling else None
+        self.build_seconds = time.perf_counter() - started
+
+    @classmethod
+    def from_source(cls, path: str = DEFAULT_SOURCE) -> 'KeywordMatcher':
+        from corpus_merge import iter_source
+        return cls(iter_source(path))
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def _exact(self, tokens: Iterable[str]) -> Optional[int]:
+        """Keyword with exactly this token set, if any"""
+        digest = _token_set_digest(tokens)
+        i = bisect.bisect_left(self._digests, digest)
+        if i < len(self._digests) and self._digests[i] == digest:
+            return self._digest_docs[i]
+        return None
+
+    def match(self, term: Optional[str], min_score: float = MIN_SCORE,
+              budget: Optional[int] = POSTINGS_BUDGET) -> Optional[KeywordMatch]:
+        """Best-scoring corpus keyword for term, or None; budget=None scans every posting"""
+        results = self.top(term, 1, budget)
+        if results and results[0].score >= min_score:
+            return results[0]
+        return None
+
+    def top(self, term: Optional[str], limit: int = 10,
+            budget: Optional[int] = POSTINGS_BUDGET) -> List[KeywordMatch]:
+        """Up to limit best matches for term, best first"""
+        key = canonical_keyword(term) if term else None
+        if not key:
+            return []
+        query_tokens = dict.fromkeys(key.split())
+        if self.spelling:
+            query_tokens = dict.fromkeys(
+                token if token in self.vocabulary else self.spelling.correct_token(token)
+                for token in query_tokens)
+        exact = self._exact(query_tokens)
+        if exact is not None and limit == 1:
+            return [KeywordMatch(self.keywords[exact], exact + 1, 1.0)]
+        # Keywords equal to the query minus one word ("best", "cheap", ...)
+        nearby = [doc for doc in (self._exact([t for t in query_tokens if t != token])
+                                  for token in query_tokens if len(query_tokens) > 1)
+                  if doc is not None]
+        if exact is not None:
+            nearby.append(exact)
+        weights: Dict[int, float] = {}
+        query_norm = 0.0
+        for token in query_tokens:
+            token_id = self.vocabulary.get(token)
+            weight = self.idf[token_id] ** 2 if token_id is not None else self.unknown_idf ** 2
+            query_norm += weight
+            if token_id is not None:
+                weights[token_id] = weight
+        if not weights:
+            return []
+
+        # Partial dot products from a bounded scan, rarest token first
+        norms, tokens, offsets = self._norms, self._tokens, self._offsets
+        query_norm = math.sqrt(query_norm)
+        # A keyword holding every known query token has at least this norm
+        window = NORM_WINDOW * math.sqrt(sum(weights.values()))
+        partial: Dict[int, float] = {}
+        remaining = budget if budget is not None else len(self._tokens)
+        ordered = sorted(weights, key=weights.__getitem__, reverse=True)
+        for position, token_id in enumerate(ordered):
+            postings = self._postings[token_id]
+            # Rarer tokens are more selective: each may use half of what is left
+            share = remaining if position == len(ordered) - 1 else remaining // 2
+            if len(postings) > share:
+                start = bisect.bisect_left(postings, window, key=norms.__getitem__)
+                start = max(0, min(start, len(postings) - share))
+                postings = postings[start:start + share]
+            remaining -= len(postings)
+            # partial[doc] += weight for every doc, without a Python-level loop
+            partial.update(zip(postings, map(add, map(partial.get, postings, repeat(0.0)),
+                                             repeat(weights[token_id]))))
+
+        if budget is None:
+            # Every posting was visited: partial sums are the exact dot products
+            candidates = heapq.nlargest(limit, partial, key=lambda doc: partial[doc] / norms[doc])
+        else:
+            candidates = [doc for doc, _ in heapq.nlargest(max(limit, RESCORE_CANDIDATES),
+                                                           partial.items(), key=itemgetter(1))]
+        candidates.extend(doc for doc in nearby if doc not in candidates)
+        scored = []
+        for doc in candidates:
+            dot = sum(map(weights.get, tokens[offsets[doc]:offsets[doc + 1]], repeat(0.0)))
+            scored.append((dot / (norms[doc] * query_norm), -doc))
+        scored.sort(reverse=True)
+        return [KeywordMatch(self.keywords[-doc], -doc + 1, score)
+                for score, doc in scored[:limit]]
+
+
+def _synthetic_corpus(base: List[str], size: int) -> List[str]:
+    """size distinct keywords: the real corpus crossed with breed, place and age modifiers"""
+    breeds = ['labrador', 'golden retriever', 'french bulldog', 'german shepherd', 'poodle',
+              'beagle', 'dachshund', 'maine coon', 'siamese', 'ragdoll', 'persian', 'bengal',
+              'husky', 'boxer', 'corgi', 'shih tzu', 'yorkie', 'pug', 'sphynx', 'chihuahua']
+    places = ['texas', 'california', 'florida', 'new york', 'ohio', 'chicago', 'seattle',
+              'denver', 'boston', 'atlanta', 'phoenix', 'austin', 'portland', 'miami']
+    ages = ['puppy', 'kitten', 'senior', '2 year old', '5 year old', '10 year old', 'adult']
+    keywords = list(dict.fromkeys(base))
+    seen = set(keywords)
+    i = 0
+    while len(keywords) < size:
+        keyword = base[i % len(base)]
+        i += 1
+        j = i // len(base)
+        variant = (f"{keyword} for {ages[j % len(ages)]} {breeds[j // len(ages) % len(breeds)]} "
+                   f"in {places[j // (len(ages) * len(breeds)) % len(places)]}")
+        if j >= len(ages) * len(breeds) * len(places):
+            variant += f" {j // (len(ages) * len(breeds) * len(places))}"
+        if variant not in seen:
+            seen.add(variant)
+            keywords.append(variant)
+    return keywords
+
+
+def benchmark(size: int = 1000000, queries: int = 2000):
+    import random
+    import resource
+    from corpus_merge import iter_source
+    from spell_index import _typo
+
+    rng = random.Random(46)
+    base = list(iter_source(DEFAULT_SOURCE))
+    corpus = _synthetic_corpus(base, size)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    matcher = KeywordMatcher(corpus)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"Benchmark: {len(matcher):,} keywords, {len(matcher.vocabulary):,} tokens, "
+          f"index built in {matcher.build_seconds:.1f}s, "
+          f"peak RSS +{(rss_after - rss_before) / 1024:.0f} MB")
+
+    def perturb(keyword: str) -> str:
+        words = keyword.lower().split()
+        pick = rng.random()
+        if pick < 0.3 and len(words) > 2:
+            del words[rng.randrange(len(words))]
+        elif pick < 0.6:
+            rng.shuffle(words)
+        elif pick < 0.8:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(['best', 'cheap', 'top', 'quote']))
+        return '+'.join(words)
+
+    def misspell(keyword: str) -> str:
+        words = keyword.lower().split()
+        long_words = [i for i, word in enumerate(words) if len(word) >= 5 and word.isalpha()]
+        if long_words:
+            i = rng.choice(long_words)
+            words[i] = _typo(words[i], rng)
+        return '+'.join(words)
+
+    originals = [rng.choice(corpus) for _ in range(queries)]
+    query_sets = [
+        ('exact corpus keyword', [rng.choice(corpus) for _ in range(queries)]),
+        ('perturbed keyword', [perturb(rng.choice(corpus)) for _ in range(queries)]),
+        ('misspelled keyword', [misspell(keyword) for keyword in originals]),
+        ('common tokens only', [rng.choice(['pet insurance', 'cat insurance coverage',
+                                            'best pet insurance plans', 'dog insurance'])
+                                for _ in range(queries)]),
+        ('unrelated term', [f"zq{rng.randrange(10**6)} widget" for _ in range(queries)]),
+    ]
+    print(f"  {'queries':<22} {'p50':>8} {'p99':>8} {'max':>8}  {'matched':>8}  exhaustive agrees")
+    for label, terms in query_sets:
+        times, matched = [], 0
+        for term in terms:
+            started = time.perf_counter()
+            result = matcher.match(term)
+            times.append(time.perf_counter() - started)
+            matched += result is not None
+        times.sort()
+        # Compare the best score against a scan of every posting
+        sample = terms[:50]
+        agree = sum(
+            abs((matcher.top(t, 1) or [KeywordMatch('', 0, 0.0)])[0].score -
+                (matcher.top(t, 1, budget=None) or [KeywordMatch('', 0, 0.0)])[0].score) < 1e-9
+            for t in sample)
+        print(f"  {label:<22} {times[len(times) // 2] * 1e3:>6.3f}ms {times[int(len(times) * 0.99)] * 1e3:>6.3f}ms "
+              f"{times[-1] * 1e3:>6.3f}ms  {matched / len(terms):>7.1%}  {agree}/{len(sample)}")
+
+    misspelled = query_sets[2][1]
+    spelling, restored = matcher.spelling, []
+    for matcher.spelling in (spelling, None):
+        restored.append(sum(
+            (matcher.match(term) or KeywordMatch('', 0, 0.0)).score == 1.0
+            for term in misspelled) / len(misspelled))
+    matcher.spelling = spelling
+    print(f"  misspelled keyword back on a page with its exact tokens: {restored[0]:.1%} "
+          f"({restored[1]:.1%} without spelling correction; spell index built in "
+          f"{spelling.build_seconds * 1000:.0f} ms, {len(spelling):,} delete entries)")
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(int(args[1]) if len(args) > 1 else 1000000)
+        return
+    source = DEFAULT_SOURCE
+    if '--source' in args:
+        i = args.index('--source')
+        source = args[i + 1]
+        del args[i:i + 2]
+    if not args:
+        print("Usage: python keyword_matcher.py [--source src/index.js] <search term>")
+        return
+
+    matcher = KeywordMatcher.from_source(source)
+    term = ' '.join(args)
+    started = time.perf_counter()
+    results = matcher.top(term, 5)
+    seconds = time.perf_counter() - started
+    print(f"{term!r}: {len(matcher):,} keywords indexed in {matcher.build_seconds:.2f}s, "
+          f"lookup {seconds * 1e3:.2f} ms")
+    for result in results:
+        print(f"  {result.score:.3f}  {result.url:<8} {result.keyword}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
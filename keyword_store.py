@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Memory-compact, memory-mappable keyword store.
+Keywords are kept sorted in front-coded blocks with integer ids, plus a
+page table mapping page numbers (getAllKeywords() order) to ids. The file
+is opened with mmap, so several processes share one copy through the page
+cache instead of each holding a list and a set of str objects.
+
+Usage:
+    python keyword_store.py build <source> <store.kws> [--lower]
+    python keyword_store.py page <store.kws> <page_number>
+    python keyword_store.py has <store.kws> <keyword>
+    python keyword_store.py prefix <store.kws> <prefix> [limit]
+"""
+
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+MAGIC = b'KWSTORE1'
+VERSION = 1
+DEFAULT_BLOCK_SIZE = 16
+
+# magic, version, block_size, key count, page count, index offset, page offset
+_HEADER = struct.Struct('<8sIIQQQQ')
+
+
+def _encode_varint(value: int, out: bytearray):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(buf, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _prefix_successor(prefix: bytes) -> Optional[bytes]:
+    """Smallest byte string greater than every string starting with prefix"""
+    stripped = prefix.rstrip(b'\xff')
+    if not stripped:
+        return None
+    return stripped[:-1] + bytes([stripped[-1] + 1])
+
+
+class KeywordStore:
+    """Read-only sorted keyword set with O(log n) lookups over an mmap"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buf = memoryview(self._mmap)
+
+        (magic, version, self.block_size, self.key_count, self.page_count,
+         index_offset, page_offset) = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a keyword store (version {VERSION})")
+
+        block_count = -(-self.key_count // self.block_size)
+        self._blocks = self._buf[index_offset:index_offset + 8 * block_count].cast('Q')
+        self._pages = self._buf[page_offset:page_offset + 4 * self.page_count].cast('I')
+
+    @classmethod
+    def build(cls, keywords: Iterable[str], path: str,
+              block_size: int = DEFAULT_BLOCK_SIZE) -> 'KeywordStore':
+        """
+        Write a store for ``keywords`` given in page order. Duplicate keywords
+        share one id; every position still gets its own page entry.
+        """
+        page_keys = [k.encode('utf-8') for k in keywords]
+        sorted_keys = sorted(set(page_keys))
+        ids = {key: i for i, key in enumerate(sorted_keys)}
+
+        data = bytearray(b'\0' * _HEADER.size)
+        block_offsets = array('Q')
+        previous = b''
+        for i, key in enumerate(sorted_keys):
+            if i % block_size == 0:
+                block_offsets.append(len(data))
+                _encode_varint(len(key), data)
+                data += key
+            else:
+                shared = 0
+                limit = min(len(previous), len(key))
+                while shared < limit and previous[shared] == key[shared]:
+                    shared += 1
+                _encode_varint(shared, data)
+                _encode_varint(len(key) - shared, data)
+                data += key[shared:]
+            previous = key
+
+        data += b'\0' * (-len(data) % 8)
+        index_offset = len(data)
+        data += block_offsets.tobytes()
+        page_offset = len(data)
+        data += array('I', (ids[key] for key in page_keys)).tobytes()
+
+        _HEADER.pack_into(data, 0, MAGIC, VERSION, block_size, len(sorted_keys),
+                          len(page_keys), index_offset, page_offset)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return cls(path)
+
+    def close(self):
+        if getattr(self, '_blocks', None) is not None:
+            self._blocks.release()
+            self._pages.release()
+            self._blocks = self._pages = None
+        if self._buf is not None:
+            self._buf.release()
+            self._buf = None
+            self._mmap.close()
+            self._file.close()
+
+    def __enter__(self) -> 'KeywordStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.key_count
+
+    # -- block decoding -------------------------------------------------
+
+    def _block_first(self, block: int) -> bytes:
+        length, pos = _decode_varint(self._buf, self._blocks[block])
+        return bytes(self._buf[pos:pos + length])
+
+    def _iter_block(self, block: int) -> Iterator[bytes]:
+        pos = self._blocks[block]
+        count = min(self.block_size, self.key_count - block * self.block_size)
+        length, pos = _decode_varint(self._buf, pos)
+        key = bytes(self._buf[pos:pos + length])
+        pos += length
+        yield key
+        for _ in range(count - 1):
+            shared, pos = _decode_varint(self._buf, pos)
+            length, pos = _decode_varint(self._buf, pos)
+            key = key[:shared] + bytes(self._buf[pos:pos + length])
+            pos += length
+            yield key
+
+    def _lower_bound(self, target: bytes) -> int:
+        """Id of the first key >= target (key_count if none)"""
+        lo, hi = 0, len(self._blocks)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._block_first(mid) <= target:
+                lo = mid + 1
+            else:
+                hi = mid
+        block = max(lo - 1, 0)
+        for i, key in enumerate(self._iter_block(block) if self.key_count else ()):
+            if key >= target:
+                return block * self.block_size + i
+        return min((block + 1) * self.block_size, self.key_count)
+
+    # -- public lookups -------------------------------------------------
+
+    def _key(self, key_id: int) -> bytes:
+        block, offset = divmod(key_id, self.block_size)
+        for i, key in enumerate(self._iter_block(block)):
+            if i == offset:
+                return key
+
+    def keyword(self, key_id: int) -> str:
+        """Keyword for an integer id (ids follow sorted order)"""
+        if not 0 <= key_id < self.key_count:
+            raise IndexError(key_id)
+        return self._key(key_id).decode('utf-8')
+
+    def find(self, keyword: str) -> Optional[int]:
+        """Id of ``keyword`` or None"""
+        target = keyword.encode('utf-8')
+        key_id = self._lower_bound(target)
+        if key_id < self.key_count and self._key(key_id) == target:
+            return key_id
+        return None
+
+    def __contains__(self, keyword: str) -> bool:
+        return self.find(keyword) is not None
+
+    def page(self, page_number: int) -> str:
+        """Keyword shown on /page/{page_number} (1-based)"""
+        if not 1 <= page_number <= self.page_count:
+            raise IndexError(page_number)
+        return self.keyword(self._pages[page_number - 1])
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """[first, last) id range of keywords starting with ``prefix``"""
+        encoded = prefix.encode('utf-8')
+        successor = _prefix_successor(encoded)
+        end = self._lower_bound(successor) if successor else self.key_count
+        return self._lower_bound(encoded), end
+
+    def count_prefix(self, prefix: str) -> int:
+        first, end = self.prefix_range(prefix)
+        return end - first
+
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        """Keywords starting with ``prefix`` in sorted order"""
+        first, end = self.prefix_range(prefix)
+        key_id = first
+        while key_id < end:
+            block, offset = divmod(key_id, self.block_size)
+            for i, key in enumerate(self._iter_block(block)):
+                if i >= offset and key_id < end:
+                    yield key.decode('utf-8')
+                    key_id += 1
+
+    def __iter__(self) -> Iterator[str]:
+        for block in range(len(self._blocks)):
+            for key in self._iter_block(block):
+                yield key.decode('utf-8')
+
+
+def _report_build(keywords: List[str], store: KeywordStore, seconds: float):
+    # What the scripts hold today: the str objects, a list and a set of them
+    python_bytes = (sum(sys.getsizeof(k) for k in keywords)
+                    + sys.getsizeof(keywords) + sys.getsizeof(set(keywords)))
+
+    file_bytes = os.path.getsize(store.path)
+    print(f"Built {store.path} in {seconds:.2f}s")
+    print(f"  pages: {store.page_count}, unique keywords: {len(store)}")
+    print(f"  store file: {file_bytes / 1024:.0f} KB "
+          f"(list + set of str: {python_bytes / 1024:.0f} KB)")
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) < 3:
+        print(__doc__.strip().split('Usage:')[1])
+        return
+    command, path = argv[0], argv[1]
+
+    if command == 'build':
+        from corpus_merge import iter_source
+
+        source, path = argv[1], argv[2]
+        keywords = list(iter_source(source))
+        if '--lower' in argv:
+            keywords = [k.lower() for k in keywords]
+        started = time.perf_counter()
+        with KeywordStore.build(keywords, path) as store:
+            _report_build(keywords, store, time.perf_counter() - started)
+        return
+
+    with KeywordStore(path) as store:
+        if command == 'page':
+            print(store.page(int(argv[2])))
+        elif command == 'has':
+            key_id = store.find(argv[2])
+            print(f"id {key_id}" if key_id is not None else "not found")
+        elif command == 'prefix':
+            limit = int(argv[3]) if len(argv) > 3 else 20
+            print(f"{store.count_prefix(argv[2])} keywords start with '{argv[2]}'")
+            for i, keyword in enumerate(store.iter_prefix(argv[2])):
+                if i >= limit:
+                    break
+                print(f"  {keyword}")
+        else:
+            print(f"Unknown command: {command}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Streaming tokenizer for the getAllKeywords() array literal.
+Reads keyword JavaScript files (src/index.js, keywords_max.js, ...) in
+fixed-size chunks and yields the keywords one at a time, so memory use is
+bounded by the chunk size instead of the file size.
+"""
+
+import re
+import sys
+import time
+import tracemalloc
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_TOKEN_SIZE = 1024 * 1024
+_SEEK_TAIL = 4096
+_SEPARATORS = b' \t\r\n\f\v,'
+
+# One token inside the array body. Strings may not contain raw line breaks
+# (except template literals), but an escaped line break is a continuation.
+_TOKEN = re.compile(rb"""
+    [\s,]*(?:
+      (?P<dq>"[^"\\\r\n]*(?:\\(?:\r\n|[\s\S])[^"\\\r\n]*)*")
+    | (?P<sq>'[^'\\\r\n]*(?:\\(?:\r\n|[\s\S])[^'\\\r\n]*)*')
+    | (?P<tq>`[^`\\$]*(?:(?:\\[\s\S]|\$(?!\{))[^`\\$]*)*`)
+    | (?P<lc>//[^\r\n]*(?=[\r\n]))
+    | (?P<bc>/\*[\s\S]*?\*/)
+    | (?P<open>\[)
+    | (?P<close>\])
+    | (?P<other>[^\s,"'`/\[\]]+|/(?![/*]))
+    )
+""", re.VERBOSE)
+
+# Unterminated string prefixes, used to tell "needs more data" from "broken"
+_STRING_PREFIX = {
+    ord('"'): re.compile(rb'"[^"\\\r\n]*(?:\\(?:\r\n|[\s\S])[^"\\\r\n]*)*'),
+    ord("'"): re.compile(rb"'[^'\\\r\n]*(?:\\(?:\r\n|[\s\S])[^'\\\r\n]*)*"),
+}
+
+_ESCAPE = re.compile(
+    r'\\(?:u\{([0-9a-fA-F]+)\}|u([0-9a-fA-F]{4})|x([0-9a-fA-F]{2})|(\r\n|[\s\S]))'
+)
+_SIMPLE_ESCAPES = {
+    'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0',
+    # Line continuations produce nothing
+    '\n': '', '\r': '', '\r\n': '', '\u2028': '', '\u2029': '',
+}
+
+
+def _replace_escape(match: 're.Match') -> str:
+    code_point, unicode4, hex2, other = match.groups()
+    if code_point is not None:
+        return chr(int(code_point, 16))
+    if unicode4 is not None:
+        return chr(int(unicode4, 16))
+    if hex2 is not None:
+        return chr(int(hex2, 16))
+    return _SIMPLE_ESCAPES.get(other, other)
+
+
+def decode_js_string(body: bytes) -> str:
+    """Decode the inside of a JS string literal (without its quotes)"""
+    text = body.decode('utf-8')
+    if '\\' not in text:
+        return text
+    text = _ESCAPE.sub(_replace_escape, text)
+    if any('\ud800' <= ch <= '\udfff' for ch in text):
+        # Re-join surrogate pairs written as \uD83D\uDE00
+        text = text.encode('utf-16', 'surrogatepass').decode('utf-16', 'replace')
+    return text
+
+
+class KeywordTokenizer:
+    """Chunked tokenizer for the array returned by a keyword function"""
+
+    def __init__(self, stream: BinaryIO, function_name: str = 'getAllKeywords',
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_token_size: int = MAX_TOKEN_SIZE):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_token_size = max_token_size
+        self.array_start = re.compile(
+            rb'function\s+' + re.escape(function_name.encode()) +
+            rb'\s*\(\s*\)\s*\{(?:\s|//[^\n]*\n|/\*[\s\S]*?\*/)*return\s*\['
+        )
+        self.found = False
+        self.depth = 0
+        self.array_offset: Optional[int] = None
+        self.end_offset: Optional[int] = None
+
+    def __iter__(self) -> Iterator[str]:
+        for _, _, keyword in self.spans():
+            yield keyword
+
+    def spans(self, start: Optional[int] = None,
+              depth: int = 1) -> Iterator[Tuple[int, int, str]]:
+        """
+        Yield (start_offset, end_offset, keyword) for each top-level string.
+
+        Args:
+            start: Byte offset inside the array to resume from. When omitted
+                the stream is scanned from its current position for the
+                function header first.
+            depth: Bracket depth at ``start`` (1 = directly inside the array)
+        """
+        buf = b''
+        base = 0
+        eof = False
+
+        if start is None:
+            base = self.stream.tell()
+            while True:
+                match = self.array_start.search(buf)
+                if match:
+                    buf = buf[match.end():]
+                    base += match.end()
+                    break
+                if eof:
+                    return
+                keep = max(0, len(buf) - _SEEK_TAIL)
+                base += keep
+                chunk = self.stream.read(self.chunk_size)
+                eof = not chunk
+                buf = buf[keep:] + chunk
+            self.depth = 1
+        else:
+            self.stream.seek(start)
+            base = start
+            self.depth = depth
+        self.found = True
+        self.array_offset = base
+
+        pos = 0
+        while True:
+            if len(buf) - pos < 2 and not eof:
+                chunk = self.stream.read(self.chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                base += pos
+                pos = 0
+                continue
+            if pos >= len(buf):
+                return  # Truncated file: array never closed
+
+            match = _TOKEN.match(buf, pos)
+            if match is None or (match.end() == len(buf) and not eof):
+                # A token touching the end of the buffer may continue in the
+                # next chunk ("/" of a comment, a split identifier, ...)
+                if match is None and eof:
+                    self._fail_at_eof(buf, pos, base)
+                    return
+                if match is None:
+                    self._check_string(buf, pos, base)
+                if len(buf) - pos > self.max_token_size:
+                    raise ValueError(
+                        f"Token at byte {base + pos} exceeds {self.max_token_size} bytes"
+                    )
+                chunk = self.stream.read(self.chunk_size)
+                eof = not chunk
+                buf = buf[pos:] + chunk
+                base += pos
+                pos = 0
+                continue
+
+            kind = match.lastgroup
+            if kind in ('dq', 'sq', 'tq'):
+                if self.depth == 1:
+                    token_start, token_end = match.span(kind)
+                    yield (base + token_start, base + token_end,
+                           decode_js_string(buf[token_start + 1:token_end - 1]))
+            elif kind == 'open':
+                self.depth += 1
+            elif kind == 'close':
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end_offset = base + match.start(kind)
+                    return
+            pos = match.end()
+
+    def _check_string(self, buf: bytes, pos: int, base: int):
+        """Raise early for a string broken by a raw line break"""
+        pos = len(buf) - len(buf[pos:].lstrip(_SEPARATORS))
+        if pos >= len(buf):
+            return
+        prefix = _STRING_PREFIX.get(buf[pos])
+        if prefix is None:
+            return
+        end = prefix.match(buf, pos).end()
+        if end < len(buf) - 2:
+            raise ValueError(f"Unterminated string literal at byte {base + pos}")
+
+    def _fail_at_eof(self, buf: bytes, pos: int, base: int):
+        rest = buf[pos:].lstrip(_SEPARATORS)
+        if not rest or rest.startswith(b'//'):
+            return  # Truncated array or a trailing comment without a newline
+        raise ValueError(f"Unexpected end of file inside token at byte {base + pos}")
+
+
+def iter_keywords(path: str, function_name: str = 'getAllKeywords',
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield the keywords of ``function_name()`` in ``path`` one at a time"""
+    with open(path, 'rb') as f:
+        yield from KeywordTokenizer(f, function_name, chunk_size)
+
+
+def count_keywords(path: str, function_name: str = 'getAllKeywords') -> int:
+    """Count the keywords of ``function_name()`` without loading the file"""
+    return sum(1 for _ in iter_keywords(path, function_name))
+
+
+def _legacy_line_regex_count(path: str) -> int:
+    """Whole-file MULTILINE regex used by the monitor scripts"""
+    with open(path, 'r') as f:
+        content = f.read()
+    keywords = re.findall(r'"[^"]+",?\s*(?://.*)?$', content, re.MULTILINE)
+    keywords = [k for k in keywords if not k.strip().startswith('//')]
+    return len(keywords)
+
+
+def _legacy_function_regex_count(path: str) -> int:
+    """getAllKeywords() section regex used by SmartContinueBot"""
+    with open(path, 'r') as f:
+        content = f.read()
+    match = re.search(r'function getAllKeywords\(\)\s*\{[\s\S]*?return\s*\[([\s\S]*?)\];', content)
+    if not match:
+        return 0
+    keywords = re.findall(r'"[^"]+"\s*,?(?:\s*//[^\n]*)?', match.group(1))
+    return len([k for k in keywords if '"' in k])
+
+
+def benchmark(path: str, repeat: int = 3) -> None:
+    """Compare throughput and peak memory against the regex counters"""
+    import os
+
+    size_mb = os.path.getsize(path) / (1024 * 1024)
+    candidates = [
+        ('streaming tokenizer', count_keywords),
+        ('line regex (monitors)', _legacy_line_regex_count),
+        ('function regex (smart bot)', _legacy_function_regex_count),
+    ]
+
+    print(f"Benchmark: {path} ({size_mb:.1f} MB, best of {repeat})")
+    print("-" * 72)
+    print(f"{'method':<28}{'count':>10}{'seconds':>10}{'MB/s':>10}{'peak MB':>12}")
+    for name, func in candidates:
+        best = float('inf')
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = func(path)
+            best = min(best, time.perf_counter() - started)
+
+        tracemalloc.start()
+        func(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"{name:<28}{count:>10}{best:>10.3f}{size_mb / best:>10.1f}"
+              f"{peak / (1024 * 1024):>12.2f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        for target in sys.argv[2:] or ['src/index.js', 'keywords_max.js']:
+            benchmark(target)
+            print()
+    elif len(sys.argv) > 1:
+        for keyword in iter_keywords(sys.argv[1]):
+            print(keyword)
+    else:
+        print("Usage: python keyword_stream.py <file.js>")
+        print("       python keyword_stream.py --benchmark [file.js ...]")
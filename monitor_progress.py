@@ -1,24 +1,20 @@
 #!/usr/bin/env python3
-import time
-import re
 from datetime import datetime
 
+from change_monitor import KeywordProgressMonitor
+
+progress = KeywordProgressMonitor('/root/million-pages/src/index.js')
+
 def get_keyword_count():
-    try:
-        with open('/root/million-pages/src/index.js', 'r') as f:
-            content = f.read()
-        keywords = re.findall(r'"[^"]+",?\s*(?://.*)?$', content, re.MULTILINE)
-        keywords = [k for k in keywords if '"' in k and not k.strip().startswith('//')]
-        return len(keywords)
-    except:
-        return 0
+    return progress.count
 
 def monitor():
     last_count = get_keyword_count()
     stall_count = 0
     
     while last_count < 5000:
-        time.sleep(30)  # Check every 30 seconds
+        # Returns as soon as the count changes, None after 30 quiet seconds
+        event = progress.wait(timeout=30)
         current_count = get_keyword_count()
         
         timestamp = datetime.now().strftime('%H:%M:%S')
@@ -29,7 +25,7 @@ def monitor():
                 f.write('')
             last_count = current_count
             stall_count = 0
-        else:
+        elif event is None:
             stall_count += 1
             print(f"[{timestamp}] No progress. Stall #{stall_count}")
             
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Near-duplicate and thin-content report for generated landing pages.
+Each page body is reduced to its set of word shingles (SHINGLE_SIZE words
+in a row) and summarized by a MinHash signature: NUM_PERM minima of
+random hash permutations, computed in a process pool with NumPy. The
+fraction of equal signature entries estimates the Jaccard similarity of
+two pages.
+
+Instead of comparing every pair, signatures are cut into bands
+(locality-sensitive hashing): pages that agree on a whole band land in
+the same bucket and become a candidate pair, which is then verified on
+the full signature. Band shape is picked so that pairs at the threshold
+are almost always candidates and dissimilar pairs rarely are. Identical
+signatures are grouped up front so copies of one body don't produce
+quadratic buckets.
+
+Pages come from the keyword corpus rendered by GoogleAdsDataProcessor
+(the default), from cached page_content rows (--db), or from pre-rendered
+HTML files (--html DIR).
+
+Usage:
+    python near_duplicates.py [source ...] [--db google_ads_clicks.db] [--html DIR]
+                              [--threshold 0.8] [--workers N] [--report near_duplicates.json]
+    python near_duplicates.py --benchmark [pages]
+
+Requires numpy.
+"""
+
+import html
+import itertools
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+DEFAULT_SOURCES = ['src/index.js']
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.8
+THIN_WORDS = 150         # Pages with fewer words are reported as thin
+CHUNK_SIZE = 2000        # Pages per worker task
+PERM_BLOCK = 16          # Permutations evaluated at once (bounds worker memory)
+MAX_BUCKET_PAIRS = 16    # Larger LSH buckets pair each member with the first only
+SEED = 50
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_TOKEN = re.compile(r"\w+")
+_TAG = re.compile(r"<(script|style)\b.*?</\1\s*>|<[^>]+>", re.S | re.I)
+
+# Rendered content fields that make up the page body (page_content stores
+# body_text as body_content)
+BODY_FIELDS = ('headline', 'subheadline', 'body_text', 'cta_text')
+
+
+def page_words(text: str) -> List[str]:
+    """Lowercase words of a page body, markup removed"""
+    return _TOKEN.findall(html.unescape(_TAG.sub(' ', text)).lower())
+
+
+def _permutations(num_perm: int, seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    # a, b < 2**32 and 32-bit shingle hashes keep a * h + b inside uint64
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, 1 << 32, num_perm, dtype=np.uint64),
+            rng.integers(0, 1 << 32, num_perm, dtype=np.uint64))
+
+
+def signatures(texts: List[str], shingle_size: int = SHINGLE_SIZE, num_perm: int = NUM_PERM,
+               seed: int = SEED) -> Tuple[np.ndarray, np.ndarray]:
+    """(len(texts), num_perm) uint32 MinHash signatures and each page's word count"""
+    hashes: List[int] = []
+    sizes = np.empty(len(texts), dtype=np.int64)
+    words = np.empty(len(texts), dtype=np.int64)
+    for n, text in enumerate(texts):
+        tokens = page_words(text)
+        words[n] = len(tokens)
+        # Pages shorter than one shingle are a single shingle; empty pages share ''
+        shingles = {' '.join(tokens[i:i + shingle_size])
+                    for i in range(max(len(tokens) - shingle_size + 1, 1))}
+        hashes.extend(zlib.crc32(shingle.encode('utf-8')) for shingle in shingles)
+        sizes[n] = len(shingles)
+
+    values = np.array(hashes, dtype=np.uint64)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    a, b = _permutations(num_perm, seed)
+    result = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for block in range(0, num_perm, PERM_BLOCK):
+        permuted = (a[block:block + PERM_BLOCK, None] * values + b[block:block + PERM_BLOCK, None])
+        permuted = (permuted % _MERSENNE) & _MAX_HASH
+        result[:, block:block + PERM_BLOCK] = np.minimum.reduceat(permuted, starts, axis=1).T
+    return result, words
+
+
+def _render(keyword: str) -> str:
+    from google_ads_tracker import GoogleAdsDataProcessor
+    content = GoogleAdsDataProcessor().generate_dynamic_content({'keyword': keyword})
+    return ' '.join(content.get(field) or '' for field in BODY_FIELDS)
+
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def _sign_chunk(kind: str, items: List[str], shingle_size: int, num_perm: int,
+                seed: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Worker: page bodies of one chunk (keywords to render, texts or file paths) to signatures"""
+    if kind == 'keyword':
+        texts = [_render(keyword) for keyword in items]
+    elif kind == 'file':
+        texts = [_read(path) for path in items]
+    else:
+        texts = items
+    return signatures(texts, shingle_size, num_perm, seed)
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def lsh_shape(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose S-curve midpoint (1/bands)**(1/rows) is closest below threshold"""
+    shapes = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    below = [shape for shape in shapes if (1 / shape[0]) ** (1 / shape[1]) <= threshold]
+    return max(below or shapes[:1], key=lambda shape: shape[1])
+
+
+def _bucket_pairs(keys: np.ndarray) -> np.ndarray:
+    """(m, 2) index pairs of rows sharing a band key"""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    edges = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+    starts = np.concatenate(([0], edges))
+    sizes = np.diff(np.concatenate((starts, [len(keys)])))
+    pairs = [np.stack((order[starts[sizes == 2]], order[starts[sizes == 2] + 1]), axis=1)]
+    for start, size in zip(starts[sizes > 2], sizes[sizes > 2]):
+        members = order[start:start + size]
+        if size <= MAX_BUCKET_PAIRS:
+            pairs.append(np.array(list(itertools.combinations(members, 2))))
+        else:
+            pairs.append(np.stack((np.full(size - 1, members[0]), members[1:]), axis=1))
+    return np.concatenate(pairs) if pairs else np.empty((0, 2), dtype=np.int64)
+
+
+def candidate_pairs(sig: np.ndarray, bands: int, rows: int) -> np.ndarray:
+    """Unique (i < j) pairs that agree on at least one band"""
+    rng = np.random.default_rng(SEED)
+    multipliers = rng.integers(1, 1 << 63, rows, dtype=np.uint64) | np.uint64(1)
+    found = []
+    for band in range(bands):
+        # Wrapping uint64 mix of the band: a collision only costs one verification
+        keys = (sig[:, band * rows:(band + 1) * rows].astype(np.uint64) * multipliers).sum(axis=1)
+        found.append(_bucket_pairs(keys))
+    pairs = np.sort(np.concatenate(found).astype(np.int64), axis=1)
+    codes = np.unique(pairs[:, 0] * len(sig) + pairs[:, 1])
+    return np.stack((codes // len(sig), codes % len(sig)), axis=1)
+
+
+def estimated_similarity(sig: np.ndarray, pairs: np.ndarray, chunk: int = 200000) -> np.ndarray:
+    """MinHash Jaccard estimate of each pair"""
+    result = np.empty(len(pairs))
+    for start in range(0, len(pairs), chunk):
+        part = pairs[start:start + chunk]
+        result[start:start + chunk] = (sig[part[:, 0]] == sig[part[:, 1]]).mean(axis=1)
+    return result
+
+
+class NearDuplicateReport:
+    """Signatures of a page set and the near-duplicate groups found among them"""
+
+    def __init__(self, pages: List[str], sig: np.ndarray, words: np.ndarray,
+                 threshold: float = DEFAULT_THRESHOLD):
+        started = time.perf_counter()
+        self.pages = pages
+        self.threshold = threshold
+        self.words = words
+        self.bands, self.rows = lsh_shape(sig.shape[1], threshold)
+
+        # Identical signatures first: one representative per group goes through LSH
+        _, first, inverse = np.unique(sig, axis=0, return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        self.candidates = candidate_pairs(sig[first], self.bands, self.rows)
+        similarity = estimated_similarity(sig[first], self.candidates)
+        keep = similarity >= threshold
+        self.pairs = first[self.candidates[keep]]
+        self.similarity = similarity[keep]
+
+        # Clusters: union of identical groups and verified pairs
+        parent = list(range(len(first)))
+
+        def root(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in self.candidates[keep]:
+            parent[root(i)] = root(j)
+        roots = np.array([root(i) for i in range(len(first))], dtype=np.int64)
+        labels = roots[inverse]
+        order = np.argsort(labels, kind='stable')
+        edges = np.flatnonzero(np.diff(labels[order])) + 1
+        self.clusters = sorted((group.tolist() for group in np.split(order, edges) if len(group) > 1),
+                               key=len, reverse=True)
+        self.duplicate_pages = len(sig) - len(first)
+        self.seconds = time.perf_counter() - started
+
+    def thin_pages(self) -> List[int]:
+        return np.flatnonzero(self.words < THIN_WORDS).tolist()
+
+    def to_json(self, limit: int = 100) -> Dict[str, Any]:
+        order = np.argsort(-self.similarity, kind='stable')[:limit]
+        thin = self.thin_pages()
+        return {
+            'pages': len(self.pages),
+            'threshold': self.threshold,
+            'shingle_size': SHINGLE_SIZE,
+            'lsh': {'bands': self.bands, 'rows': self.rows,
+                    'candidate_pairs': len(self.candidates)},
+            'identical_signature_pages': self.duplicate_pages,
+            'similar_pairs': len(self.pairs),
+            'pages_in_clusters': sum(len(cluster) for cluster in self.clusters),
+            'clusters': [{'size': len(cluster), 'pages': [self.pages[i] for i in cluster[:20]]}
+                         for cluster in self.clusters[:limit]],
+            'top_pairs': [{'a': self.pages[self.pairs[k][0]], 'b': self.pages[self.pairs[k][1]],
+                           'similarity': round(float(self.similarity[k]), 3)} for k in order],
+            'thin_pages': len(thin),
+            'thin_examples': [{'page': self.pages[i], 'words': int(self.words[i])} for i in thin[:limit]],
+            'median_words': float(np.median(self.words)) if len(self.words) else 0,
+        }
+
+
+def sign_pages(kind: str, items: List[str], workers: int = 0, shingle_size: int = SHINGLE_SIZE,
+               num_perm: int = NUM_PERM) -> Tuple[np.ndarray, np.ndarray]:
+    """Signatures of all pages, chunked over a process pool"""
+    workers = workers or os.cpu_count() or 1
+    work = partial(_sign_chunk, kind, shingle_size=shingle_size, num_perm=num_perm, seed=SEED)
+    if workers == 1:
+        parts = list(map(work, _chunks(items, CHUNK_SIZE)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(work, _chunks(items, CHUNK_SIZE)))
+    if not parts:
+        return np.empty((0, num_perm), dtype=np.uint32), np.empty(0, dtype=np.int64)
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+
+def pages_from_db(db_path: str) -> Tuple[List[str], List[str]]:
+    """(keywords, bodies) of the cached page_content rows"""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("""
+            SELECT keyword, COALESCE(headline, '') || ' ' || COALESCE(subheadline, '') || ' ' ||
+                   COALESCE(body_content, '') || ' ' || COALESCE(cta_text, '')
+            FROM page_content ORDER BY keyword
+        """).fetchall()
+    finally:
+        conn.close()
+    return [row[0] for row in rows], [row[1] for row in rows]
+
+
+def html_files(directory: str) -> List[str]:
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(directory)
+                  for name in names if name.endswith(('.html', '.htm')))
+
+
+def benchmark(pages: int = 100000, copies: int = 1000):
+    """Report over rendered synthetic pages with planted near-duplicates"""
+    import random
+    from corpus_merge import iter_source
+    from keyword_matcher import _synthetic_corpus
+
+    rng = random.Random(SEED)
+    keywords = _synthetic_corpus(list(iter_source('src/index.js')), pages - copies)
+    started = time.perf_counter()
+    texts = [_render(keyword) for keyword in keywords]
+    render_seconds = time.perf_counter() - started
+    # Planted pairs: a rendered page with a paragraph of boilerplate appended
+    # and one word changed, the kind of near-copy a template edit produces
+    boilerplate = ("Compare coverage options deductibles and reimbursement rates from top providers. "
+                   "Every plan listed here covers accidents illnesses and emergency care. ") * 2
+    planted = rng.sample(range(len(texts)), copies)
+    for i in planted:
+        words = (texts[i] + boilerplate).split()
+        words[rng.randrange(len(words))] = 'changed'
+        texts.append(' '.join(words))
+        texts[i] += boilerplate
+        keywords.append(keywords[i] + ' (copy)')
+
+    started = time.perf_counter()
+    sig, words = sign_pages('text', texts)
+    sign_seconds = time.perf_counter() - started
+    report = NearDuplicateReport(keywords, sig, words)
+    cluster_of = {page: n for n, cluster in enumerate(report.clusters) for page in cluster}
+    offset = len(texts) - copies
+    recall = sum(cluster_of.get(i, -1) == cluster_of.get(offset + n, -2)
+                 for n, i in enumerate(planted)) / copies
+
+    # Exact Jaccard on sampled reported pairs, and the cost of the all-pairs approach
+    def shingle_set(text: str) -> set:
+        tokens = page_words(text)
+        return {' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(len(tokens) - SHINGLE_SIZE + 1, 1))}
+
+    sample = rng.sample(range(len(report.pairs)), min(2000, len(report.pairs)))
+    exact = []
+    for k in sample:
+        a, b = (shingle_set(texts[i]) for i in report.pairs[k])
+        exact.append(len(a & b) / len(a | b))
+    sets = [shingle_set(texts[rng.randrange(len(texts))]) for _ in range(400)]
+    started = time.perf_counter()
+    for a, b in zip(sets[::2], sets[1::2]):
+        len(a & b) / len(a | b)
+    pair_seconds = (time.perf_counter() - started) / 200
+    all_pairs = len(texts) * (len(texts) - 1) / 2
+
+    print(f"Benchmark: {len(texts):,} rendered pages ({copies} planted near-copies), "
+          f"{os.cpu_count()} CPUs")
+    print(f"  render {render_seconds:.1f} s, MinHash signatures {sign_seconds:.1f} s "
+          f"({sign_seconds / len(texts) * 1e6:.0f} µs per page), LSH + verify {report.seconds:.1f} s")
+    print(f"  LSH {report.bands} bands x {report.rows} rows: {len(report.candidates):,} candidate pairs "
+          f"of {all_pairs:,.0f}")
+    print(f"  {len(report.pairs):,} pairs >= {report.threshold}, {len(report.clusters):,} clusters, "
+          f"{report.duplicate_pages:,} pages with identical signatures")
+    print(f"  planted copies clustered with their original: {recall:.1%}")
+    if exact:
+        print(f"  exact Jaccard of {len(exact)} sampled reported pairs: min {min(exact):.3f}, "
+              f"{sum(e >= report.threshold - 0.05 for e in exact) / len(exact):.1%} >= "
+              f"{report.threshold - 0.05:.2f}")
+    print(f"  all-pairs exact Jaccard: {pair_seconds * 1e6:.0f} µs per pair, "
+          f"~{all_pairs * pair_seconds / 60:,.0f} min for this corpus on one core")
+    print(f"  thin pages (< {THIN_WORDS} words): {len(report.thin_pages()):,}, "
+          f"median {np.median(words):.0f} words")
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(int(args[1]) if len(args) > 1 else 100000)
+        return
+
+    options = {'--db': None, '--html': None, '--threshold': None, '--workers': None,
+               '--report': 'near_duplicates.json'}
+    for flag in options:
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = args[i + 1]
+            del args[i:i + 2]
+    threshold = float(options['--threshold'] or DEFAULT_THRESHOLD)
+    workers = int(options['--workers'] or 0)
+
+    started = time.perf_counter()
+    if options['--db']:
+        pages, texts = pages_from_db(options['--db'])
+        sig, words = sign_pages('text', texts, workers)
+    elif options['--html']:
+        pages = html_files(options['--html'])
+        sig, words = sign_pages('file', pages, workers)
+    else:
+        from content_warmup import _unique
+        pages = list(_unique(args or DEFAULT_SOURCES))
+        sig, words = sign_pages('keyword', pages, workers)
+    report = NearDuplicateReport(pages, sig, words, threshold)
+    result = report.to_json()
+    result['seconds'] = round(time.perf_counter() - started, 1)
+
+    with open(options['--report'], 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"{result['pages']:,} pages: {result['identical_signature_pages']:,} identical, "
+          f"{result['similar_pairs']:,} more pairs >= {threshold}, "
+          f"{len(report.clusters):,} clusters ({result['pages_in_clusters']:,} pages), "
+          f"{result['thin_pages']:,} thin pages in {result['seconds']}s -> {options['--report']}")
+    for cluster in result['clusters'][:5]:
+        print(f"  {cluster['size']:>6} pages: {', '.join(cluster['pages'][:3])}, ...")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
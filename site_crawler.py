@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Full-site deployment verification crawler.
+Fetches every /page/{n} in the expected range over keep-alive connections
+with bounded async concurrency and a per-host rate limit, and records the
+status, latency, size, body hash and "Page N of M" footer of each page in
+a JSONL checkpoint, so an interrupted crawl resumes where it stopped.
+
+Usage:
+    python site_crawler.py [--base-url URL] [--start 1] [--end N]
+                           [--concurrency 32] [--rate 50]
+                           [--checkpoint crawl-results.jsonl] [--fresh]
+    python site_crawler.py --benchmark [pages]
+
+--end defaults to the number of keywords in src/index.js and --rate is in
+requests per second per host (0 = unlimited).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import ssl
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from deploy_probe import DEFAULT_BASE_URL
+
+DEFAULT_CHECKPOINT = 'crawl-results.jsonl'
+DEFAULT_CONCURRENCY = 32
+DEFAULT_RATE = 50.0
+DEFAULT_TIMEOUT = 20.0
+MAX_ATTEMPTS = 3
+FLUSH_EVERY = 100
+
+_PAGE_MARKER = re.compile(rb'Page (\d+) of (\d+)')
+
+
+class TokenBucket:
+    """Requests-per-second limit shared by the workers hitting one host"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostConnection:
+    """One keep-alive HTTP/1.1 connection used by a single worker"""
+
+    def __init__(self, scheme: str, host: str, port: int, timeout: float):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        # Host header: IPv6 literals in brackets, the port unless it is the scheme's default
+        name = f"[{host}]" if ':' in host else host
+        default_port = 443 if scheme == 'https' else 80
+        self.host_header = name if port == default_port else f"{name}:{port}"
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.connects = 0
+
+    async def _connect(self):
+        ssl_context = ssl.create_default_context() if self.scheme == 'https' else None
+        self.reader, self.writer = await asyncio.open_connection(
+            self.host, self.port, ssl=ssl_context,
+            server_hostname=self.host if ssl_context else None,
+        )
+        self.connects += 1
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def get(self, path: str) -> Tuple[int, bytes]:
+        """GET ``path``; returns (status, body)"""
+        if self.writer is None:
+            await asyncio.wait_for(self._connect(), self.timeout)
+        request = (f"GET {path} HTTP/1.1\r\nHost: {self.host_header}\r\n"
+                   f"User-Agent: site-crawler/1.0\r\nAccept-Encoding: identity\r\n"
+                   f"Connection: keep-alive\r\n\r\n")
+        self.writer.write(request.encode('latin-1'))
+        try:
+            return await asyncio.wait_for(self._read_response(), self.timeout)
+        except BaseException:
+            self.close()
+            raise
+
+    async def _read_response(self) -> Tuple[int, bytes]:
+        reader = self.reader
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed by server")
+        version, status = status_line.split(None, 2)[:2]
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            parts = []
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass  # Trailers
+                    break
+                parts.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            body = b''.join(parts)
+        elif 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        else:
+            body = await reader.read()
+            self.close()
+
+        if headers.get('connection', '').lower() == 'close' or version != b'HTTP/1.1':
+            self.close()
+        return int(status), body
+
+
+class SiteCrawler:
+    """Verify /page/{start..end} and record the result of every page"""
+
+    def __init__(self, base_url: Optional[str] = None, start: int = 1, end: int = 1,
+                 concurrency: int = DEFAULT_CONCURRENCY, rate: float = DEFAULT_RATE,
+                 checkpoint_path: str = DEFAULT_CHECKPOINT, timeout: float = DEFAULT_TIMEOUT):
+        self.base_url = (base_url or os.environ.get('DEPLOY_BASE_URL')
+                         or DEFAULT_BASE_URL).rstrip('/')
+        parts = urlsplit(self.base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.prefix = parts.path
+        self.start = start
+        self.end = end
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.checkpoint_path = checkpoint_path
+        # Keyed by host so a crawl spanning hosts keeps separate limits
+        self.buckets: Dict[str, TokenBucket] = {self.host: TokenBucket(rate)}
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.crawled = 0
+        self.connections = 0
+
+    def load_checkpoint(self) -> Set[int]:
+        """Pages already verified OK by an earlier run (failures are retried)"""
+        done: Set[int] = set()
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line of an interrupted run
+                    self.results[record['page']] = record
+        except OSError:
+            return done
+        for page, record in self.results.items():
+            if record.get('ok'):
+                done.add(page)
+        return done
+
+    def check(self, page: int, status: int, body: bytes, seconds: float) -> Dict[str, Any]:
+        match = _PAGE_MARKER.search(body)
+        shown_page = int(match.group(1)) if match else None
+        record = {
+            'page': page,
+            'status': status,
+            'latency_ms': round(seconds * 1000, 1),
+            'bytes': len(body),
+            'sha256': hashlib.sha256(body).hexdigest(),
+            'footer_page': shown_page,
+            'footer_total': int(match.group(2)) if match else None,
+            'checked_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        record['ok'] = status == 200 and shown_page == page
+        return record
+
+    async def _fetch(self, conn: HostConnection, page: int) -> Dict[str, Any]:
+        error = None
+        for _ in range(MAX_ATTEMPTS):
+            await self.buckets[conn.host].acquire()
+            started = time.perf_counter()
+            try:
+                status, body = await conn.get(f"{self.prefix}/page/{page}")
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                # A server closing an idle keep-alive connection lands here too
+                error = f"{type(e).__name__}: {e}"
+                continue
+            return self.check(page, status, body, time.perf_counter() - started)
+        return {'page': page, 'status': None, 'ok': False, 'error': error,
+                'checked_at': datetime.now().isoformat(timespec='seconds')}
+
+    async def _worker(self, queue: asyncio.Queue, out: asyncio.Queue):
+        conn = HostConnection(self.scheme, self.host, self.port, self.timeout)
+        try:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    return
+                await out.put(await self._fetch(conn, page))
+        finally:
+            self.connections += conn.connects
+            conn.close()
+
+    async def _writer(self, out: asyncio.Queue, total: int):
+        with open(self.checkpoint_path, 'a') as f:
+            last_report = time.monotonic()
+            while True:
+                record = await out.get()
+                if record is None:
+                    return
+                self.results[record['page']] = record
+                self.crawled += 1
+                f.write(json.dumps(record) + '\n')
+                if self.crawled % FLUSH_EVERY == 0:
+                    f.flush()
+                if time.monotonic() - last_report >= 5:
+                    last_report = time.monotonic()
+                    print(f"  {self.crawled}/{total} pages checked")
+
+    async def run(self, resume: bool = True) -> Dict[str, Any]:
+        done = self.load_checkpoint() if resume else set()
+        if not resume and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        pages = [p for p in range(self.start, self.end + 1) if p not in done]
+        print(f"Crawling {len(pages)} pages of {self.base_url} "
+              f"({len(done)} already verified, concurrency {self.concurrency}, "
+              f"rate {self.buckets[self.host].rate or 'unlimited'}/s)")
+
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        out: asyncio.Queue = asyncio.Queue()
+        writer = asyncio.create_task(self._writer(out, len(pages)))
+        workers = [asyncio.create_task(self._worker(queue, out))
+                   for _ in range(min(self.concurrency, len(pages)) or 1)]
+        for page in pages:
+            await queue.put(page)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        await out.put(None)
+        await writer
+        return self.summary(time.perf_counter() - started)
+
+    def summary(self, seconds: float) -> Dict[str, Any]:
+        records = [self.results[p] for p in range(self.start, self.end + 1) if p in self.results]
+        failed = [r['page'] for r in records if not r.get('ok')]
+        latencies = sorted(r['latency_ms'] for r in records if r.get('latency_ms') is not None)
+        hashes = Counter(r['sha256'] for r in records if r.get('status') == 200)
+
+        def percentile(q: float) -> Optional[float]:
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+
+        return {
+            'base_url': self.base_url,
+            'range': [self.start, self.end],
+            'checked': len(records),
+            'ok': len(records) - len(failed),
+            'failed': len(failed),
+            'failed_ranges': _ranges(failed),
+            'status_counts': dict(Counter(str(r.get('status')) for r in records)),
+            'footer_totals': dict(Counter(str(r.get('footer_total')) for r in records
+                                          if r.get('footer_total'))),
+            'duplicate_bodies': sum(n - 1 for n in hashes.values() if n > 1),
+            'latency_ms': {'p50': percentile(0.5), 'p95': percentile(0.95),
+                           'p99': percentile(0.99)},
+            'crawled_this_run': self.crawled,
+            'connections': self.connections,
+            'seconds': round(seconds, 2),
+            'pages_per_second': round(self.crawled / seconds, 1) if seconds else None,
+        }
+
+
+def _ranges(pages: List[int]) -> List[str]:
+    """[3, 4, 5, 9] -> ['3-5', '9']"""
+    ranges = []
+    for page in sorted(pages):
+        if ranges and ranges[-1][1] == page - 1:
+            ranges[-1][1] = page
+        else:
+            ranges.append([page, page])
+    return [f"{a}-{b}" if a != b else str(a) for a, b in ranges]
+
+
+def print_summary(summary: Dict[str, Any]):
+    print("-" * 60)
+    print(f"{summary['base_url']} pages {summary['range'][0]}-{summary['range'][1]}")
+    print(f"  verified OK: {summary['ok']}/{summary['checked']}")
+    if summary['failed']:
+        shown = ', '.join(summary['failed_ranges'][:20])
+        print(f"  FAILED: {summary['failed']} ({shown}{', ...' if len(summary['failed_ranges']) > 20 else ''})")
+    print(f"  status codes: {summary['status_counts']}")
+    print(f"  footer totals: {summary['footer_totals']}")
+    print(f"  duplicate bodies: {summary['duplicate_bodies']}")
+    lat = summary['latency_ms']
+    print(f"  latency p50/p95/p99: {lat['p50']}/{lat['p95']}/{lat['p99']} ms")
+    print(f"  this run: {summary['crawled_this_run']} pages in {summary['seconds']}s "
+          f"({summary['pages_per_second']} pages/s, {summary['connections']} connections)")
+
+
+def benchmark(pages: int = 10000):
+    """Crawl a local stub server with a hole in the deployed range"""
+    import tempfile
+    from deploy_probe import run_stub_server
+
+    deployed = pages - 25  # The last 25 pages 404
+    server = run_stub_server(total_pages=deployed, body_kb=4)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    checkpoint = os.path.join(tempfile.mkdtemp(), 'crawl.jsonl')
+    try:
+        crawler = SiteCrawler(base_url, 1, pages, concurrency=32, rate=0,
+                              checkpoint_path=checkpoint)
+        print_summary(asyncio.run(crawler.run()))
+
+        print("\nResuming from the checkpoint (only failed pages are re-crawled):")
+        crawler = SiteCrawler(base_url, 1, pages, concurrency=32, rate=0,
+                              checkpoint_path=checkpoint)
+        print_summary(asyncio.run(crawler.run()))
+    finally:
+        server.shutdown()
+        os.remove(checkpoint)
+        os.rmdir(os.path.dirname(checkpoint))
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(int(args[1]) if len(args) > 1 else 10000)
+        return
+
+    options: Dict[str, Any] = {}
+    flags = {'--base-url': ('base_url', str), '--start': ('start', int), '--end': ('end', int),
+             '--concurrency': ('concurrency', int), '--rate': ('rate', float),
+             '--checkpoint': ('checkpoint_path', str)}
+    for flag, (name, cast) in flags.items():
+        if flag in args:
+            i = args.index(flag)
+            options[name] = cast(args[i + 1])
+            del args[i:i + 2]
+    if 'end' not in options:
+        from keyword_stream import count_keywords
+        options['end'] = count_keywords('src/index.js')
+
+    crawler = SiteCrawler(**options)
+    try:
+        summary = asyncio.run(crawler.run(resume='--fresh' not in args))
+    except KeyboardInterrupt:
+        print(f"\nInterrupted after {crawler.crawled} pages; rerun to resume from "
+              f"{crawler.checkpoint_path}")
+        return
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Streaming, sharded sitemap generation.
+Streams the getAllKeywords() corpus and writes gzip-compressed sitemap
+shards of up to 50,000 URLs plus a sitemap index, using the same URLs as
+generateSitemap() in src/index.js. Memory stays constant: shard files are
+written line by line and only a digest of each shard's keywords is kept.
+A manifest of those digests lets later runs rewrite just the shards whose
+keywords changed.
+
+Usage:
+    python sitemap_gen.py [source] [--out sitemaps] [--base-url URL]
+    python sitemap_gen.py --benchmark [keywords]
+"""
+
+import gzip
+import hashlib
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from deploy_probe import DEFAULT_BASE_URL
+
+DEFAULT_OUT_DIR = 'sitemaps'
+MAX_URLS_PER_SHARD = 50000
+MANIFEST_FILE = 'manifest.json'
+INDEX_FILE = 'sitemap-index.xml'
+_HASH_BATCH = 1024
+_WRITE_BATCH = 1024
+
+# Non-keyword pages listed first by generateSitemap()
+STATIC_PATHS = [
+    ('', '1.0'),
+    ('/category/cat-insurance', '0.8'),
+    ('/category/dog-insurance', '0.8'),
+    ('/category/pet-insurance', '0.8'),
+]
+KEYWORD_PRIORITY = '0.6'
+
+_URLSET_OPEN = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+_URLSET_CLOSE = '</urlset>\n'
+
+
+def shard_name(index: int) -> str:
+    return f"sitemap-{index + 1:05d}.xml.gz"
+
+
+class SitemapGenerator:
+    """Incremental sharded sitemap writer"""
+
+    def __init__(self, out_dir: str = DEFAULT_OUT_DIR, base_url: Optional[str] = None,
+                 shard_size: int = MAX_URLS_PER_SHARD):
+        if not 0 < shard_size <= MAX_URLS_PER_SHARD:
+            raise ValueError(f"shard_size must be between 1 and {MAX_URLS_PER_SHARD}")
+        self.out_dir = out_dir
+        self.base_url = (base_url or os.environ.get('DEPLOY_BASE_URL')
+                         or DEFAULT_BASE_URL).rstrip('/')
+        self.shard_size = shard_size
+        self.manifest_path = os.path.join(out_dir, MANIFEST_FILE)
+
+    def load_manifest(self) -> List[Dict[str, Any]]:
+        """Shards of the previous run, or [] if they cannot be reused"""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if manifest.get('base_url') != self.base_url or \
+                manifest.get('shard_size') != self.shard_size:
+            return []
+        return manifest.get('shards', [])
+
+    def _shards(self, keywords: Iterable[str]) -> Iterator[Tuple[int, int, str]]:
+        """
+        (first url position, url count, digest) per shard. A shard's URLs
+        depend only on their positions, so the digest covers the keywords
+        shown on those pages plus the URL count.
+        """
+        entries = itertools.chain((path for path, _ in STATIC_PATHS), keywords)
+        start = 0
+        while True:
+            digest = hashlib.blake2b(digest_size=16)
+            count = 0
+            # Hash in small batches: constant memory, few update() calls
+            while count < self.shard_size:
+                batch = list(itertools.islice(entries, min(_HASH_BATCH, self.shard_size - count)))
+                if not batch:
+                    break
+                digest.update('\0'.join(batch).encode('utf-8'))
+                digest.update(b'\1')
+                count += len(batch)
+            if count or not start:
+                yield start, count, digest.hexdigest()
+            if count < self.shard_size:
+                return
+            start += count
+
+    def _write_shard(self, index: int, start: int, count: int, lastmod: str):
+        """Write one shard as gzip without materializing its XML"""
+        path = os.path.join(self.out_dir, shard_name(index))
+        tmp_path = path + '.tmp'
+        static_count = len(STATIC_PATHS)
+        # mtime=0 keeps the bytes identical for identical content
+        with gzip.GzipFile(tmp_path, 'wb', compresslevel=6, mtime=0) as raw, \
+                io.TextIOWrapper(raw, encoding='utf-8') as f:
+            f.write(_URLSET_OPEN)
+            base = escape(self.base_url)
+            tail = (f"</loc>\n        <lastmod>{lastmod}</lastmod>\n"
+                    f"        <changefreq>weekly</changefreq>\n        <priority>")
+            for batch_start in range(start, start + count, _WRITE_BATCH):
+                lines = []
+                for position in range(batch_start, min(batch_start + _WRITE_BATCH, start + count)):
+                    if position < static_count:
+                        url_path, priority = STATIC_PATHS[position]
+                    else:
+                        url_path, priority = f"/{position - static_count + 1}", KEYWORD_PRIORITY
+                    lines.append(f"    <url>\n        <loc>{base}{url_path}{tail}"
+                                 f"{priority}</priority>\n    </url>\n")
+                f.write(''.join(lines))
+            f.write(_URLSET_CLOSE)
+        os.replace(tmp_path, path)
+
+    def _write_index(self, shards: List[Dict[str, Any]]):
+        path = os.path.join(self.out_dir, INDEX_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for shard in shards:
+                loc = escape(f"{self.base_url}/sitemaps/{shard['file']}")
+                f.write(f"    <sitemap>\n        <loc>{loc}</loc>\n"
+                        f"        <lastmod>{shard['lastmod']}</lastmod>\n    </sitemap>\n")
+            f.write('</sitemapindex>\n')
+        os.replace(tmp_path, path)
+
+    def generate(self, keywords: Iterable[str], today: Optional[str] = None) -> Dict[str, Any]:
+        """Write changed shards, the index and the manifest; returns stats"""
+        started = time.perf_counter()
+        today = today or date.today().isoformat()
+        os.makedirs(self.out_dir, exist_ok=True)
+        previous = self.load_manifest()
+
+        shards: List[Dict[str, Any]] = []
+        written = urls = 0
+        for index, (start, count, digest) in enumerate(self._shards(keywords)):
+            old = previous[index] if index < len(previous) else None
+            file_name = shard_name(index)
+            if old and old['digest'] == digest and \
+                    os.path.exists(os.path.join(self.out_dir, file_name)):
+                shards.append(old)
+            else:
+                self._write_shard(index, start, count, today)
+                shards.append({'file': file_name, 'urls': count, 'digest': digest, 'lastmod': today})
+                written += 1
+            urls += count
+
+        # The corpus shrank: drop shards past the new end
+        removed = 0
+        for old in previous[len(shards):]:
+            try:
+                os.remove(os.path.join(self.out_dir, old['file']))
+                removed += 1
+            except OSError:
+                pass
+
+        index_changed = written or removed or len(previous) != len(shards)
+        if index_changed or not os.path.exists(os.path.join(self.out_dir, INDEX_FILE)):
+            self._write_index(shards)
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'base_url': self.base_url, 'shard_size': self.shard_size,
+                       'urls': urls, 'shards': shards}, f, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+        return {
+            'urls': urls,
+            'shards': len(shards),
+            'written': written,
+            'unchanged': len(shards) - written,
+            'removed': removed,
+            'seconds': round(time.perf_counter() - started, 2),
+        }
+
+
+def benchmark(total: int = 1000000):
+    """Full and incremental runs over a synthetic corpus, with peak memory"""
+    import shutil
+    import tempfile
+    import tracemalloc
+
+    def corpus(changed_page: Optional[int] = None) -> Iterator[str]:
+        for i in range(1, total + 1):
+            yield f"pet insurance keyword {i}{' (edited)' if i == changed_page else ''}"
+
+    out_dir = tempfile.mkdtemp()
+    try:
+        generator = SitemapGenerator(out_dir)
+        for label, keywords in (('full build', corpus()),
+                                ('no changes', corpus()),
+                                ('one keyword edited', corpus(changed_page=total // 2))):
+            stats = generator.generate(keywords)
+            print(f"{label:<20} {stats['urls']} URLs, {stats['written']}/{stats['shards']} shards "
+                  f"written in {stats['seconds']}s")
+        size = sum(os.path.getsize(os.path.join(out_dir, name)) for name in os.listdir(out_dir))
+        print(f"Output: {size / (1024 * 1024):.1f} MB on disk")
+
+        # Separate run: tracemalloc slows the timed runs down several times
+        shutil.rmtree(out_dir)
+        tracemalloc.start()
+        SitemapGenerator(out_dir).generate(corpus())
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Peak Python memory of a full build: {peak / 1024:.0f} KB")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(int(args[1]) if len(args) > 1 else 1000000)
+        return
+
+    out_dir, base_url = DEFAULT_OUT_DIR, None
+    if '--out' in args:
+        i = args.index('--out')
+        out_dir = args[i + 1]
+        del args[i:i + 2]
+    if '--base-url' in args:
+        i = args.index('--base-url')
+        base_url = args[i + 1]
+        del args[i:i + 2]
+    source = args[0] if args else 'src/index.js'
+
+    from corpus_merge import iter_source
+
+    generator = SitemapGenerator(out_dir, base_url)
+    stats = generator.generate(iter_source(source))
+    print(f"{source} → {out_dir}/{INDEX_FILE}: {stats['urls']} URLs in {stats['shards']} shards "
+          f"({stats['written']} written, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed) in {stats['seconds']}s")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -4,57 +4,34 @@ Smart auto-continue script that monitors page generation progress
 and sends continue commands when needed
 """
 
-import subprocess
 import time
-import re
 import os
 from datetime import datetime
 
+from change_monitor import KeywordProgressMonitor
+from deploy_probe import DeploymentProbe
+
 class SmartContinueBot:
     def __init__(self):
         self.index_file = '/root/million-pages/src/index.js'
-        self.base_url = 'https://petinsurance.catsluvusboardinghotel.workers.dev'
+        self.base_url = os.environ.get('DEPLOY_BASE_URL', 'https://petinsurance.catsluvusboardinghotel.workers.dev')
+        self.deploy_probe = DeploymentProbe(self.base_url)
         self.target_pages = 5000
         self.continue_interval = 45  # seconds
+        self.progress = KeywordProgressMonitor(self.index_file)
         self.last_known_count = self.get_keyword_count()
         self.stall_counter = 0
         self.max_stalls = 3
         
     def get_keyword_count(self):
         """Count keywords in the index.js file"""
-        try:
-            with open(self.index_file, 'r') as f:
-                content = f.read()
-            
-            # Find the getAllKeywords function
-            match = re.search(r'function getAllKeywords\(\)\s*\{[\s\S]*?return\s*\[([\s\S]*?)\];', content)
-            if match:
-                keywords_section = match.group(1)
-                # Count quoted strings, excluding comments
-                keywords = re.findall(r'"[^"]+"\s*,?(?:\s*//[^\n]*)?', keywords_section)
-                # Filter out pure comment lines
-                keywords = [k for k in keywords if '"' in k]
-                return len(keywords)
-        except Exception as e:
-            print(f"Error reading keywords: {e}")
-        return 0
+        return self.progress.count
     
     def check_deployed_pages(self):
         """Check how many pages are actually deployed"""
-        try:
-            # Check a page we know should exist to get the total
-            test_page = min(2000, self.last_known_count)
-            cmd = f'curl -s {self.base_url}/page/{test_page} | grep -o "Page [0-9]* of [0-9]*"'
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            
-            if result.stdout:
-                match = re.search(r'Page \d+ of (\d+)', result.stdout)
-                if match:
-                    total = int(match.group(1))
-                    return total - 3  # Subtract static pages
-        except Exception as e:
-            print(f"Error checking deployment: {e}")
-        return 0
+        # Check a page we know should exist to get the total
+        test_page = min(2000, self.last_known_count)
+        return self.deploy_probe.deployed_pages(test_page)
     
     def send_continue(self):
         """Send the continue command"""
@@ -77,15 +54,18 @@ class SmartContinueBot:
         print("-" * 60)
         
         while self.last_known_count < self.target_pages:
-            # Wait before checking
-            time.sleep(self.continue_interval)
-            
-            # Check current state
-            current_count = self.get_keyword_count()
-            deployed_count = self.check_deployed_pages()
+            # Wake on the next keyword change, or after the interval to
+            # check the deployment and count a stall
+            event = self.progress.wait(timeout=self.continue_interval)
             
-            # Use the maximum of the two
-            actual_count = max(current_count, deployed_count)
+            if event is not None:
+                actual_count = event.count
+            else:
+                current_count = self.get_keyword_count()
+                deployed_count = self.check_deployed_pages()
+                
+                # Use the maximum of the two
+                actual_count = max(current_count, deployed_count)
             
             timestamp = datetime.now().strftime('%H:%M:%S')
             
@@ -95,7 +75,7 @@ class SmartContinueBot:
                 print(f"[{timestamp}] ✅ Progress: +{added} keywords (Total: {actual_count})")
                 self.last_known_count = actual_count
                 self.stall_counter = 0
-            else:
+            elif event is None:
                 # No progress
                 self.stall_counter += 1
                 print(f"[{timestamp}] ⏸️  No progress detected (Stall #{self.stall_counter})")
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Typo-tolerant token lookup with a precomputed deletion index (SymSpell).
+Every corpus token contributes all strings reachable by deleting up to
+max_distance characters from its first prefix_length characters. A
+misspelled token generates its own deletes and meets its candidates in
+that map, so a lookup costs a bounded number of dict probes and a few
+edit-distance checks instead of a pass over the vocabulary.
+
+SpellIndex is shared by keyword_matcher (landing-page terms) and
+gap_watch --fuzzy (gap candidates that only differ from a corpus keyword
+by a typo).
+
+Usage:
+    python spell_index.py [--source src/index.js] <search term>
+    python spell_index.py --benchmark [source ...]
+"""
+
+import sys
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from google_ads_tracker import canonical_keyword
+
+DEFAULT_SOURCE = 'src/index.js'
+MAX_DISTANCE = 2
+PREFIX_LENGTH = 7  # Deletes are taken from this prefix only
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Optimal string alignment distance (adjacent swaps cost 1), capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    # A typo leaves most of the word alone: only align the differing middle
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    before: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1,
+                        previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before[j - 2] + 1)
+            current[j] = value
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def _deletes(word: str, distance: int) -> Set[str]:
+    """word and every string made by deleting up to distance characters"""
+    result = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        result |= frontier
+    return result
+
+
+class SpellIndex:
+    """Token -> closest corpus token, by edit distance then corpus frequency"""
+
+    def __init__(self, counts: Dict[str, int], max_distance: int = MAX_DISTANCE,
+                 prefix_length: int = PREFIX_LENGTH):
+        started = time.perf_counter()
+        self.counts = counts
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._deletes: Dict[str, List[str]] = {}
+        for token in counts:
+            if not self._correctable(token):
+                continue
+            for delete in _deletes(token[:prefix_length], self._allowed(token)):
+                self._deletes.setdefault(delete, []).append(token)
+        self.build_seconds = time.perf_counter() - started
+
+    @classmethod
+    def from_keywords(cls, keywords: Iterable[str], **options) -> 'SpellIndex':
+        """Index of the canonical tokens of a keyword corpus"""
+        counts: Counter = Counter()
+        for keyword in keywords:
+            counts.update((canonical_keyword.__wrapped__(keyword) or '').split())
+        return cls(dict(counts), **options)
+
+    def __len__(self) -> int:
+        return len(self._deletes)
+
+    @staticmethod
+    def _correctable(token: str) -> bool:
+        # Numbers, ages and prices are not typos of each other
+        return len(token) >= 4 and not any(c.isdigit() for c in token)
+
+    def _allowed(self, token: str) -> int:
+        """Edits tolerated for a token of this length"""
+        return 1 if len(token) < 8 else self.max_distance
+
+    def lookup(self, token: str) -> Optional[Tuple[str, int]]:
+        """(corpus token, distance) closest to token, or None"""
+        if token in self.counts:
+            return token, 0
+        if not self._correctable(token):
+            return None
+        allowed = self._allowed(token)
+        seen = set()
+        best: Optional[Tuple[int, int, str]] = None
+        for delete in _deletes(token[:self.prefix_length], allowed):
+            for candidate in self._deletes.get(delete, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = edit_distance(token, candidate, allowed)
+                if distance > allowed:
+                    continue
+                rank = (distance, -self.counts[candidate], candidate)
+                if best is None or rank < best:
+                    best = rank
+        return (best[2], best[0]) if best else None
+
+    def correct_token(self, token: str) -> str:
+        """Closest corpus token, or token itself when nothing is close"""
+        found = self.lookup(token)
+        return found[0] if found else token
+
+    def correct(self, text: Optional[str]) -> Optional[str]:
+        """Canonical form of text with every token corrected"""
+        key = canonical_keyword(text) if text else None
+        if not key:
+            return None
+        return ' '.join(self.correct_token(token) for token in key.split())
+
+
+def _typo(word: str, rng) -> str:
+    """One random edit: deletion, insertion, substitution or adjacent swap"""
+    i = rng.randrange(len(word))
+    kind = rng.randrange(4)
+    letter = rng.choice('abcdefghijklmnopqrstuvwxyz')
+    if kind == 0:
+        return word[:i] + word[i + 1:]
+    if kind == 1:
+        return word[:i] + letter + word[i:]
+    if kind == 2:
+        return word[:i] + letter + word[i + 1:]
+    if i == len(word) - 1:
+        i -= 1
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def benchmark(sources: List[str], samples: int = 2000):
+    import random
+    import tracemalloc
+    from corpus_merge import iter_source
+
+    rng = random.Random(47)
+    keywords = [keyword for source in sources for keyword in iter_source(source)]
+    tracemalloc.start()
+    index = SpellIndex.from_keywords(keywords)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    vocabulary = [token for token in index.counts if index._correctable(token)]
+    print(f"Benchmark: {len(keywords):,} keywords, {len(index.counts):,} tokens, "
+          f"{len(index):,} delete entries")
+    print(f"  build {index.build_seconds * 1000:.0f} ms, {memory / 2**20:.1f} MB (tracemalloc)")
+
+    words = [rng.choice(vocabulary) for _ in range(samples)]
+    typos = [_typo(word, rng) for word in words]
+    started = time.perf_counter()
+    corrected = [index.correct_token(typo) for typo in typos]
+    seconds = (time.perf_counter() - started) / samples
+    # A typo can land on another valid token ("cats" -> "cat"): count those apart
+    valid = sum(typo in index.counts for typo in typos)
+    right = sum(c == w for c, w, t in zip(corrected, words, typos) if t not in index.counts)
+    print(f"  {samples} single-edit typos: {seconds * 1e6:.0f} µs per lookup, "
+          f"{right / (samples - valid):.1%} restored ({valid} typos were valid tokens)")
+
+    brute = typos[:100]
+    started = time.perf_counter()
+    for typo in brute:
+        min(vocabulary, key=lambda word: edit_distance(typo, word, MAX_DISTANCE))
+    print(f"  edit distance against every token: "
+          f"{(time.perf_counter() - started) / len(brute) * 1e3:.1f} ms per lookup")
+
+    for term in ("golden retreiver hip displasia insurance", "chepest cat insurence",
+                 "pet insurnace for senoir dogs"):
+        print(f"  {term!r} -> {index.correct(term)!r}")
+
+
+def main(argv: List[str]) -> None:
+    args = list(argv)
+    if args and args[0] == '--benchmark':
+        benchmark(args[1:] or [DEFAULT_SOURCE])
+        return
+    source = DEFAULT_SOURCE
+    if '--source' in args:
+        i = args.index('--source')
+        source = args[i + 1]
+        del args[i:i + 2]
+    if not args:
+        print("Usage: python spell_index.py [--source src/index.js] <search term>")
+        return
+
+    from corpus_merge import iter_source
+    index = SpellIndex.from_keywords(iter_source(source))
+    print(index.correct(' '.join(args)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
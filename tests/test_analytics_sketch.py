@@ -0,0 +1,34 @@
+import threading
+import unittest
+
+from analytics_sketch import LiveAnalytics
+
+
+class ConcurrentQueryTest(unittest.TestCase):
+
+    def test_query_today_while_clicks_arrive(self):
+        live = LiveAnalytics(snapshot_dir=None, capacity=100000)
+        self.addCleanup(live.close)
+        for i in range(100):
+            live.record_click(f"s{i}", {'keyword': f"keyword {i}", 'campaign': f"c{i % 7}"})
+        stop = threading.Event()
+
+        def feed():
+            i = 100
+            while not stop.is_set():
+                live.record_click(f"s{i}", {'keyword': f"keyword {i}", 'campaign': f"c{i % 7}"})
+                i += 1
+
+        feeder = threading.Thread(target=feed)
+        feeder.start()
+        try:
+            for _ in range(500):
+                result = live.query(1)
+                self.assertEqual(len(result['top_keywords']), 10)
+        finally:
+            stop.set()
+            feeder.join()
+
+
+if __name__ == '__main__':
+    unittest.main()
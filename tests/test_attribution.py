@@ -0,0 +1,60 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+try:
+    import numpy  # noqa: F401
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from attribution import NOT_SET, load_clicks, load_conversions
+from web_app_integration import GoogleAdsWebIntegration
+
+CLICKS = [('s1', '2025-03-01 10:00:00', 'cat insurance', '10.0.0.1', 'Mozilla/5.0'),
+          ('s2', '2025-03-01 11:00:00', None, '10.0.0.2', 'Mozilla/5.0'),
+          ('s3', '2025-03-02 09:30:00', 'dog insurance', '10.0.0.1', 'Mozilla/5.0'),
+          ('s4', '2025-03-02 12:00:00', 'cat insurance', '10.0.0.1', None),
+          ('s5', '2025-03-03 08:15:00', 'dog insurance', '10.0.0.2', 'Mozilla/5.0')]
+
+
+def epoch(text: str) -> int:
+    return int(datetime.strptime(text, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc).timestamp())
+
+
+@unittest.skipIf(numpy is None, "attribution requires numpy")
+class BulkLoadTest(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        self.db_path = os.path.join(workdir, 'clicks.db')
+        GoogleAdsWebIntegration(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.executemany("""
+            INSERT INTO click_data (session_id, timestamp, keyword, ip_address, user_agent)
+            VALUES (?, ?, ?, ?, ?)
+        """, CLICKS)
+        conn.executemany("INSERT INTO conversions (session_id, timestamp, conversion_value) VALUES (?, ?, ?)",
+                         [('s3', '2025-03-04 10:00:00', 50.0), ('missing', '2025-03-04 10:00:00', 10.0)])
+        conn.commit()
+        conn.close()
+
+    def test_chunked_columns_match_rows(self):
+        clicks = load_clicks(self.db_path, chunk_size=2)
+        names = [clicks.keyword_names[code] for code in clicks.keyword]
+        self.assertEqual(names, [keyword or NOT_SET for _, _, keyword, _, _ in CLICKS])
+        self.assertEqual(clicks.timestamp.tolist(), [epoch(ts) for _, ts, _, _, _ in CLICKS])
+        self.assertEqual(clicks.visitor.tolist(), [0, 1, 0, 2, 1])
+        self.assertEqual(clicks.visitor_codes[('10.0.0.1', None)], 2)
+
+        visitor, timestamp, value, unmatched = load_conversions(self.db_path, clicks)
+        self.assertEqual((visitor.tolist(), timestamp.tolist(), value.tolist(), unmatched),
+                         ([0], [epoch('2025-03-04 10:00:00')], [50.0], 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
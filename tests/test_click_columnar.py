@@ -0,0 +1,81 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+try:
+    import numpy  # noqa: F401
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    from click_columnar import DAY, ColumnarClickStore, _epoch
+from web_app_integration import GoogleAdsWebIntegration
+
+REQUEST = {'ip_address': '10.0.0.1', 'user_agent': 'Mozilla/5.0'}
+
+
+def sql_time(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+@unittest.skipIf(numpy is None, "click_columnar requires numpy")
+class RepeatGclidAcrossDaysTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        self.db_path = os.path.join(self.workdir, 'clicks.db')
+        self.tracker = GoogleAdsWebIntegration(self.db_path)
+        self.store = ColumnarClickStore(os.path.join(self.workdir, 'columns'))
+
+    def click(self, gclid: str):
+        return {'keyword': 'cat insurance', 'gclid': gclid, 'url': f'/?gclid={gclid}'}
+
+    def test_upserted_repeat_is_counted_once(self):
+        day = _epoch('2025-03-01')
+        self.tracker.save_click_batch([
+            ('s1', sql_time(day + 3600), self.click('g1'), REQUEST),
+            ('s2', sql_time(day + 7200), self.click('g2'), REQUEST),
+        ])
+        self.store.compact(self.db_path, now=day + DAY + 7200)
+
+        # g1 comes back the next day: its row moves to day + 1
+        self.tracker.save_click_batch([
+            ('s3', sql_time(day + DAY + 3600), self.click('g1'), REQUEST),
+            ('s4', sql_time(day + DAY + 7200), self.click('g3'), REQUEST),
+        ])
+        stats = self.store.compact(self.db_path, now=day + 2 * DAY + 7200)
+
+        self.assertEqual(stats['rows_already_compacted'], 1)
+        totals = self.store.query(group_by=())
+        self.assertEqual(totals[0]['clicks'], 3)
+
+    def test_touched_repeat_is_counted_once(self):
+        today = _epoch(datetime.now(timezone.utc).strftime('%Y-%m-%d'))
+        self.tracker.save_click_batch([
+            ('s1', sql_time(today - DAY + 3600), self.click('g1'), REQUEST),
+        ])
+        self.store.compact(self.db_path, now=today + 7200)
+
+        # save_click_data refreshes the timestamp to now
+        self.tracker.save_click_data(self.click('g1'), REQUEST)
+        stats = self.store.compact(self.db_path, now=today + DAY + 7200)
+
+        self.assertEqual(stats['rows_already_compacted'], 1)
+        self.assertEqual(self.store.query(group_by=())[0]['clicks'], 1)
+
+    def test_force_rebuild_keeps_one_copy(self):
+        day = _epoch('2025-03-01')
+        self.tracker.save_click_batch([('s1', sql_time(day + 3600), self.click('g1'), REQUEST)])
+        self.store.compact(self.db_path, now=day + DAY + 7200)
+        self.tracker.save_click_batch([('s2', sql_time(day + DAY + 3600), self.click('g1'), REQUEST)])
+        self.store.compact(self.db_path, now=day + 2 * DAY + 7200, force=True)
+
+        self.assertEqual(self.store.days(), ['2025-03-02'])
+        self.assertEqual(self.store.query(group_by=())[0]['clicks'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from click_filter import ClickFilter
+from click_shards import ShardedGoogleAdsWebIntegration
+from web_app_integration import GoogleAdsWebIntegration
+
+REQUEST = {'ip_address': '10.0.0.1', 'user_agent': 'Mozilla/5.0'}
+BOT = {'ip_address': '10.0.0.2', 'user_agent': 'Googlebot/2.1'}
+
+
+class FilteredHitSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        self.db_path = os.path.join(self.workdir, 'clicks.db')
+
+    def test_reload_keeps_the_saved_session(self):
+        tracker = GoogleAdsWebIntegration(self.db_path, click_filter=ClickFilter())
+        click = {'keyword': 'cat insurance'}
+        first = tracker.save_click_data(click, REQUEST)
+        second = tracker.save_click_data(click, REQUEST)
+        self.assertEqual(second, first)
+
+        tracker.track_conversion(second, 50)
+        self.assertIsNotNone(tracker.get_session_data(second))
+        conn = sqlite3.connect(self.db_path)
+        converted = conn.execute("SELECT SUM(converted) FROM click_data").fetchone()[0]
+        conn.close()
+        self.assertEqual(converted, 1)
+
+    def test_unknown_filtered_hit_has_no_session(self):
+        tracker = GoogleAdsWebIntegration(self.db_path, click_filter=ClickFilter())
+        self.assertIsNone(tracker.save_click_data({'keyword': 'cat insurance'}, BOT))
+
+    def test_sharded_reload_keeps_the_saved_session(self):
+        tracker = ShardedGoogleAdsWebIntegration(self.db_path, 2, click_filter=ClickFilter())
+        self.addCleanup(tracker.close)
+        click = {'keyword': 'cat insurance'}
+        first = tracker.save_click_data(click, REQUEST)
+        self.assertEqual(tracker.save_click_data(click, REQUEST), first)
+        self.assertIsNotNone(tracker.get_session_data(first))
+
+
+class ConcurrentCheckTest(unittest.TestCase):
+
+    def test_threads_share_a_full_window(self):
+        click_filter = ClickFilter(max_keys=16)
+        errors = []
+
+        def hammer(worker: int):
+            try:
+                for i in range(20000):
+                    ip = f"10.0.{worker}.{i % 64}"
+                    click_filter.check(ip, f"g{i % 48}", 'Mozilla/5.0', 1_700_000_000 + i * 0.01,
+                                       session_id=f"s{worker}-{i}")
+                    click_filter.session_for(ip, f"g{i % 48}", 'Mozilla/5.0')
+            except Exception as e:  # Surface errors from the worker threads
+                errors.append(e)
+
+        threads = [threading.Thread(target=hammer, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        stats = click_filter.stats()
+        self.assertEqual(stats.get('passed', 0) + stats['filtered'], 8 * 20000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from click_journal import JournalLoader
+from web_app_integration import GoogleAdsWebIntegration
+
+REQUEST = {'ip_address': '10.0.0.1', 'user_agent': 'Mozilla/5.0'}
+
+
+class RecordingObserver:
+    def __init__(self):
+        self.clicks = []
+
+    def record_click(self, session_id, click_data):
+        self.clicks.append(click_data.get('gclid'))
+
+    def record_conversion(self, session_id, value=0):
+        pass
+
+
+class JournalObserverTest(unittest.TestCase):
+
+    def test_repeat_gclids_are_not_counted_live(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        db_path = os.path.join(workdir, 'clicks.db')
+        journal_dir = os.path.join(workdir, 'journal')
+        observer = RecordingObserver()
+        tracker = GoogleAdsWebIntegration(db_path, gclid_bloom=True, journal_dir=journal_dir,
+                                          click_stream=observer)
+        for gclid in ('g1', 'g2', 'g1', 'g1', 'g3'):
+            tracker.save_click_data({'keyword': 'cat insurance', 'gclid': gclid}, REQUEST)
+        tracker.close()
+        JournalLoader(GoogleAdsWebIntegration(db_path), journal_dir).drain()
+
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute("SELECT COUNT(*) FROM click_data").fetchone()[0]
+        conn.close()
+        self.assertEqual(observer.clicks, ['g1', 'g2', 'g3'])
+        self.assertEqual(len(observer.clicks), rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
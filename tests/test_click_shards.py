@@ -0,0 +1,59 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from click_journal import JournalLoader
+from click_shards import ShardedGoogleAdsWebIntegration
+from google_ads_tracker import GoogleAdsDataProcessor
+
+REQUEST = {'ip_address': '10.0.0.1', 'user_agent': 'Mozilla/5.0'}
+
+
+class ShardedBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        self.tracker = ShardedGoogleAdsWebIntegration(os.path.join(self.workdir, 'clicks.db'), 4)
+        self.addCleanup(self.tracker.close)
+
+    def test_click_batch_lands_on_the_routed_shards(self):
+        clicks = [(self.tracker._generate_session_id({'gclid': f"g{i}"}, REQUEST),
+                   '2025-03-01 10:00:00', {'keyword': 'dog insurance', 'gclid': f"g{i}"}, REQUEST)
+                  for i in range(40)]
+        self.tracker.save_click_batch(clicks)
+        # A repeat GCLID goes to the shard holding it and refreshes that row
+        self.tracker.save_click_batch([(clicks[0][0], '2025-03-02 10:00:00', clicks[0][2], REQUEST)])
+
+        for session_id, _, _, _ in clicks:
+            self.assertIsNotNone(self.tracker.get_session_data(session_id))
+        self.assertEqual(self.tracker.get_analytics(days=100000)['overall_stats']['total_clicks'], 40)
+        self.assertEqual(self.tracker.get_session_data(clicks[0][0])['timestamp'], '2025-03-02 10:00:00')
+
+    def test_click_batch_rejects_a_cursor(self):
+        conn = sqlite3.connect(':memory:')
+        self.addCleanup(conn.close)
+        with self.assertRaises(ValueError):
+            self.tracker.save_click_batch([], conn.cursor())
+
+    def test_content_batch_is_readable_per_keyword(self):
+        processor = GoogleAdsDataProcessor()
+        items = [(f"cat insurance {i}", processor.generate_dynamic_content({'keyword': f"cat insurance {i}"}))
+                 for i in range(30)]
+        self.assertEqual(self.tracker.save_content_batch(items), 30)
+        self.assertEqual(self.tracker.save_content_batch(items), 0)  # Unchanged rows are skipped
+        for keyword, content in items:
+            self.assertEqual(self.tracker.get_content_for_keyword(keyword)['headline'], content['headline'])
+
+    def test_journal_mode_fails_loudly(self):
+        with self.assertRaises(ValueError):
+            ShardedGoogleAdsWebIntegration(os.path.join(self.workdir, 'other.db'), 2,
+                                           journal_dir=os.path.join(self.workdir, 'journal'))
+        with self.assertRaises(ValueError):
+            JournalLoader(self.tracker, os.path.join(self.workdir, 'journal'))
+
+
+if __name__ == '__main__':
+    unittest.main()
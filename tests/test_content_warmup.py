@@ -0,0 +1,42 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import content_warmup
+from web_app_integration import content_hash, generator_version, processor_from_env, tracker_from_env
+
+KEYWORDS = ['cat insurance', 'dog insurance for puppies', 'senior dog insurance cost',
+            'exotic pet insurance', 'cheap cat insurance']
+
+
+class WarmupLikeTheAppTest(unittest.TestCase):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        self.source = os.path.join(self.workdir, 'keywords.json')
+        with open(self.source, 'w') as f:
+            json.dump(KEYWORDS, f)
+        self.db_path = os.path.join(self.workdir, 'clicks.db')
+
+    def test_sharded_warmup_matches_app_content(self):
+        env = {'CLICK_SHARDS': '4', 'KEYWORD_CORPUS': self.source}
+        with mock.patch.dict(os.environ, env), mock.patch.object(content_warmup, '_processor', None):
+            content_warmup.main([self.source, '--db', self.db_path, '--workers', '2'])
+            tracker = tracker_from_env(self.db_path)
+            self.addCleanup(tracker.close)
+            processor = processor_from_env()
+
+        self.assertTrue(os.path.exists(os.path.join(self.workdir, 'clicks.shard00.db')))
+        for keyword in KEYWORDS:
+            rendered = processor.generate_dynamic_content({'keyword': keyword})
+            self.assertIn('page_url', rendered)  # The app's matcher was used
+            self.assertEqual(tracker.get_content_version(keyword)[0],
+                             content_hash(rendered, generator_version(processor)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from continue_daemon import Config, ContinueDaemon, DaemonState
+from deploy_probe import STATIC_PAGES, ProbeResult
+
+
+class FakeProbe:
+    def __init__(self, page: int, total: int):
+        self.page = page
+        self.total = total
+
+    def probe(self, page_number: int) -> ProbeResult:
+        return ProbeResult(f"/page/{page_number}", 200, self.page, self.total)
+
+
+class DeploymentProgressTest(unittest.TestCase):
+
+    def test_record_counts_deployed_pages_as_progress(self):
+        state = DaemonState(100)
+        state.stall_count = 1
+        self.assertTrue(state.record(100, time.time(), deployed_pages=150))
+        self.assertEqual(state.progress, 150)
+        self.assertEqual(state.stall_count, 0)
+        self.assertFalse(state.record(100, time.time(), deployed_pages=150))
+
+    def test_probe_alone_resets_stall(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        index_file = os.path.join(workdir, 'index.js')
+        with open(index_file, 'w') as f:
+            f.write("function getAllKeywords() {\n  return [\n    'a',\n    'b',\n  ];\n}\n")
+        config = Config(index_file=index_file, probe_interval=0.01, signal_file=None)
+        daemon = ContinueDaemon(config)
+        daemon.probe = FakeProbe(config.probe_page, STATIC_PAGES + 500)
+        daemon.state.last_progress_at = time.time() - 3600
+        daemon.state.stall_count = 1
+
+        async def probe_once():
+            task = asyncio.create_task(daemon.probe_deployment())
+            while daemon.state.last_probe_at is None:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        asyncio.run(probe_once())
+        self.assertEqual(daemon.state.deployed_pages, 500)
+        self.assertEqual(daemon.state.stall_count, 0)
+        self.assertGreater(daemon.state.last_progress_at, time.time() - 60)
+
+
+if __name__ == '__main__':
+    unittest.main()
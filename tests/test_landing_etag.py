@@ -0,0 +1,68 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    import flask  # noqa: F401
+except ImportError:
+    flask = None
+
+from google_ads_tracker import GoogleAdsDataProcessor
+from web_app_integration import content_hash, create_flask_integration, generator_version
+
+
+@unittest.skipIf(flask is None, "the landing page requires flask")
+class LandingPageETagTest(unittest.TestCase):
+
+    def setUp(self):
+        workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, workdir)
+        cwd = os.getcwd()
+        os.chdir(workdir)  # The app opens google_ads_clicks.db in the working directory
+        self.addCleanup(os.chdir, cwd)
+        # Close the app's trackers here, not at exit in another directory
+        closers = []
+        self.addCleanup(lambda: [close() for close in closers])
+        patcher = mock.patch('atexit.register', side_effect=closers.append)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = create_flask_integration().test_client()
+        self.hits = 0
+
+    def get(self, headers=None, client=None):
+        self.hits += 1
+        return (client or self.client).get('/?utm_term=cat+insurance', headers=headers or {},
+                               environ_base={'REMOTE_ADDR': f'10.0.0.{self.hits}'})
+
+    def test_unchanged_content_is_not_modified(self):
+        etag = self.get().headers['ETag']
+        with mock.patch.object(GoogleAdsDataProcessor, 'generate_dynamic_content',
+                               side_effect=AssertionError("generated for a 304")):
+            self.assertEqual(self.get({'If-None-Match': etag}).status_code, 304)
+
+    def test_generator_change_invalidates_etag_and_stored_row(self):
+        first = self.get()
+        with mock.patch.object(GoogleAdsDataProcessor, '_generate_meta_description',
+                               lambda self, keyword: f"New description for {keyword}"):
+            # A deploy with the new generator starts a new app
+            client = create_flask_integration().test_client()
+            generator = generator_version(GoogleAdsDataProcessor())
+            second = self.get({'If-None-Match': first.headers['ETag']}, client)
+        self.assertEqual(second.status_code, 200)
+        self.assertIn(b'New description for cat insurance', second.data)
+        self.assertNotEqual(second.headers['ETag'], first.headers['ETag'])
+
+        expected = GoogleAdsDataProcessor().generate_dynamic_content({'keyword': 'cat insurance'})
+        expected['meta_description'] = "New description for cat insurance"
+        conn = sqlite3.connect('google_ads_clicks.db')
+        stored = conn.execute("SELECT content_hash FROM page_content WHERE keyword = ?",
+                              ('cat insurance',)).fetchone()[0]
+        conn.close()
+        self.assertEqual(stored, content_hash(expected, generator))
+
+
+if __name__ == '__main__':
+    unittest.main()
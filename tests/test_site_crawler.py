@@ -0,0 +1,17 @@
+import unittest
+
+from site_crawler import HostConnection
+
+
+class HostHeaderTest(unittest.TestCase):
+
+    def test_port_is_sent_unless_default(self):
+        self.assertEqual(HostConnection('http', 'localhost', 8787, 5).host_header, 'localhost:8787')
+        self.assertEqual(HostConnection('http', 'example.com', 80, 5).host_header, 'example.com')
+        self.assertEqual(HostConnection('https', 'example.com', 443, 5).host_header, 'example.com')
+        self.assertEqual(HostConnection('https', 'example.com', 80, 5).host_header, 'example.com:80')
+        self.assertEqual(HostConnection('http', '::1', 8080, 5).host_header, '[::1]:8080')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,20 +4,116 @@ Web Application Integration for Google Ads Click Tracking
 This can be used with Flask, FastAPI, or any Python web framework
 """
 
+import atexit
+import inspect
 import json
 import hashlib
-from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, Any, Iterable, List, Optional, Tuple
 import sqlite3
 import os
+import threading
+import time
+
+from click_dimensions import (DIMENSIONS, DimensionInterner, dimension_table, is_normalized,
+                              migrate_to_normalized)
+from click_filter import ClickFilter
+from click_journal import ClickJournal
+from gclid_bloom import GclidBloomIndex
+
+if TYPE_CHECKING:
+    from analytics_sketch import LiveAnalytics
+    from click_stream import ClickStream
+
+# page_content columns and the generated content fields stored in them
+CONTENT_FIELDS = (('headline', 'headline'), ('subheadline', 'subheadline'),
+                  ('body_content', 'body_text'), ('cta_text', 'cta_text'))
+CONTENT_HASH_CACHE_SIZE = 100000
+
+
+def content_hash(content: Dict[str, str], generator: str = '') -> str:
+    """
+    Digest of every generated field (meta_description and page_url too,
+    not just the stored columns), followed by the generator_version() that
+    produced them: the landing page's ETag, and the test for unchanged
+    rewrites
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for field in sorted(content):
+        digest.update(field.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(str(content[field] or '').encode('utf-8'))
+        digest.update(b'\0')
+    return f"{digest.hexdigest()}-{generator}" if generator else digest.hexdigest()
+
+
+def generator_version(processor) -> str:
+    """
+    Digest of the content generator's code and of its matcher's code and
+    corpus. Stored with each content hash, so the landing page can answer
+    revalidation from the stored row without generating content, and rows
+    from an older generator or corpus no longer match.
+    """
+    digest = hashlib.blake2b(digest_size=4)
+    matcher = getattr(processor, 'matcher', None)
+    for part in (processor, matcher):
+        if part is None:
+            continue
+        for name, function in inspect.getmembers(type(part), inspect.isfunction):
+            digest.update(f"{name}\0{inspect.getsource(function)}\0".encode('utf-8'))
+    if matcher is not None:
+        digest.update(f"spelling={matcher.spelling is not None}\0".encode('utf-8'))
+        for keyword in matcher.keywords:  # Position is the page number
+            digest.update(keyword.encode('utf-8'))
+            digest.update(b'\0')
+    return digest.hexdigest()
 
 
 class GoogleAdsWebIntegration:
     """Handle Google Ads data persistence and retrieval for web apps"""
     
-    def __init__(self, db_path: str = "google_ads_clicks.db"):
+    def __init__(self, db_path: str = "google_ads_clicks.db",
+                 click_filter: Optional[ClickFilter] = None,
+                 gclid_bloom: bool = False, normalized: bool = False,
+                 journal_dir: Optional[str] = None,
+                 live_analytics: Optional['LiveAnalytics'] = None,
+                 click_stream: Optional['ClickStream'] = None):
         self.db_path = db_path
+        # Bot and repeat hits are counted here instead of being written
+        self.click_filter = click_filter
+        # Normalized mode: click_facts with dimension ids behind a click_data
+        # view. Existing row tables are migrated; normalized databases stay so.
+        conn = sqlite3.connect(db_path)
+        self.normalized = normalized or is_normalized(conn)
+        conn.close()
+        if self.normalized:
+            migrate_to_normalized(db_path)
+        self.interner = DimensionInterner() if self.normalized else None
+        # Table that click writes go to
+        self.click_table = 'click_facts' if self.normalized else 'click_data'
         self._init_database()
+        # Seen-GCLID filter that routes repeats straight to UPDATE
+        self.gclid_index = GclidBloomIndex(db_path) if gclid_bloom else None
+        # Journal mode: clicks and conversions are appended to segment files
+        # and bulk-loaded by click_journal.JournalLoader
+        self.journal = ClickJournal(journal_dir) if journal_dir else None
+        # keyword -> (content_hash, updated_at) known to be in page_content
+        self._content_versions: 'OrderedDict[str, Tuple[str, str]]' = OrderedDict()
+        self._versions_lock = threading.Lock()  # Shared by request threads
+        # analytics_sketch.LiveAnalytics and click_stream.ClickStream, fed
+        # with new clicks and conversions; closed by whoever created them,
+        # since shards may share them
+        self.live_analytics = live_analytics
+        self.click_stream = click_stream
+        self._observers = [observer for observer in (live_analytics, click_stream) if observer]
+        
+    def close(self):
+        """Persist in-memory state (call on shutdown)"""
+        if self.gclid_index:
+            self.gclid_index.save()
+        if self.journal:
+            self.journal.close()
         
     def _init_database(self):
         """Initialize SQLite database for click data persistence"""
@@ -51,54 +147,181 @@ class GoogleAdsWebIntegration:
                 subheadline TEXT,
                 body_content TEXT,
                 cta_text TEXT,
-                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                content_hash TEXT
             )
         """)
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(page_content)")]
+        if 'content_hash' not in columns:
+            cursor.execute("ALTER TABLE page_content ADD COLUMN content_hash TEXT")
         
+        # One row per conversion event, for time-windowed attribution
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS conversions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                conversion_value REAL DEFAULT 0
+            )
+        """)
+
+        if not self.normalized:
+            # Conversions are matched back to their click by session
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_click_session ON click_data(session_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_conversion_session ON conversions(session_id)")
+
         conn.commit()
         conn.close()
         
     def save_click_data(self, click_data: Dict[str, Any], 
-                       request_info: Dict[str, str]) -> str:
-        """Save Google Ads click data to database"""
+                       request_info: Dict[str, str],
+                       session_id: Optional[str] = None) -> Optional[str]:
+        """
+        Save Google Ads click data to database. Returns the session id, or
+        for a filtered hit the session its earlier click was saved as (None
+        if that is unknown, e.g. a bot).
+        """
+        # Generate session ID unless the caller already chose one
+        session_id = session_id or self._generate_session_id(click_data, request_info)
+        
+        if self.click_filter and self.click_filter.check(
+                request_info.get('ip_address'), click_data.get('gclid'),
+                request_info.get('user_agent'), session_id=session_id):
+            return self.click_filter.session_for(
+                request_info.get('ip_address'), click_data.get('gclid'),
+                request_info.get('user_agent'))
+        
+        gclid = click_data.get('gclid')
+        if self.journal:
+            self.journal.append({'type': 'click', 'ts': time.time(), 'session_id': session_id,
+                                 'click': click_data, 'request': request_info})
+            # The loader only refreshes a repeat GCLID's row, so like the
+            # SQLite path below only new clicks reach the observers
+            if gclid and self.gclid_index:
+                if self.gclid_index.probably_seen(gclid):
+                    return session_id
+                self.gclid_index.record_insert(gclid, 0)
+            for observer in self._observers:
+                observer.record_click(session_id, click_data)
+            return session_id
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        # Generate session ID
-        session_id = self._generate_session_id(click_data, request_info)
-        
         try:
-            cursor.execute("""
-                INSERT INTO click_data 
-                (session_id, keyword, campaign, source, medium, content, 
-                 gclid, full_url, ip_address, user_agent)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                session_id,
-                click_data.get('keyword'),
-                click_data.get('campaign'),
-                click_data.get('source'),
-                click_data.get('medium'),
-                click_data.get('content'),
-                click_data.get('gclid'),
-                click_data.get('url'),
-                request_info.get('ip_address'),
-                request_info.get('user_agent')
-            ))
+            if gclid and self.gclid_index and self.gclid_index.probably_seen(gclid):
+                if self._touch_click(cursor, gclid):
+                    conn.commit()
+                    return session_id
+                # Bloom false positive: the GCLID is new after all
+                self.gclid_index.record_false_positive()
+            
+            if self.normalized:
+                self._insert_click_fact(cursor, session_id, click_data, request_info)
+            else:
+                cursor.execute("""
+                    INSERT INTO click_data 
+                    (session_id, keyword, campaign, source, medium, content, 
+                     gclid, full_url, ip_address, user_agent)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    session_id,
+                    click_data.get('keyword'),
+                    click_data.get('campaign'),
+                    click_data.get('source'),
+                    click_data.get('medium'),
+                    click_data.get('content'),
+                    gclid,
+                    click_data.get('url'),
+                    request_info.get('ip_address'),
+                    request_info.get('user_agent')
+                ))
             conn.commit()
+            if gclid and self.gclid_index:
+                self.gclid_index.record_insert(gclid, cursor.lastrowid)
+            for observer in self._observers:
+                observer.record_click(session_id, click_data)
         except sqlite3.IntegrityError:
             # GCLID already exists, update the record
-            cursor.execute("""
-                UPDATE click_data 
-                SET timestamp = CURRENT_TIMESTAMP
-                WHERE gclid = ?
-            """, (click_data.get('gclid'),))
+            self._touch_click(cursor, gclid)
             conn.commit()
+            if self.gclid_index:
+                # Written by another process since our filter was loaded
+                self.gclid_index.record_insert(gclid, 0)
+        except Exception:
+            if self.interner:
+                # Ids interned in the rolled-back transaction no longer exist
+                self.interner.clear()
+            raise
         finally:
             conn.close()
             
         return session_id
     
+    def save_click_batch(self, clicks: List[Tuple[str, str, Dict[str, Any], Dict[str, str]]],
+                         cursor: Optional[sqlite3.Cursor] = None):
+        """
+        Insert (session_id, timestamp, click_data, request_info) tuples in one
+        statement batch; repeat GCLIDs refresh the timestamp as in
+        save_click_data. Pass a cursor to join the caller's transaction.
+        """
+        conn = None
+        if cursor is None:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+        
+        if self.normalized:
+            columns = ['session_id', 'timestamp', 'gclid', 'full_url', 'ip_address'] + \
+                [f'{name}_id' for name in DIMENSIONS]
+            rows = [[session_id, timestamp, click.get('gclid'), click.get('url'),
+                     request.get('ip_address')] +
+                    [self.interner.resolve(cursor, name, request.get('user_agent')
+                                           if name == 'user_agent' else click.get(name))
+                     for name in DIMENSIONS]
+                    for session_id, timestamp, click, request in clicks]
+        else:
+            columns = ['session_id', 'timestamp', 'keyword', 'campaign', 'source', 'medium',
+                       'content', 'gclid', 'full_url', 'ip_address', 'user_agent']
+            rows = [(session_id, timestamp, click.get('keyword'), click.get('campaign'),
+                     click.get('source'), click.get('medium'), click.get('content'),
+                     click.get('gclid'), click.get('url'), request.get('ip_address'),
+                     request.get('user_agent'))
+                    for session_id, timestamp, click, request in clicks]
+        cursor.executemany(f"""
+            INSERT INTO {self.click_table} ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+            ON CONFLICT(gclid) DO UPDATE SET timestamp = excluded.timestamp
+        """, rows)
+        
+        if self.gclid_index:
+            for _, _, click, _ in clicks:
+                if click.get('gclid'):
+                    self.gclid_index.record_insert(click['gclid'], 0)
+        if conn:
+            conn.commit()
+            conn.close()
+    
+    def _insert_click_fact(self, cursor: sqlite3.Cursor, session_id: str,
+                           click_data: Dict[str, Any], request_info: Dict[str, str]):
+        """Normalized-mode INSERT with string columns resolved to dimension ids"""
+        values = dict(click_data, user_agent=request_info.get('user_agent'))
+        ids = [self.interner.resolve(cursor, name, values.get(name)) for name in DIMENSIONS]
+        cursor.execute(f"""
+            INSERT INTO click_facts
+            (session_id, gclid, full_url, ip_address, {', '.join(f'{n}_id' for n in DIMENSIONS)})
+            VALUES (?, ?, ?, ?, {', '.join('?' for _ in DIMENSIONS)})
+        """, [session_id, click_data.get('gclid'), click_data.get('url'),
+              request_info.get('ip_address')] + ids)
+    
+    def _touch_click(self, cursor: sqlite3.Cursor, gclid: str) -> bool:
+        """Refresh the timestamp of an existing click; False if there is none"""
+        cursor.execute(f"""
+            UPDATE {self.click_table} 
+            SET timestamp = CURRENT_TIMESTAMP
+            WHERE gclid = ?
+        """, (gclid,))
+        return cursor.rowcount > 0
+    
     def get_session_data(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve click data for a session"""
         conn = sqlite3.connect(self.db_path)
@@ -137,39 +360,104 @@ class GoogleAdsWebIntegration:
             return dict(row)
         return None
     
-    def save_content_for_keyword(self, keyword: str, content: Dict[str, str]):
-        """Cache content for a keyword"""
+    def get_content_version(self, keyword: str) -> Optional[Tuple[str, str]]:
+        """(content_hash, updated_at) of a keyword's cached content, or None"""
+        with self._versions_lock:
+            version = self._content_versions.get(keyword)
+            if version:
+                self._content_versions.move_to_end(keyword)
+                return version
+
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("""
+            SELECT content_hash, updated_at FROM page_content WHERE keyword = ?
+        """, (keyword,)).fetchone()
+        conn.close()
+        if not row or not row[0]:
+            return None
+        self._remember_version(keyword, row)
+        return row
+
+    def _remember_version(self, keyword: str, version: Tuple[str, str]):
+        with self._versions_lock:
+            self._content_versions[keyword] = version
+            if len(self._content_versions) > CONTENT_HASH_CACHE_SIZE:
+                self._content_versions.popitem(last=False)
+
+    def save_content_for_keyword(self, keyword: str, content: Dict[str, str],
+                                 generator: str = ''):
+        """Cache content for a keyword; no write if it is unchanged"""
+        new_hash = content_hash(content, generator)
+        version = self.get_content_version(keyword)
+        if version and version[0] == new_hash:
+            return
+
+        # A warmed-up table only gets here when the content changed
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT OR REPLACE INTO page_content 
-            (keyword, headline, subheadline, body_content, cta_text)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            keyword,
-            content.get('headline'),
-            content.get('subheadline'),
-            content.get('body_text'),
-            content.get('cta_text')
-        ))
-        
+        self._upsert_content(cursor, [(keyword, content, new_hash)])
         conn.commit()
+        row = cursor.execute("""
+            SELECT content_hash, updated_at FROM page_content WHERE keyword = ?
+        """, (keyword,)).fetchone()
         conn.close()
+        self._remember_version(keyword, row)
+    
+    def save_content_batch(self, items: Iterable[Tuple[str, Dict[str, str]]],
+                           generator: str = '') -> int:
+        """Bulk-cache (keyword, content) pairs; returns the rows written"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        written = self._upsert_content(
+            cursor, [(keyword, content, content_hash(content, generator))
+                     for keyword, content in items])
+        conn.commit()
+        conn.close()
+        return written
+    
+    def _upsert_content(self, cursor: sqlite3.Cursor,
+                        rows: List[Tuple[str, Dict[str, str], str]]) -> int:
+        """Insert or update page_content rows whose hash differs"""
+        cursor.executemany(f"""
+            INSERT INTO page_content 
+            (keyword, {', '.join(column for column, _ in CONTENT_FIELDS)}, content_hash)
+            VALUES (?, {', '.join('?' for _ in CONTENT_FIELDS)}, ?)
+            ON CONFLICT(keyword) DO UPDATE SET
+                {', '.join(f'{column} = excluded.{column}' for column, _ in CONTENT_FIELDS)},
+                content_hash = excluded.content_hash,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE page_content.content_hash IS NOT excluded.content_hash
+        """, [[keyword] + [content.get(field) for _, field in CONTENT_FIELDS] + [digest]
+              for keyword, content, digest in rows])
+        return cursor.rowcount
     
     def track_conversion(self, session_id: str, conversion_value: float = 0):
         """Track a conversion for a session"""
+        if self.journal:
+            self.journal.append({'type': 'conversion', 'ts': time.time(),
+                                 'session_id': session_id, 'value': conversion_value})
+            for observer in self._observers:
+                observer.record_conversion(session_id, conversion_value)
+            return
+        
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        cursor.execute("""
-            UPDATE click_data 
+        cursor.execute(f"""
+            UPDATE {self.click_table} 
             SET converted = 1, conversion_value = ? 
             WHERE session_id = ?
         """, (conversion_value, session_id))
         
+        cursor.execute("""
+            INSERT INTO conversions (session_id, conversion_value)
+            VALUES (?, ?)
+        """, (session_id, conversion_value))
+        
         conn.commit()
         conn.close()
+        for observer in self._observers:
+            observer.record_conversion(session_id, conversion_value)
     
     def get_analytics(self, days: int = 30) -> Dict[str, Any]:
         """Get analytics for the last N days"""
@@ -178,16 +466,19 @@ class GoogleAdsWebIntegration:
         
         cutoff_date = datetime.now() - timedelta(days=days)
         
+        # Normalized mode counts and groups integer ids in click_facts
+        suffix = '_id' if self.normalized else ''
+        
         # Overall stats
-        cursor.execute("""
+        cursor.execute(f"""
             SELECT 
                 COUNT(*) as total_clicks,
-                COUNT(DISTINCT keyword) as unique_keywords,
-                COUNT(DISTINCT campaign) as unique_campaigns,
+                COUNT(DISTINCT keyword{suffix}) as unique_keywords,
+                COUNT(DISTINCT campaign{suffix}) as unique_campaigns,
                 SUM(converted) as total_conversions,
                 SUM(conversion_value) as total_revenue,
                 AVG(CASE WHEN converted = 1 THEN 1.0 ELSE 0.0 END) * 100 as conversion_rate
-            FROM click_data
+            FROM {self.click_table}
             WHERE timestamp > ?
         """, (cutoff_date,))
         
@@ -197,47 +488,63 @@ class GoogleAdsWebIntegration:
         ))
         
         # Top keywords
-        cursor.execute("""
-            SELECT 
-                keyword,
+        top_keywords = self._top_groups(cursor, 'keyword', """
                 COUNT(*) as clicks,
                 SUM(converted) as conversions,
                 AVG(CASE WHEN converted = 1 THEN 1.0 ELSE 0.0 END) * 100 as conversion_rate
-            FROM click_data
-            WHERE timestamp > ? AND keyword IS NOT NULL
-            GROUP BY keyword
-            ORDER BY clicks DESC
-            LIMIT 10
-        """, (cutoff_date,))
-        
-        top_keywords = [dict(zip([d[0] for d in cursor.description], row)) 
-                       for row in cursor.fetchall()]
+        """, 'clicks', cutoff_date)
         
         # Top campaigns
-        cursor.execute("""
-            SELECT 
-                campaign,
+        top_campaigns = self._top_groups(cursor, 'campaign', """
                 COUNT(*) as clicks,
                 SUM(converted) as conversions,
                 SUM(conversion_value) as revenue
-            FROM click_data
-            WHERE timestamp > ? AND campaign IS NOT NULL
-            GROUP BY campaign
-            ORDER BY revenue DESC
-            LIMIT 10
-        """, (cutoff_date,))
-        
-        top_campaigns = [dict(zip([d[0] for d in cursor.description], row)) 
-                        for row in cursor.fetchall()]
+        """, 'revenue', cutoff_date)
         
         conn.close()
         
-        return {
+        analytics = {
             'period_days': days,
             'overall_stats': overall_stats,
             'top_keywords': top_keywords,
             'top_campaigns': top_campaigns
         }
+        if self.click_filter:
+            # Since process start, not limited to the period
+            analytics['filtered_clicks'] = self.click_filter.stats()
+        return analytics
+    
+    def _top_groups(self, cursor: sqlite3.Cursor, column: str, metrics: str,
+                    order_by: str, cutoff_date: datetime) -> List[Dict[str, Any]]:
+        """Top 10 groups of recent clicks by a string column"""
+        if self.normalized:
+            # Aggregate by id, then look up only the names that are returned
+            cursor.execute(f"""
+                SELECT d.value as {column}, t.*
+                FROM (
+                    SELECT {column}_id as group_id, {metrics}
+                    FROM click_facts
+                    WHERE timestamp > ? AND {column}_id IS NOT NULL
+                    GROUP BY {column}_id
+                    ORDER BY {order_by} DESC
+                    LIMIT 10
+                ) t
+                JOIN {dimension_table(column)} d ON d.id = t.group_id
+                ORDER BY t.{order_by} DESC
+            """, (cutoff_date,))
+        else:
+            cursor.execute(f"""
+                SELECT {column}, {metrics}
+                FROM click_data
+                WHERE timestamp > ? AND {column} IS NOT NULL
+                GROUP BY {column}
+                ORDER BY {order_by} DESC
+                LIMIT 10
+            """, (cutoff_date,))
+        
+        names = [d[0] for d in cursor.description]
+        return [{name: value for name, value in zip(names, row) if name != 'group_id'}
+                for row in cursor.fetchall()]
     
     def _generate_session_id(self, click_data: Dict[str, Any], 
                            request_info: Dict[str, str]) -> str:
@@ -246,19 +553,107 @@ class GoogleAdsWebIntegration:
         return hashlib.sha256(data.encode()).hexdigest()[:16]
 
 
+# Landing page body: identical for every visitor of a keyword, so it can be
+# validated with an ETag. The session travels in a cookie instead.
+LANDING_TEMPLATE = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>{{ headline }}</title>
+        <meta name="description" content="{{ meta_description }}">
+    </head>
+    <body>
+        <h1>{{ headline }}</h1>
+        <h2>{{ subheadline }}</h2>
+        {{ body_text|safe }}
+        {% if page_url %}<p><a href="{{ page_url }}">{{ page_keyword }}</a></p>{% endif %}
+        <button onclick="convert()">{{ cta_text }}</button>
+        
+        <script>
+            function convert() {
+                fetch('/convert', {
+                    method: 'POST',
+                    headers: {'Content-Type': 'application/json'},
+                    body: JSON.stringify({})
+                });
+            }
+        </script>
+    </body>
+    </html>
+"""
+LANDING_TEMPLATE_DIGEST = hashlib.blake2b(LANDING_TEMPLATE.encode('utf-8'), digest_size=4).hexdigest()
+SESSION_COOKIE = 'ads_session'
+
+
+def processor_from_env():
+    """GoogleAdsDataProcessor configured as the landing page uses it"""
+    from google_ads_tracker import GoogleAdsDataProcessor
+    # KEYWORD_CORPUS=src/index.js matches terms without a page to the closest one
+    corpus = os.environ.get('KEYWORD_CORPUS')
+    if corpus:
+        from keyword_matcher import KeywordMatcher
+        return GoogleAdsDataProcessor(KeywordMatcher.from_source(corpus))
+    return GoogleAdsDataProcessor()
+
+
+def tracker_from_env(db_path: str = "google_ads_clicks.db", **options):
+    """Single-database or sharded tracker, as the landing page stores clicks and content"""
+    # CLICK_SHARDS=N spreads clicks over N database files for multi-worker servers
+    shards = int(os.environ.get('CLICK_SHARDS', '0'))
+    if shards:
+        from click_shards import ShardedGoogleAdsWebIntegration
+        return ShardedGoogleAdsWebIntegration(db_path, shards=shards, **options)
+    # CLICK_JOURNAL_DIR keeps SQLite off the request path; run
+    # `python click_journal.py --load` alongside to load the journal
+    return GoogleAdsWebIntegration(db_path, journal_dir=os.environ.get('CLICK_JOURNAL_DIR'),
+                                   **options)
+
+
 # Flask integration example
 def create_flask_integration():
     """Example Flask integration"""
-    from flask import Flask, request, jsonify, render_template_string
+    from flask import (Flask, Response, request, jsonify, make_response, render_template_string,
+                       stream_with_context)
+    from click_stream import ClickStream
     
     app = Flask(__name__)
-    tracker = GoogleAdsWebIntegration()
+    processor = processor_from_env()
+    generator = generator_version(processor)
+    # LIVE_ANALYTICS_DIR serves /analytics/live from streaming sketches
+    # (analytics_sketch.py) kept in this process and snapshotted there
+    live_dir = os.environ.get('LIVE_ANALYTICS_DIR')
+    live = None
+    if live_dir:
+        from analytics_sketch import LiveAnalytics
+        live = LiveAnalytics(live_dir)
+        atexit.register(live.close)
+    # Per-second rates for /stream, kept in memory by the tracking path
+    stream = ClickStream()
+    atexit.register(stream.close)
+    tracker = tracker_from_env(click_filter=ClickFilter(), gclid_bloom=True,
+                               live_analytics=live, click_stream=stream)
+    atexit.register(tracker.close)
+    
+    def validators(version: Tuple[str, Optional[str]]) -> Tuple[str, Optional[datetime]]:
+        """ETag and Last-Modified of a (content_hash, updated_at) version"""
+        etag = f"{version[0][:20]}-{generator}-{LANDING_TEMPLATE_DIGEST}"
+        last_modified = None
+        if version[1]:
+            last_modified = datetime.strptime(version[1], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        return etag, last_modified
+    
+    def is_not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+        if request.if_none_match:
+            return request.if_none_match.contains(etag)
+        return bool(last_modified and request.if_modified_since and
+                    last_modified <= request.if_modified_since)
     
     @app.route('/')
     def landing_page():
         # Extract Google Ads parameters
         click_data = {
-            'keyword': request.args.get('utm_term'),
+            # Canonical key: one content row and analytics group per intent
+            'keyword': processor.canonicalize_keyword(request.args.get('utm_term')),
             'campaign': request.args.get('utm_campaign'),
             'source': request.args.get('utm_source'),
             'medium': request.args.get('utm_medium'),
@@ -272,54 +667,54 @@ def create_flask_integration():
             'user_agent': request.headers.get('User-Agent')
         }
         
-        # Save click data
+        # Save click data, also for requests answered with 304 below
         session_id = tracker.save_click_data(click_data, request_info)
         
-        # Generate dynamic content
-        from google_ads_tracker import GoogleAdsDataProcessor
-        processor = GoogleAdsDataProcessor()
-        content = processor.generate_dynamic_content(click_data)
-        
-        # Cache content
-        if click_data['keyword']:
-            tracker.save_content_for_keyword(click_data['keyword'], content)
-        
-        # Render template with dynamic content
-        return render_template_string("""
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>{{ headline }}</title>
-                <meta name="description" content="{{ meta_description }}">
-            </head>
-            <body>
-                <h1>{{ headline }}</h1>
-                <h2>{{ subheadline }}</h2>
-                {{ body_text|safe }}
-                <button onclick="convert()">{{ cta_text }}</button>
-                
-                <script>
-                    sessionStorage.setItem('session_id', '{{ session_id }}');
-                    
-                    function convert() {
-                        fetch('/convert', {
-                            method: 'POST',
-                            headers: {'Content-Type': 'application/json'},
-                            body: JSON.stringify({session_id: '{{ session_id }}'})
-                        });
-                    }
-                </script>
-            </body>
-            </html>
-        """, 
-        session_id=session_id,
-        **content)
+        keyword = click_data['keyword']
+        # A row stored by this generator answers revalidation before any
+        # content is generated; rows from an older generator are a miss
+        version = tracker.get_content_version(keyword) if keyword else None
+        if version and not version[0].endswith(f"-{generator}"):
+            version = None
+        not_modified = bool(version) and is_not_modified(*validators(version))
+        
+        content = None
+        if not not_modified:
+            content = processor.generate_dynamic_content(click_data)
+            rendered_hash = content_hash(content, generator)
+            if keyword:
+                # Cache content; only rewritten (new Last-Modified) when it changed
+                tracker.save_content_for_keyword(keyword, content, generator)
+                version = tracker.get_content_version(keyword)
+            if not version or version[0] != rendered_hash:
+                version = (rendered_hash, None)
+            not_modified = is_not_modified(*validators(version))
+        
+        etag, last_modified = validators(version)
+        if not_modified:
+            response = make_response('', 304)
+        else:
+            # Render template with dynamic content
+            response = make_response(render_template_string(LANDING_TEMPLATE, **content))
+        
+        response.set_etag(etag)
+        if last_modified:
+            response.last_modified = last_modified
+        # Every hit revalidates, so clicks are still tracked and each
+        # response carries the visitor's session cookie
+        response.cache_control.no_cache = True
+        if session_id:
+            # A filtered hit without a known session keeps the visitor's cookie
+            response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite='Lax')
+        return response
     
     @app.route('/convert', methods=['POST'])
     def track_conversion():
-        data = request.get_json()
-        session_id = data.get('session_id')
+        data = request.get_json(silent=True) or {}
+        session_id = data.get('session_id') or request.cookies.get(SESSION_COOKIE)
         conversion_value = data.get('value', 0)
+        if not session_id:
+            return jsonify({'status': 'error', 'error': 'no session'}), 400
         
         tracker.track_conversion(session_id, conversion_value)
         
@@ -331,6 +726,22 @@ def create_flask_integration():
         stats = tracker.get_analytics(days)
         return jsonify(stats)
     
+    @app.route('/analytics/live')
+    def live_analytics():
+        if live is None:
+            return jsonify({'status': 'error', 'error': 'LIVE_ANALYTICS_DIR is not set'}), 404
+        days = int(request.args.get('days', 30))
+        return jsonify(live.query(days))
+    
+    @app.route('/stream')
+    def stream_metrics():
+        # One frame per second for as long as the client stays connected;
+        # each subscriber holds a worker thread, so serve with threads
+        response = Response(stream_with_context(stream.subscribe()), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+        return response
+    
     return app
 
 